@@ -1,8 +1,44 @@
-import json
-from datetime import datetime
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-import mplcursors
+import math
+from collections import defaultdict
+from pathlib import Path
+
+from Data_visualization.capture_json import DecodeError, loads
+from Data_visualization.sessions import top_drivers
+import Data_visualization.cli as cli
+import Data_visualization.profiling as profiling
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in path to JSONL file with session data and the drivers to plot.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = cli.build_parser(
+        "Plot lap time trends per driver from telemetry data.",
+        multiple=False,
+        limit_help="Without --drivers, only plot the top N drivers of the final classification (default: all)",
+        theme=False,
+    )
+    parser.add_argument(
+        "--drivers",
+        type=str,
+        nargs="+",
+        help="Driver short names to plot, ex. CHA PIN (default: all drivers)",
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=["grid", "single"],
+        default="grid",
+        help="Render one small-multiples grid or one figure per driver (default: grid)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Grid mode: image file to save instead of showing. Single mode: output directory (default: lap_trends)",
+    )
+    return parser.parse_args()
 
 
 def parse_lap_time(lap_str):
@@ -26,12 +62,44 @@ def format_hover(index, lap_times):
     return f"Lap {int(index)+1}\nTime: {minutes}:{seconds:06.3f}"
 
 
-def plot_driver_laps(data, driver_short_name):
-    seen_laps = set()
-    lap_times = []
+def load_entries(filepath):
+    """Load every driver entry from a JSONL capture file.
+
+    Args:
+        filepath (string): path to JSONL file to be loaded
+
+    Returns:
+        list: flat list of driver entry dicts
+    """
+    all_entries = []
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                parsed = loads(line)
+                if isinstance(parsed, list):
+                    all_entries.extend(parsed)
+            except DecodeError:
+                continue
+    return all_entries
+
+
+def group_laps_by_driver(data, drivers=None):
+    """Collect unique lap times for every driver in a single pass over the entries.
+
+    Args:
+        data (list): List of telemetry entry dicts.
+        drivers (iterable, optional): Driver short names to keep. Defaults to all drivers.
+
+    Returns:
+        dict: Mapping of driver short name to a list of lap times in seconds, in capture order.
+    """
+    wanted = set(drivers) if drivers else None
+    seen_laps = defaultdict(set)
+    lap_times = defaultdict(list)
 
     for entry in data:
-        if entry.get("driver_short_name") != driver_short_name:
+        code = entry.get("driver_short_name")
+        if not code or (wanted is not None and code not in wanted):
             continue
 
         sector_key = (
@@ -39,10 +107,10 @@ def plot_driver_laps(data, driver_short_name):
             entry.get("sector2_time"),
             entry.get("sector3_time"),
         )
-        if not all(sector_key) or "" in sector_key or sector_key in seen_laps:
+        if not all(sector_key) or sector_key in seen_laps[code]:
             continue
 
-        seen_laps.add(sector_key)
+        seen_laps[code].add(sector_key)
 
         lap_str = entry.get("latest_lap_time")
         if not lap_str:
@@ -50,28 +118,42 @@ def plot_driver_laps(data, driver_short_name):
 
         lap_time = parse_lap_time(lap_str)
         if lap_time is not None:
-            lap_times.append(lap_time)
+            lap_times[code].append(lap_time)
 
-    if not lap_times:
-        print(f"No valid lap times found for {driver_short_name}")
-        return
+    return dict(lap_times)
 
-    lap_indices = list(range(1, len(lap_times) + 1))
 
-    # Plot as scatter
-    plt.figure(figsize=(10, 6))
-    scatter = plt.scatter(lap_indices, lap_times, c="dodgerblue", s=60)
+def draw_driver_laps(ax, driver_short_name, lap_times):
+    """Draw one driver's lap time trend onto an existing axes.
+
+    Args:
+        ax (Axes): matplotlib axes to draw on, cleared first so it can be reused
+        driver_short_name (string): driver code used in the title
+        lap_times (list): lap times in seconds
+
+    Returns:
+        PathCollection: the scatter artist, used to attach hover cursors
+    """
+    import matplotlib.ticker as ticker
+
+    ax.clear()
+    lap_indices = list(range(1, len(lap_times) + 1))
+    scatter = ax.scatter(lap_indices, lap_times, c="dodgerblue", s=60)
 
     # Format Y-axis as mm:ss.xxx
-    plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(format_mmss))
-    plt.xlabel("Lap Count")
-    plt.ylabel("Latest Lap Time")
-    plt.title(f"Lap Time Trend for {driver_short_name}")
-    plt.xticks(lap_indices)
-    plt.grid(False)
-    plt.tight_layout()
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(format_mmss))
+    ax.set_xlabel("Lap Count")
+    ax.set_ylabel("Latest Lap Time")
+    ax.set_title(f"Lap Time Trend for {driver_short_name}")
+    ax.set_xticks(lap_indices)
+    ax.grid(False)
+    return scatter
+
+
+def attach_hover(scatter, lap_times):
+    """Enable hover annotations showing lap number and time."""
+    import mplcursors
 
-    # Enable hover
     cursor = mplcursors.cursor(scatter, hover=True)
     cursor.snap = True
 
@@ -79,20 +161,102 @@ def plot_driver_laps(data, driver_short_name):
     def on_add(sel):
         sel.annotation.set_text(format_hover(sel.index, lap_times))
 
+    return cursor
+
+
+def plot_driver_laps(data, driver_short_name):
+    import matplotlib.pyplot as plt
+
+    lap_times = group_laps_by_driver(data, [driver_short_name]).get(driver_short_name)
+    if not lap_times:
+        print(f"No valid lap times found for {driver_short_name}")
+        return
+
+    # Plot as scatter
+    fig, ax = plt.subplots(figsize=(10, 6))
+    scatter = draw_driver_laps(ax, driver_short_name, lap_times)
+    fig.tight_layout()
+
+    # Enable hover
+    attach_hover(scatter, lap_times)
+
     plt.show()
 
 
-if __name__ == "__main__":
-    with open("Montreal_2025/f1aData_FP1_2.jsonl", "r", encoding="utf-8") as f:
-        lines = f.readlines()
+def plot_driver_grid(laps_by_driver, output=None):
+    """Render every driver's lap trend as small multiples in one figure.
 
-    all_entries = []
-    for line in lines:
-        try:
-            parsed = json.loads(line)
-            if isinstance(parsed, list):
-                all_entries.extend(parsed)
-        except json.JSONDecodeError:
-            continue
+    Args:
+        laps_by_driver (dict): Mapping of driver short name to lap times in seconds.
+        output (string, optional): Image path to save to. Shows the figure when omitted.
+    """
+    import matplotlib.pyplot as plt
 
-    plot_driver_laps(all_entries, driver_short_name="CHA")
+    codes = sorted(laps_by_driver)
+    ncols = min(3, len(codes))
+    nrows = math.ceil(len(codes) / ncols)
+    fig, axes = plt.subplots(
+        nrows, ncols, figsize=(6 * ncols, 3.5 * nrows), sharey=True, squeeze=False
+    )
+    cursors = []
+    for ax, code in zip(axes.flat, codes):
+        scatter = draw_driver_laps(ax, code, laps_by_driver[code])
+        ax.set_title(code)
+        cursors.append(attach_hover(scatter, laps_by_driver[code]))
+    for ax in axes.flat[len(codes) :]:
+        ax.set_visible(False)
+    fig.suptitle("Lap Time Trends")
+    fig.tight_layout()
+
+    if output:
+        fig.savefig(output)
+        plt.close(fig)
+        print(f"✅ Lap trends saved to {output}")
+    else:
+        plt.show()
+
+
+def save_driver_figures(laps_by_driver, output_dir):
+    """Save one lap trend image per driver, redrawing a single figure for each.
+
+    Args:
+        laps_by_driver (dict): Mapping of driver short name to lap times in seconds.
+        output_dir (string): Directory the images are written to.
+    """
+    import matplotlib.pyplot as plt
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for code in sorted(laps_by_driver):
+        draw_driver_laps(ax, code, laps_by_driver[code])
+        fig.tight_layout()
+        fig.savefig(output_dir / f"lap_trend_{code}.png")
+    plt.close(fig)
+    print(f"✅ {len(laps_by_driver)} lap trends saved to {output_dir}")
+
+
+def main():
+    args = parse_args()
+    if not cli.sessions_from_args(args):
+        return
+    drivers = args.drivers
+    if drivers is None and args.limit:
+        drivers = top_drivers(args.input_file, args.limit)
+    entries = load_entries(args.input_file)
+    laps_by_driver = group_laps_by_driver(entries, drivers)
+    if args.drivers:
+        for code in args.drivers:
+            if code not in laps_by_driver:
+                print(f"No valid lap times found for {code}")
+    if not laps_by_driver:
+        return
+
+    if args.mode == "grid":
+        plot_driver_grid(laps_by_driver, args.output)
+    else:
+        save_driver_figures(laps_by_driver, args.output or "lap_trends")
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -1,13 +1,9 @@
-import json
-import matplotlib.pyplot as plt
-
-plt.style.use("dark_background")
-import pandas as pd
 from pathlib import Path
-from timple.timedelta import strftimedelta
 from datetime import timedelta
-from driver_info import DRIVERS  # Your own driver metadata dictionary
-import argparse
+from Data_visualization.sessions import read_last_snapshot
+from Data_visualization.theme import get_palette
+import Data_visualization.cli as cli
+import Data_visualization.profiling as profiling
 
 # This gives you the parent directory of the script you're running
 base_dir = Path(__file__).resolve().parent
@@ -18,30 +14,15 @@ This file is largely based off the qualifying delta file from fastf1.  Source: h
 
 
 def parse_args():
-    """Parses out command line arguments.  Currently just takes in path to JSONL file with session data.
+    """Parses out command line arguments.  Takes in path to JSONL file with session data.
 
     Returns:
         Parser Arguments: Array of optional parser arguments
     """
-    parser = argparse.ArgumentParser(
-        description="Generate sector leaderboards from telemetry data."
-    )
-    parser.add_argument(
-        "input_file", type=str, help="Path to the JSON Lines input file"
-    )
-    # TODO: Implment variable number of drivers
-    parser.add_argument(
-        "--limit",
-        type=int,
-        default=10,
-        help="Limit number of drivers in top sectors (default: 10)",
-    )
-    # TODO: Implement session argument and move away from file name parsing to determine session type
-    parser.add_argument(
-        "--session",
-        type=str,
-        choices=["FP1", "FP2", "Q", "R"],
-        help="Filter by session type",
+    parser = cli.build_parser(
+        "Plot lap time deltas to the fastest driver from telemetry data.",
+        multiple=False,
+        limit_help="Only plot the top N drivers of the classification (default: all)",
     )
     return parser.parse_args()
 
@@ -59,15 +40,18 @@ def parse_time(ts):
         return None
 
 
-def load_last_snapshot(filepath):
-    """Load the final telemetry snapshot from a JSONL file."""
-    with open(filepath, "rb") as f:
-        f.seek(-2, 2)  # Move to just before EOF
-        while f.read(1) != b"\n":
-            f.seek(-2, 1)
-        last_line = f.readline().decode("utf-8")
+def load_last_snapshot(filepath, limit=None):
+    """Load the final telemetry snapshot from a JSONL file.
 
-    return json.loads(last_line)
+    Args:
+        filepath (string): path to JSONL file
+        limit (int, optional): only keep the top ``limit`` classified drivers
+    """
+    snapshot = read_last_snapshot(filepath)
+    if limit:
+        snapshot = sorted(snapshot, key=lambda e: int(e.get("position") or 999))
+        snapshot = snapshot[:limit]
+    return snapshot
 
 
 def extract_fastest_laps(latest_snapshot):
@@ -82,8 +66,19 @@ def extract_fastest_laps(latest_snapshot):
     return laps
 
 
-def plot_qualifying_deltas(fastest_laps):
-    """Plot horizontal bar chart of lap time deltas."""
+def plot_qualifying_deltas(fastest_laps, palette=None, session=None):
+    """Plot horizontal bar chart of lap time deltas.
+
+    Args:
+        fastest_laps (list): lap dicts from extract_fastest_laps
+        palette (Palette, optional): colors to use, defaults to the dark theme
+        session (SessionInfo, optional): session the laps come from, used in the title
+    """
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    palette = palette or get_palette()
+    palette.apply_matplotlib()
     df = pd.DataFrame(fastest_laps)
     df = df.sort_values("lap_time").reset_index(drop=True)
 
@@ -92,7 +87,10 @@ def plot_qualifying_deltas(fastest_laps):
     df["delta_str"] = df["delta"].apply(lambda td: f"+{td.total_seconds():.3f}")
 
     # Colors and labels
-    df["color"] = df["code"].apply(lambda c: DRIVERS.get(c, {}).get("color", "#888"))
+    registry = palette.registry
+    if session is not None:
+        registry = registry.for_event(session.event)
+    df["color"] = registry.lookup(df["code"], "color", "#888")
     df["label"] = df["code"]
 
     fig, ax = plt.subplots(figsize=(8, len(df) * 0.5 + 1))
@@ -110,14 +108,16 @@ def plot_qualifying_deltas(fastest_laps):
             va="center",
             ha="left",
             fontsize=10,
-            color="white",
+            color=palette.theme.foreground,
         )
     ax.set_yticks(df.index)
     ax.set_yticklabels(df["label"])
     ax.invert_yaxis()
-    ax.set_xlabel("Delta to Pole (s)")
+    title = session.title if session else "Qualifying"
+    reference = "Pole" if session is None or session.kind == "Q" else "Fastest"
+    ax.set_xlabel(f"Delta to {reference} (s)")
     ax.set_title(
-        f"Qualifying Deltas (Pole: {df.loc[0, 'code']} - {df.loc[0, 'display']})"
+        f"{title} Deltas ({reference}: {df.loc[0, 'code']} - {df.loc[0, 'display']})"
     )
     # ax.grid(True, axis="x", linestyle="--", color="black", zorder=-1000)
     # Remove top and right borders (spines)
@@ -130,10 +130,16 @@ def plot_qualifying_deltas(fastest_laps):
 
 def main():
     args = parse_args()
-    snapshot = load_last_snapshot(args.input_file)
+    sessions = cli.sessions_from_args(args)
+    if not sessions:
+        return
+    snapshot = load_last_snapshot(sessions[0].path, args.limit)
     laps = extract_fastest_laps(snapshot)
-    plot_qualifying_deltas(laps)
+    if not laps:
+        print("No valid lap times found.")
+        return
+    plot_qualifying_deltas(laps, get_palette(args.theme), sessions[0])
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
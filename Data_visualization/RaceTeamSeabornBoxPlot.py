@@ -1,154 +1,137 @@
 """Team Pace Comparison
 =============================================
 Rank team's race pace from the fastest to the slowest.
+In-laps, out-laps and slow laps are removed using the stint analysis before plotting.
 This code is largely inspired by the team race comparison from FastF1. Source: https://docs.fastf1.dev/gen_modules/examples_gallery/plot_team_pace_ranking.html#sphx-glr-gen-modules-examples-gallery-plot-team-pace-ranking-py
 """
 
-import json
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 from pathlib import Path
 
-from driver_info import DRIVERS, TEAMS  # Make sure this exists and is importable
-import argparse
+from Data_visualization.theme import get_palette
+import Data_visualization.cli as cli
+import Data_visualization.profiling as profiling
 
 base_dir = Path(__file__).resolve().parent
 
 
 def parse_args():
-    """Parses out command line arguments.  Currently just takes in path to JSONL file with session data.
+    """Parses out command line arguments.  Takes in paths to one or more race JSONL files.
 
     Returns:
         Parser Arguments: Array of optional parser arguments
     """
-    parser = argparse.ArgumentParser(
-        description="Generate sector leaderboards from telemetry data."
-    )
-    parser.add_argument(
-        "input_file", type=str, help="Path to the JSON Lines input file"
-    )
-    # TODO: Implment variable number of drivers
-    parser.add_argument(
-        "--limit",
-        type=int,
-        default=10,
-        help="Limit number of drivers in top sectors (default: 10)",
-    )
-    # TODO: Implement session argument and move away from file name parsing to determine session type
+    parser = cli.build_parser("Rank team race pace from telemetry data.", db=True)
     parser.add_argument(
-        "--session",
-        type=str,
-        choices=["FP1", "FP2", "Q", "R"],
-        help="Filter by session type",
+        "--slow-factor",
+        type=float,
+        help="Drop laps slower than this multiple of the session reference pace (default: stints.SLOW_FACTOR)",
     )
     return parser.parse_args()
 
 
-def parse_time(s):
-    """Convert a lap time string into float seconds, or return None if invalid."""
-    if not s:
-        return None
-    try:
-        if ":" in s:
-            m, rest = s.split(":")
-            return float(m) * 60 + float(rest)
-        return float(s)
-    except Exception:
-        return None
-
-
-def load_unique_laps(filepath):
-    """Load all race laps, removing repeated consecutive entries per driver."""
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    entries = []
-    for line in lines:
-        try:
-            row = json.loads(line)
-            if isinstance(row, list):
-                entries.extend(row)
-        except json.JSONDecodeError:
-            continue
-
-    cleaned = []
-    last_seen = {}
-    for entry in entries:
-        code = entry.get("driver_short_name")
-        lap_str = entry.get("latest_lap_time")
-        if not code or not lap_str:
-            continue
-        if last_seen.get(code) != lap_str:
-            last_seen[code] = lap_str
-            cleaned.append(entry)
-    return cleaned
-
-
-def build_dataframe(entries):
-    """Build a dataframe of driver/team/laptime from cleaned entries."""
-    rows = []
-    for e in entries:
-        code = e.get("driver_short_name")
-        lap_str = e.get("latest_lap_time")
-        lap_time = parse_time(lap_str)
-        if not code or lap_time is None:
-            continue
-        team = DRIVERS.get(code, {}).get("team", "Unknown")
-        rows.append({"Driver": code, "Team": team, "LapTime (s)": lap_time})
-    return pd.DataFrame(rows)
-
-
-def plot_team_pace(df, title="Team Race Pace - Race 2 (Median Lap Time)"):
-    """Plot a dark-mode seaborn boxplot of team pace from the lap dataframe."""
-    sns.set_theme(style="darkgrid")
-    plt.style.use("dark_background")
-
-    # Team ranking by median pace
-    team_order = df.groupby("Team")["LapTime (s)"].median().sort_values().index
-
-    team_palette = {
-        team: TEAMS.get(team, {}).get("color", "#999") for team in team_order
+def build_dataframe(laps):
+    """Build a dataframe of session/driver/team/laptime from the clean laps of a stint table."""
+    import pandas as pd
+
+    from Data_visualization.driver_info import REGISTRY
+
+    clean = laps[laps["Clean"]]
+    return pd.DataFrame(
+        {
+            "Session": clean["Session"],
+            "Driver": clean["Driver"],
+            "Team": REGISTRY.lookup(clean["Driver"], "team", events=clean["Event"]),
+            "LapTime (s)": clean["LapTime"],
+        }
+    ).reset_index(drop=True)
+
+
+def pace_limits(lap_times, padding=0.5):
+    """Y-axis limits around the bulk of the lap times, ignoring far outliers."""
+    low, high = lap_times.quantile([0.01, 0.99])
+    return low - padding, high + padding
+
+
+def plot_team_pace(df, sessions=None, palette=None):
+    """Plot a seaborn boxplot of team pace for every session in the lap dataframe.
+
+    Args:
+        df (DataFrame): clean laps from build_dataframe
+        sessions (list, optional): SessionInfo of the plotted files, used for the titles
+        palette (Palette, optional): colors to use, defaults to the dark theme
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    titles = {
+        s.name: f"Team {s.label} Pace - {s.title} (Median Lap Time)"
+        for s in sessions or []
     }
+    palette = palette or get_palette()
+    palette.apply_matplotlib(seaborn=True)
+    line_color = palette.theme.foreground
 
-    fig, ax = plt.subplots(figsize=(14, 8))
-    sns.boxplot(
-        data=df,
-        x="Team",
-        y="LapTime (s)",
-        hue="Team",
-        order=team_order,
-        palette=team_palette,
-        dodge=False,
-        whiskerprops={"color": "white"},
-        boxprops={"edgecolor": "white"},
-        medianprops={"color": "grey"},
-        capprops={"color": "white"},
+    sessions = list(dict.fromkeys(df["Session"]))
+    fig, axes = plt.subplots(
+        len(sessions), 1, figsize=(14, 6 * len(sessions)), squeeze=False
     )
-
-    # Clean up axes
-    ax.set_title(title, fontsize=14)
-    ax.set(xlabel=None)
-    ax.spines["top"].set_visible(False)
-    ax.spines["right"].set_visible(False)
-    ax.grid(False)
-    # Set custom y-axis limits with a little padding
-    min_time = df["LapTime (s)"].min()
-    max_time = df["LapTime (s)"].max()
-    ax.set_ylim(97, 106)  # Add padding for clarity
+    ylim = pace_limits(df["LapTime (s)"])
+    for ax, session in zip(axes[:, 0], sessions):
+        session_df = df[df["Session"] == session]
+        # Team ranking by median pace
+        team_order = (
+            session_df.groupby("Team")["LapTime (s)"].median().sort_values().index
+        )
+
+        team_palette = {
+            team: palette.team_colors.get(team, "#999") for team in team_order
+        }
+
+        sns.boxplot(
+            data=session_df,
+            x="Team",
+            y="LapTime (s)",
+            hue="Team",
+            order=team_order,
+            palette=team_palette,
+            dodge=False,
+            whiskerprops={"color": line_color},
+            boxprops={"edgecolor": line_color},
+            medianprops={"color": "grey"},
+            capprops={"color": line_color},
+            ax=ax,
+        )
+
+        # Clean up axes
+        ax.set_title(titles.get(session, f"Team Pace - {session}"), fontsize=14)
+        ax.set(xlabel=None)
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+        ax.grid(False)
+        # Shared limits keep the sessions comparable
+        ax.set_ylim(*ylim)
     plt.tight_layout()
     plt.show()
 
 
 def main():
     args = parse_args()
-    entries = load_unique_laps(args.input_file)
-    df = build_dataframe(entries)
+    sessions = cli.sessions_from_args(args)
+    if not sessions:
+        return
+    from Data_visualization.lap_table import load_lap_table
+    from Data_visualization.stints import SLOW_FACTOR, fit_degradation, segment_stints
+
+    laps = load_lap_table([s.path for s in sessions], args.limit, args.db)
+    slow_factor = SLOW_FACTOR if args.slow_factor is None else args.slow_factor
+    laps = segment_stints(laps, slow_factor)
+    print(fit_degradation(laps).to_string(index=False))
+    df = build_dataframe(laps)
     if df.empty:
         print("No valid lap times found.")
     else:
-        plot_team_pace(df)
+        plot_team_pace(df, sessions, get_palette(args.theme))
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -0,0 +1,147 @@
+"""Capture JSON
+=============================================
+Fast decoding and encoding of capture lines.
+
+Every capture line is a JSON list of driver entries with a fixed set of string
+fields, and decoding those lines is most of the cost of every loader.  This
+module picks the fastest decoder that is installed:
+
+* ``orjson`` decodes about twice as fast as the standard library.
+* ``msgspec`` is used when orjson is not installed.
+* ``json`` from the standard library is the fallback, so neither package is
+  required.
+
+``loads`` returns dicts and lists and is a drop-in for ``json.loads``;
+``dumps`` is used by the downloader to write lines.
+Run the module on capture files to compare the decoders:
+
+    python -m Data_visualization.capture_json Montreal_2025
+"""
+
+import argparse
+import json
+import time
+
+import Data_visualization.profiling as profiling
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if msgspec is not None:
+    DecodeError = (json.JSONDecodeError, msgspec.DecodeError)
+else:
+    # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+    DecodeError = (json.JSONDecodeError,)
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def loads(line):
+        """Decode a capture line (str or bytes) into Python objects."""
+        return orjson.loads(line)
+
+    def dumps(obj):
+        """Encode an object as a compact single-line JSON string."""
+        return orjson.dumps(obj).decode("utf-8")
+
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    loads = msgspec.json.decode
+
+    def dumps(obj):
+        """Encode an object as a compact single-line JSON string."""
+        return msgspec.json.encode(obj).decode("utf-8")
+
+else:
+    BACKEND = "json"
+    loads = json.loads
+
+    def dumps(obj):
+        """Encode an object as a compact single-line JSON string."""
+        return json.dumps(obj, separators=(",", ":"))
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in JSONL session files or directories of them.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare capture decoding speed of the available JSON libraries."
+    )
+    parser.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="JSON Lines input files or directories containing them",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timing runs per file (default: 5)"
+    )
+    profiling.add_arguments(parser)
+    return parser.parse_args()
+
+
+def best_time(function, repeat):
+    """Fastest wall time of ``repeat`` calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def load_file(filepath, decode):
+    """Read a capture end to end with one line decoder, skipping malformed lines."""
+    snapshots = []
+    with open(filepath, "rb") as f:
+        for line in f:
+            try:
+                snapshots.append(decode(line))
+            except DecodeError:
+                continue
+    return snapshots
+
+
+def main():
+    import pandas as pd
+
+    from Data_visualization.lap_table import expand_inputs
+
+    args = parse_args()
+    rows = []
+    for path in expand_inputs(args.input_files):
+        snapshots = load_file(path, json.loads)
+        stdlib = best_time(lambda: load_file(path, json.loads), args.repeat)
+        fast = best_time(lambda: load_file(path, loads), args.repeat)
+        encode_stdlib = best_time(
+            lambda: [json.dumps(s) for s in snapshots], args.repeat
+        )
+        encode_fast = best_time(lambda: [dumps(s) for s in snapshots], args.repeat)
+        rows.append(
+            {
+                "Session": path.stem,
+                "Lines": len(snapshots),
+                "JsonMs": stdlib,
+                "FastMs": fast,
+                "Speedup": stdlib / fast,
+                "DumpJsonMs": encode_stdlib,
+                "DumpFastMs": encode_fast,
+            }
+        )
+    print(f"Decoder: {BACKEND}")
+    print(pd.DataFrame(rows).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,276 @@
+"""Capture Merge
+=============================================
+Merge captures of the same session taken by several downloader instances.
+
+One downloader misses everything that changes while it reloads the page and
+waits for it to render.  Instances started with staggered phases
+(``F1ALiveTimingDownloader.py --instances 2 --instance 1``) read the screen in
+each other's blind spots, and this module merges their files into one denser
+timeline.
+
+Each file is read line by line and ordered by capture time (``captured_at``,
+or the ``%H:%M:%S`` timestamp unwrapped past midnight for older captures, in
+which case all files are assumed to start on the same UTC day).  The streams
+are combined with ``heapq.merge``, so the merge holds one snapshot per input
+in memory and runs in linear time for a fixed number of inputs.  A snapshot
+whose capture time is earlier than the one before it in the same file keeps
+its place in that file.
+
+Snapshots from different instances are then reconciled, comparing screen
+contents without the capture time fields:
+
+* duplicate: the same screen as the last merged snapshot, read by another
+  instance less than ``tolerance`` seconds later, is dropped.  Read later, it
+  is kept as a sign that nothing changed in between.
+* stale: a screen another instance already showed and that has since been
+  superseded is a lagging reload and is dropped.
+* conflict: different screens from different instances less than
+  ``tolerance`` seconds apart describe the same moment; the one with more
+  filled cells wins, ties going to the later read.
+
+``latest_lap_time`` is filled again from the merged timeline with a
+``SectorTracker``, since each instance only saw its own snapshots:
+
+    python -m Data_visualization.capture_merge Montreal_2025/f1aData_FP1.jsonl Montreal_2025/f1aData_FP1_2.jsonl -o FP1_merged.jsonl
+"""
+
+import argparse
+import heapq
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+from Data_visualization.capture_json import DecodeError, dumps, loads
+from Data_visualization.lap_table import parse_time
+from Data_visualization.sector_tracker import SectorTracker
+from Data_visualization.sessions import read_first_snapshot
+import Data_visualization.profiling as profiling
+
+# Fields that differ between instances reading the same screen
+CAPTURE_FIELDS = ("timestamp", "captured_at", "page_latency", "latest_lap_time")
+# Cells counted when two instances disagree about the same moment
+FILLED_FIELDS = (
+    "gap",
+    "interval",
+    "best_lap",
+    "sector1_time",
+    "sector2_time",
+    "sector3_time",
+)
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in the capture files of one session.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Merge captures of one session from staggered downloader instances."
+    )
+    parser.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="JSON Lines captures of the same session, one per instance",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default="merged.jsonl",
+        help="Merged JSON Lines file to write (default: merged.jsonl)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.0,
+        help="Seconds within which differing snapshots conflict (default: 1)",
+    )
+    parser.add_argument(
+        "--memory",
+        type=int,
+        default=8,
+        help="Recent merged screens checked for stale snapshots (default: 8)",
+    )
+    profiling.add_arguments(parser)
+    return parser.parse_args()
+
+
+def _clock(timestamp):
+    h, m, s = timestamp.split(":")
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def read_capture(filepath, instance, epoch=True, stats=None):
+    """Stream the snapshots of one capture in capture-time order.
+
+    Args:
+        filepath (Path): JSONL capture file
+        instance (int): input number, used to tell instances apart
+        epoch (bool): order by ``captured_at`` instead of the timestamp
+        stats (Counter, optional): counts malformed lines under ``malformed``
+
+    Yields:
+        tuple: (capture time, instance, line number, snapshot)
+    """
+    previous = None
+    day = 0
+    with open(filepath, "rb") as f:
+        for number, line in enumerate(f):
+            try:
+                snapshot = loads(line)
+                first = snapshot[0]
+                t = first["captured_at"] if epoch else _clock(first["timestamp"])
+                t = float(t)
+            except (*DecodeError, IndexError, KeyError, TypeError, ValueError):
+                if stats is not None:
+                    stats["malformed"] += 1
+                continue
+            if not epoch:
+                t += day * 86400
+                if previous is not None and t < previous - 43200:
+                    day += 1
+                    t += 86400
+            if previous is not None and t < previous:
+                t = previous
+            previous = t
+            yield t, instance, number, snapshot
+
+
+def _signature(snapshot):
+    """Screen contents of a snapshot without the per-read capture fields."""
+    return tuple(
+        tuple((k, v) for k, v in entry.items() if k not in CAPTURE_FIELDS)
+        for entry in snapshot
+    )
+
+
+def _filled(snapshot):
+    return sum(1 for entry in snapshot for k in FILLED_FIELDS if entry.get(k))
+
+
+def _lap_time(sectors):
+    seconds = [parse_time(s) for s in sectors]
+    if None in seconds:
+        return ""
+    total = sum(seconds)
+    return f"{int(total // 60)}:{total % 60:06.3f}"
+
+
+def merge_snapshots(streams, tolerance=1.0, memory=8, stats=None):
+    """Merge time-ordered snapshot streams into one reconciled timeline.
+
+    Args:
+        streams (list): iterables of (time, instance, line, snapshot) tuples,
+            each in time order, e.g. from ``read_capture``
+        tolerance (float): seconds within which differing snapshots of two
+            instances are treated as conflicting readings
+        memory (int): number of recent merged screens checked for stale snapshots
+        stats (Counter, optional): counts merged, duplicate, stale and
+            conflict snapshots
+
+    Yields:
+        tuple: (time, snapshot) in time order
+    """
+    stats = stats if stats is not None else Counter()
+    recent = OrderedDict()  # signature -> instance that first showed it
+    pending = None  # (time, instance, snapshot, signature, filled)
+
+    for t, instance, _, snapshot in heapq.merge(*streams):
+        signature = _signature(snapshot)
+        if pending and instance != pending[1]:
+            same_moment = t - pending[0] <= tolerance
+            if signature == pending[3]:
+                if same_moment:
+                    stats["duplicate"] += 1
+                    continue
+            elif recent.get(signature, instance) != instance:
+                stats["stale"] += 1
+                continue
+            elif same_moment:
+                stats["conflict"] += 1
+                if _filled(snapshot) < pending[4]:
+                    continue
+                pending = None
+        if pending:
+            stats["merged"] += 1
+            yield pending[0], pending[2]
+        recent[signature] = recent.pop(signature, instance)
+        if len(recent) > memory:
+            recent.popitem(last=False)
+        pending = (t, instance, snapshot, signature, _filled(snapshot))
+    if pending:
+        stats["merged"] += 1
+        yield pending[0], pending[2]
+
+
+def merge_captures(filepaths, output, tolerance=1.0, memory=8):
+    """Merge captures of one session into a new JSONL file.
+
+    Args:
+        filepaths (list): JSONL captures, one per downloader instance
+        output (string): path of the merged capture to write
+        tolerance (float): seconds within which differing snapshots conflict
+        memory (int): recent merged screens checked for stale snapshots
+
+    Returns:
+        Counter: read, malformed, merged, duplicate, stale and conflict
+        counts plus the longest time between snapshots per input and merged
+    """
+    # Epoch times only compare across files when every file has them
+    epoch = all(
+        "captured_at" in (read_first_snapshot(path) or [{}])[0] for path in filepaths
+    )
+    stats = Counter()
+    gaps = {}
+
+    def tracked(stream, label):
+        previous = None
+        for item in stream:
+            stats["read"] += 1
+            if previous is not None:
+                gaps[label] = max(gaps.get(label, 0.0), item[0] - previous)
+            previous = item[0]
+            yield item
+
+    streams = [
+        tracked(read_capture(path, i, epoch, stats), str(path))
+        for i, path in enumerate(filepaths)
+    ]
+    tracker = SectorTracker()
+    previous = None
+    with open(output, "w", encoding="utf-8") as f:
+        for t, snapshot in merge_snapshots(streams, tolerance, memory, stats):
+            for entry in snapshot:
+                completed = tracker.update(
+                    entry.get("driver_short_name"),
+                    entry.get("sector1_time", ""),
+                    entry.get("sector2_time", ""),
+                    entry.get("sector3_time", ""),
+                )
+                entry["latest_lap_time"] = _lap_time(completed) if completed else ""
+            f.write(dumps(snapshot))
+            f.write("\n")
+            if previous is not None:
+                gaps[output] = max(gaps.get(output, 0.0), t - previous)
+            previous = t
+    stats["max_gap"] = gaps
+    return stats
+
+
+def main():
+    args = parse_args()
+    stats = merge_captures(args.input_files, args.output, args.tolerance, args.memory)
+    counts = ("read", "malformed", "merged", "duplicate", "stale", "conflict")
+    print(", ".join(f"{key}: {stats[key]}" for key in counts))
+    print(
+        pd.Series(stats["max_gap"], name="MaxGapSeconds")
+        .rename_axis("Capture")
+        .to_string()
+    )
+    print(f"✅ Merged capture saved to {args.output}")
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,93 @@
+"""Command line options shared by the visualizers.
+
+Every visualizer takes capture files (or weekend directories), ``--session`` to
+keep only one session type and ``--limit`` to restrict the output.  Session
+type comes from the file contents (see ``sessions``), and both filters are
+applied while loading so skipped files and drivers are never decoded into rows.
+``--profile`` profiles the run (see ``profiling``).
+"""
+
+import argparse
+
+from Data_visualization.sessions import (
+    SESSION_ALIASES,
+    SESSION_TYPES,
+    expand_inputs,
+    select_sessions,
+)
+from Data_visualization.theme import THEMES
+import Data_visualization.profiling as profiling
+
+
+def build_parser(
+    description,
+    multiple=True,
+    limit=None,
+    limit_help="Only include the top N drivers of the final classification (default: all)",
+    theme=True,
+    db=False,
+):
+    """Create an argument parser with the shared visualizer options.
+
+    Args:
+        description (str): Parser description.
+        multiple (bool): Accept several input files and directories instead of one file.
+        limit (int, optional): Default for --limit.
+        limit_help (str): Help text for --limit.
+        theme (bool): Add the --theme option.
+        db (bool): Add the --db option to read laps through a timing database.
+
+    Returns:
+        ArgumentParser: Parser the caller can extend before calling parse_args.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    if multiple:
+        parser.add_argument(
+            "input_files",
+            type=str,
+            nargs="+",
+            help="JSON Lines input files or directories containing them",
+        )
+    else:
+        parser.add_argument(
+            "input_file", type=str, help="Path to the JSON Lines input file"
+        )
+    parser.add_argument("--limit", type=int, default=limit, help=limit_help)
+    parser.add_argument(
+        "--session",
+        type=str,
+        choices=[*SESSION_TYPES, *SESSION_ALIASES],
+        help="Only use files whose contents match this session type",
+    )
+    if theme:
+        parser.add_argument(
+            "--theme",
+            type=str,
+            choices=sorted(THEMES),
+            default="dark",
+            help="Color theme (default: dark)",
+        )
+    if db:
+        parser.add_argument(
+            "--db",
+            type=str,
+            help="Ingest the captures into this timing database and query it instead of parsing the files",
+        )
+    profiling.add_arguments(parser)
+    return parser
+
+
+def sessions_from_args(args):
+    """Session details of the input files that pass the --session filter.
+
+    Args:
+        args (Namespace): Parsed arguments from a ``build_parser`` parser.
+
+    Returns:
+        list: SessionInfo per selected file
+    """
+    paths = getattr(args, "input_files", None) or [args.input_file]
+    sessions = select_sessions(expand_inputs(paths), args.session)
+    if not sessions:
+        print(f"No {args.session or ''} session files found.".replace("  ", " "))
+    return sessions
@@ -0,0 +1,271 @@
+"""Capture Data Quality
+=============================================
+Flag capture artifacts in one vectorized pass per file and write a
+machine-readable report.
+
+Each capture is loaded as a ``SnapshotTable`` and every check is a NumPy mask
+over its rows or snapshots:
+
+* ``impossible_lap``: a completed lap whose sector sum beats the fastest lap
+  the timing screen reported in the session, or with a sector under half the
+  session's median for that sector.
+* ``sector_sum_mismatch``: the sectors of a completed lap disagree with the
+  lap column on that snapshot and the next one.  In races it holds the lap
+  just completed, in practice and qualifying the driver's best, which a lap
+  cannot beat.  These are mostly sectors of two different laps shown side by
+  side.  A lap slower than the lap column is only flagged when the capture's
+  contents show it is a race (see ``sessions.detect_session``).
+* ``time_regression``: a snapshot timestamp earlier than the previous one.
+* ``cadence_gap``: more than ``cadence_factor`` times the median time between
+  snapshots, i.e. missed page loads.
+
+Sectors are shown to a tenth and truncated, so a sector sum is up to 0.3 s
+below the lap time; ``tolerance`` is added on top of that.  ``exclude_flagged``
+drops flagged laps from a lap table using the report, matching them by event,
+session, driver and timestamp.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Data_visualization.lap_table import expand_inputs
+from Data_visualization.sessions import (
+    detect_session,
+    read_first_snapshot,
+    read_last_snapshot,
+)
+from Data_visualization.snapshot_table import load_snapshot_table
+import Data_visualization.profiling as profiling
+
+CHECKS = ("impossible_lap", "sector_sum_mismatch", "time_regression", "cadence_gap")
+TRUNCATION = 0.3
+REPORT_VERSION = 2
+# Columns identifying a lap in both the report and a lap table
+KEYS = ["Event", "Session", "Driver", "Timestamp"]
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in JSONL session files or directories of them.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Validate capture files and report data quality issues."
+    )
+    parser.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="JSON Lines input files or directories containing them",
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        default="quality_report.json",
+        help="JSON report to write (default: quality_report.json)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.05,
+        help="Seconds allowed beyond sector rounding (default: 0.05)",
+    )
+    parser.add_argument(
+        "--cadence-factor",
+        type=float,
+        default=3.0,
+        help="Flag snapshot gaps longer than this multiple of the median (default: 3)",
+    )
+    profiling.add_arguments(parser)
+    return parser.parse_args()
+
+
+def _clock_string(seconds):
+    seconds = int(seconds) % 86400
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def validate_capture(filepath, tolerance=0.05, cadence_factor=3.0):
+    """Run every check over one capture.
+
+    Args:
+        filepath (Path): JSONL capture file
+        tolerance (float): seconds allowed beyond sector truncation
+        cadence_factor (float): multiple of the median snapshot interval
+            above which a gap is flagged
+
+    Returns:
+        dict: file summary with per-check counts and the flagged issues
+    """
+    path = Path(filepath)
+    table = load_snapshot_table(path)
+    first, last = read_first_snapshot(path), read_last_snapshot(path)
+    # Only a race's lap column holds the lap just completed
+    race = detect_session(first, last, fallback=False) == "R"
+    rows = table.rows
+    clock = table.time
+    issues = []
+
+    # Snapshot-level checks
+    step = np.diff(clock)
+    cadence = float(np.median(step)) if len(step) else 0.0
+    for check, mask in (
+        ("time_regression", step < 0),
+        ("cadence_gap", step > cadence_factor * cadence),
+    ):
+        for s in np.flatnonzero(mask):
+            issues.append(
+                {
+                    "check": check,
+                    "snapshot": int(s + 1),
+                    "timestamp": _clock_string(clock[s + 1]),
+                    "driver": None,
+                    "value": round(float(step[s]), 3),
+                    "expected": round(cadence, 3),
+                }
+            )
+
+    # Lap-level checks run over the rows of each driver in capture order
+    order = np.lexsort((rows["snapshot"], rows["driver"]))
+    ordered = rows[order]
+    s1, s2, s3 = (ordered[k].astype(float) for k in ("s1", "s2", "s3"))
+    lap_column = ordered["best_lap"].astype(float)
+    previous_s3 = np.concatenate(([np.nan], s3[:-1]))
+    new_driver = np.concatenate(
+        ([True], ordered["driver"][1:] != ordered["driver"][:-1])
+    )
+    previous_s3[new_driver] = np.nan
+    next_lap_column = np.concatenate((lap_column[1:], [np.nan]))
+    last_row = np.concatenate((new_driver[1:], [True]))
+    next_lap_column[last_row] = lap_column[last_row]
+    sector_sum = s1 + s2 + s3
+    completed = ~np.isnan(sector_sum) & (s3 != previous_s3)
+
+    with np.errstate(invalid="ignore"):
+        fastest = np.nanmin(lap_column) if np.any(~np.isnan(lap_column)) else np.nan
+        medians = [
+            np.nanmedian(s[completed]) if completed.any() else np.nan
+            for s in (s1, s2, s3)
+        ]
+        impossible = completed & (
+            (sector_sum < fastest - TRUNCATION - tolerance)
+            | (s1 < 0.5 * medians[0])
+            | (s2 < 0.5 * medians[1])
+            | (s3 < 0.5 * medians[2])
+        )
+        # The lap column is often updated one snapshot after the sectors, so a
+        # lap only mismatches when it disagrees with both readings
+        mismatch = completed.copy()
+        for reading in (lap_column, next_lap_column):
+            difference = sector_sum - reading
+            bad = difference < -TRUNCATION - tolerance
+            if race:
+                bad |= difference > tolerance
+            mismatch &= bad
+
+    codes = np.array(table.drivers)
+    for check, mask, expected in (
+        ("impossible_lap", impossible, np.full(len(ordered), fastest)),
+        ("sector_sum_mismatch", mismatch, lap_column),
+    ):
+        for i in np.flatnonzero(mask):
+            snapshot = int(ordered["snapshot"][i])
+            issues.append(
+                {
+                    "check": check,
+                    "snapshot": snapshot,
+                    "timestamp": _clock_string(clock[snapshot]),
+                    "driver": str(codes[ordered["driver"][i]]),
+                    "value": round(float(sector_sum[i]), 3),
+                    "expected": (
+                        None if np.isnan(expected[i]) else round(float(expected[i]), 3)
+                    ),
+                }
+            )
+
+    issues.sort(key=lambda issue: (issue["snapshot"], issue["driver"] or ""))
+    counts = dict.fromkeys(CHECKS, 0)
+    for issue in issues:
+        counts[issue["check"]] += 1
+    return {
+        "path": str(path),
+        "event": path.resolve().parent.name,
+        "session": path.stem,
+        "kind": detect_session(first, last),
+        "snapshots": len(table.weather),
+        "rows": len(rows),
+        "completed_laps": int(completed.sum()),
+        "cadence_s": cadence,
+        "checks": counts,
+        "issues": issues,
+    }
+
+
+def validate(filepaths, tolerance=0.05, cadence_factor=3.0):
+    """Validate capture files and build the report dict."""
+    return {
+        "version": REPORT_VERSION,
+        "tolerance": tolerance,
+        "cadence_factor": cadence_factor,
+        "files": [
+            validate_capture(path, tolerance, cadence_factor)
+            for path in expand_inputs(filepaths)
+        ],
+    }
+
+
+def exclude_flagged(laps, report, checks=("impossible_lap", "sector_sum_mismatch")):
+    """Drop laps flagged in a report from a lap table.
+
+    Args:
+        laps (DataFrame): lap table from ``lap_table.load_lap_table``
+        report (dict or string): report dict or path to a report JSON file
+        checks (tuple): lap checks whose flags exclude a lap
+
+    Returns:
+        DataFrame: laps without the flagged rows
+    """
+    if not isinstance(report, dict):
+        with open(report, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    flagged = pd.DataFrame(
+        [
+            (entry["event"], entry["session"], issue["driver"], issue["timestamp"])
+            for entry in report["files"]
+            for issue in entry["issues"]
+            if issue["check"] in checks
+        ],
+        columns=KEYS,
+    ).drop_duplicates()
+    keys = pd.MultiIndex.from_frame(laps[KEYS])
+    return laps[~keys.isin(pd.MultiIndex.from_frame(flagged))].reset_index(drop=True)
+
+
+def main():
+    args = parse_args()
+    report = validate(args.input_files, args.tolerance, args.cadence_factor)
+    summary = pd.DataFrame(
+        [
+            {
+                "Event": entry["event"],
+                "Session": entry["session"],
+                "Kind": entry["kind"],
+                "Laps": entry["completed_laps"],
+                **entry["checks"],
+            }
+            for entry in report["files"]
+        ]
+    )
+    print(summary.to_string(index=False))
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Quality report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    profiling.run(main)
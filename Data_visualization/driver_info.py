@@ -1,143 +1,239 @@
-# Utility file containing info about drivers and colors to be used for data display
-TEAMS = {
-    "Campos Racing": {"color": "#EBC110"},
-    "Rodin Motorsport": {"color": "#000000"},
-    "Prema Racing": {"color": "#E80309"},
-    "MP Motorsport": {"color": "#F7401A"},
-    "ART Grand Prix": {"color": "#B4B3B4"},
-    "Hitech TGR": {"color": "#2240FD"},
-}
+"""Driver and team registry used for data display.
+
+Driver metadata lives in ``drivers.json`` next to this file, grouped by season.
+A driver entry may carry ``first_round`` / ``last_round`` to cover wildcards
+and mid-season swaps, and a season's ``rounds`` calendar maps event names to
+round numbers, so captures in ``Montreal_2025`` look drivers up in round 4.
+The registry validates the data on load, precomputes the derived display
+fields once and answers lookups for whole arrays of driver codes at a time.
+"""
+
+import json
+from pathlib import Path
 
+import numpy as np
+import pandas as pd
 
-DRIVERS = {
-    "CHA": {
-        "full_name": "Chloe Chambers",
-        "team": "Campos Racing",
-        "color": "#1D19AC",
-        "sponsor": "Red Bull Ford",
-        "number": "14",
-    },
-    "HAV": {
-        "full_name": "Nicole Havrda",
-        "team": "Hitech TGR",
-        "color": "#002663",
-        "sponsor": "American Express",
-        "number": "2",
-    },
-    "GAD": {
-        "full_name": "Nina Gademan",
-        "team": "Prema Racing",
-        "color": "#FF87BC",
-        "sponsor": "Alpine",
-        "number": "3",
-    },
-    "FEL": {
-        "full_name": "Emma Felbermayr",
-        "team": "Rodin Motorsport",
-        "color": "#52E252",
-        "sponsor": "Kick Sauber",
-        "number": "5",
-    },
-    "CRO": {
-        "full_name": "Courtney Crone",
-        "team": "ART Grand Prix",
-        "color": "#B6BABD",
-        "sponsor": "HAAS",
-        "number": "7",
-    },
-    "PAA": {
-        "full_name": "Mathilda PAATZ (WCD)",
-        "team": "Hitech TGR",
-        "color": "#F8A350",
-        "sponsor": "Gatorade",
-        "number": "8",
-    },
-    "ANA": {
-        "full_name": "Aiva Anagnostiadis",
-        "team": "Hitech TGR",
-        "color": "#FFFFFF",
-        "sponsor": "Tag Heuer",
-        "number": "11",
-    },
-    "LAR": {
-        "full_name": "Alba Larsen",
-        "team": "MP Motorsport",
-        "color": "#cd2028",
-        "sponsor": "Tommy Hilfiger",
-        "number": "12",
-    },
-    "FER": {
-        "full_name": "Rafaela Ferreira",
-        "team": "Campos Racing",
-        "color": "#6692FF",
-        "sponsor": "Racing Bulls",
-        "number": "18",
-    },
-    "LLO": {
-        "full_name": "Ella Lloyd",
-        "team": "Rodin Motorsport",
-        "color": "#FF8000",
-        "sponsor": "McLaren",
-        "number": "20",
-    },
-    "PAL": {
-        "full_name": "Alisha Palmowski",
-        "team": "Campos Racing",
-        "color": "#001344",
-        "sponsor": "Red Bull Racing",
-        "number": "21",
-    },
-    "NOB": {
-        "full_name": "Aurelia Nobels",
-        "team": "ART Grand Prix",
-        "color": "#FFC0CB",
-        "sponsor": "Puma",
-        "number": "22",
-    },
-    "CIC": {
-        "full_name": "Joanne Ciconte",
-        "team": "MP Motorsport",
-        "color": "#cb007b",
-        "sponsor": "F1 Academy",
-        "number": "25",
-    },
-    "CHO": {
-        "full_name": "Chloe Chong",
-        "team": "Rodin Motorsport",
-        "color": "#3F0F12",
-        "sponsor": "Charlotte Tilbury",
-        "number": "27",
-    },
-    "PIN": {
-        "full_name": "Doriane Pin",
-        "team": "Prema Racing",
-        "color": "#00D7B6",
-        "sponsor": "Mercedes",
-        "number": "28",
-    },
-    "BLO": {
-        "full_name": "Lia Block",
-        "team": "ART Grand Prix",
-        "color": "#1868DB",
-        "sponsor": "Williams",
-        "number": "57",
-    },
-    "WEU": {
-        "full_name": "Maya Weug",
-        "team": "MP Motorsport",
-        "color": "#002663",
-        "sponsor": "Scuderia Ferrari",
-        "number": "64",
-    },
-    "HAU": {
-        "full_name": "Tina Hausmann",
-        "team": "Prema Racing",
-        "color": "#229971",
-        "sponsor": "Aston Martin",
-        "number": "64",
-    },
-    # Add more drivers as needed...
+import Data_visualization.Utils as Utils
+
+DATA_FILE = Path(__file__).resolve().parent / "drivers.json"
+UNKNOWN_DRIVER = {
+    "full_name": "Unknown",
+    "last_name": "Unknown",
+    "team": "Unknown",
+    "color": "#CCCCCC",
+    "text_color": "black",
+    "team_color": "#CCCCCC",
+    "sponsor": "Unknown",
+    "number": "00",
 }
+UNKNOWN_TEAM = {"color": "#CCCCCC"}
+DRIVER_FIELDS = ("code", "full_name", "team", "color", "sponsor", "number")
+
+
+def is_hex_color(value):
+    """True for ``#RRGGBB`` strings."""
+    if not isinstance(value, str) or len(value) != 7 or value[0] != "#":
+        return False
+    try:
+        int(value[1:], 16)
+    except ValueError:
+        return False
+    return True
+
+
+def validate(data):
+    """Check registry data for missing fields, bad colors and clashing codes or numbers.
+
+    Codes and car numbers must be unique among the drivers entered in the same
+    round of a season.
+
+    Args:
+        data (dict): parsed contents of the registry file
+
+    Raises:
+        ValueError: listing every problem found
+    """
+    problems = []
+    for season, content in data.get("seasons", {}).items():
+        teams = content.get("teams", {})
+        for event, r in content.get("rounds", {}).items():
+            if not isinstance(r, int) or r < 1:
+                problems.append(f"{season}: event {event} has invalid round {r}")
+        for team, info in teams.items():
+            if not is_hex_color(info.get("color")):
+                problems.append(f"{season}: team {team} has invalid color")
+        drivers = content.get("drivers", [])
+        for entry in drivers:
+            label = f"{season}: {entry.get('code', '?')}"
+            missing = [field for field in DRIVER_FIELDS if not entry.get(field)]
+            if missing:
+                problems.append(f"{label} missing {', '.join(missing)}")
+            if entry.get("team") not in teams:
+                problems.append(f"{label} has unknown team {entry.get('team')}")
+            if not is_hex_color(entry.get("color")):
+                problems.append(f"{label} has invalid color {entry.get('color')}")
+            if entry.get("first_round", 1) > entry.get("last_round", 99):
+                problems.append(f"{label} has an empty round range")
+
+        rounds = {
+            r
+            for entry in drivers
+            for r in (entry.get("first_round", 1), entry.get("last_round", 1))
+        }
+        for r in sorted(rounds):
+            active = [e for e in drivers if _in_round(e, r)]
+            for field in ("code", "number"):
+                values = [e.get(field) for e in active]
+                clashes = sorted({v for v in values if values.count(v) > 1})
+                for value in clashes:
+                    problems.append(
+                        f"{season} round {r}: {field} {value} used by more than one driver"
+                    )
+    if problems:
+        raise ValueError("Invalid driver registry:\n  " + "\n  ".join(problems))
+
+
+def _in_round(entry, round_number):
+    return entry.get("first_round", 1) <= round_number <= entry.get("last_round", 99)
+
+
+class DriverRegistry:
+    """Drivers and teams of one season, optionally narrowed to one round.
+
+    Attributes:
+        version (int): data version from the registry file
+        season (string): season the entries belong to
+        table (DataFrame): one row per driver code with the stored and derived fields
+        teams (dict): team name to team info dict
+    """
+
+    def __init__(self, data, season=None, round_number=None):
+        self._data = data
+        self._rounds = {}
+        seasons = data["seasons"]
+        self.version = data.get("version", 1)
+        self.season = season or max(seasons)
+        content = seasons[self.season]
+        self.round = round_number
+        self.teams = content["teams"]
+
+        entries = content["drivers"]
+        if round_number is not None:
+            entries = [e for e in entries if _in_round(e, round_number)]
+        table = pd.DataFrame.from_records(entries)
+        if "wildcard" not in table:
+            table["wildcard"] = False
+        table["wildcard"] = table["wildcard"].fillna(False).astype(bool)
+        # Later entries for the same code (mid-season changes) win
+        table = table.drop_duplicates("code", keep="last").set_index("code")
+        table = table.drop(columns=["first_round", "last_round"], errors="ignore")
+        table["last_name"] = table["full_name"].str.split().str[-1]
+        table["text_color"] = [Utils.get_text_color(c) for c in table["color"]]
+        table["team_color"] = table["team"].map(
+            {team: info["color"] for team, info in self.teams.items()}
+        )
+        self.table = table
+
+    def for_round(self, round_number, season=None):
+        """Registry narrowed to the drivers entered in one round, built once per round.
+
+        A round of None gives the whole season, where later entries win.
+        """
+        key = (season or self.season, round_number)
+        if key == (self.season, self.round):
+            return self
+        registry = self._rounds.get(key)
+        if registry is None:
+            registry = DriverRegistry(self._data, *key)
+            self._rounds[key] = registry
+        return registry
+
+    def for_event(self, event):
+        """Registry of the round an event label like "Montreal_2025" belongs to.
+
+        The season is the label's year suffix and the round comes from that
+        season's ``rounds`` calendar.  Events missing from the calendar get
+        the whole season.
+        """
+        name, _, year = str(event).rpartition("_")
+        seasons = self._data["seasons"]
+        season = year if name and year in seasons else self.season
+        rounds = seasons[season].get("rounds", {})
+        return self.for_round(rounds.get(name if name else str(event)), season)
+
+    def lookup(self, codes, field, default=None, events=None):
+        """Look up one field for an array of driver codes.
+
+        Args:
+            codes (array-like): driver codes
+            field (string): registry field, e.g. "color", "team" or "last_name"
+            default: value for unknown codes, defaults to the UNKNOWN_DRIVER
+                value (or the code itself for name fields)
+            events (array-like, optional): event label of every code, e.g. a
+                lap table's Event column, to look each code up in the
+                registry of its round (see ``for_event``)
+
+        Returns:
+            ndarray: one value per code
+        """
+        codes = np.asarray(codes, dtype=object)
+        if events is not None:
+            events = np.asarray(events, dtype=object)
+            values = np.empty(len(codes), dtype=object)
+            for event in pd.unique(events):
+                rows = events == event
+                values[rows] = self.for_event(event).lookup(codes[rows], field, default)
+            return values
+        index = self.table.index.get_indexer(codes)
+        values = self.table[field].to_numpy(dtype=object)[index]
+        unknown = index < 0
+        if unknown.any():
+            if default is not None:
+                values[unknown] = default
+            elif field in ("full_name", "last_name"):
+                values[unknown] = codes[unknown]
+            else:
+                values[unknown] = UNKNOWN_DRIVER.get(field)
+        return values
+
+    def team_colors(self, teams, default=UNKNOWN_TEAM["color"]):
+        """Look up the team color for an array of team names."""
+        colors = {team: info["color"] for team, info in self.teams.items()}
+        return (
+            pd.Series(np.asarray(teams, dtype=object))
+            .map(colors)
+            .fillna(default)
+            .to_numpy(dtype=object)
+        )
+
+    def drivers(self):
+        """Driver info dicts keyed by code."""
+        return self.table.drop(
+            columns=["last_name", "text_color", "team_color"]
+        ).to_dict("index")
+
+
+def load_registry(path=DATA_FILE, season=None, round_number=None):
+    """Load and validate the registry file.
+
+    Args:
+        path (Path): registry JSON file
+        season (string, optional): season to load, defaults to the latest
+        round_number (int, optional): only keep drivers entered in this round
+
+    Returns:
+        DriverRegistry: validated registry
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    validate(data)
+    return DriverRegistry(data, season, round_number)
+
+
+REGISTRY = load_registry()
+TEAMS = REGISTRY.teams
+DRIVERS = REGISTRY.drivers()
 
 
 def get_driver_info(code):
@@ -0,0 +1,365 @@
+"""Gap and Interval Analysis
+=============================================
+Rebuild gap-to-leader and interval time series for a race and detect battles
+and overtakes.
+
+During a race the timing screen shows the leader's gap as ``LAP`` and the
+leader's interval column holds the current race lap.  Lapped cars show ``1L``,
+``2L``...  and the other cars a time in seconds.  A ``RaceTimeline`` parses a
+capture once into snapshot x driver arrays so battle and overtake queries are
+plain array operations and can be repeated over many races cheaply.
+"""
+
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from Data_visualization.capture_json import DecodeError, loads
+from Data_visualization.theme import get_palette
+from Data_visualization.lap_table import capture_seconds
+from Data_visualization.sessions import top_drivers
+import Data_visualization.cli as cli
+import Data_visualization.profiling as profiling
+
+PIT_STATUSES = ("IN PIT", "OUT")
+EVENT_COLUMNS = [
+    "Session",
+    "Event",
+    "Driver",
+    "Opponent",
+    "StartLap",
+    "EndLap",
+    "Laps",
+    "MinInterval",
+    "Timestamp",
+]
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in paths to one or more race JSONL files.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = cli.build_parser(
+        "Detect battles and overtakes from race telemetry data.",
+        limit_help="Only report and plot the top N drivers of the final classification (default: all)",
+    )
+    parser.set_defaults(session="R")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.0,
+        help="Interval in seconds below which two cars are battling (default: 1.0)",
+    )
+    parser.add_argument(
+        "--min-laps",
+        type=int,
+        default=3,
+        help="Consecutive laps under the threshold to count as a battle (default: 3)",
+    )
+    parser.add_argument(
+        "--events", type=str, help="Write the event table to this CSV file"
+    )
+    return parser.parse_args()
+
+
+def parse_gap_strings(values):
+    """Vectorized parse of gap/interval strings.
+
+    Args:
+        values (array-like): strings such as ``"1.2"``, ``"+0.4"``, ``"2L"``, ``"LAP"`` or ``""``
+
+    Returns:
+        tuple: (seconds, laps) float arrays.  ``LAP`` is 0 seconds, ``NL`` is
+        NaN seconds and N laps, empty values are NaN in both.
+    """
+    strings = pd.Series(np.asarray(values, dtype=object).ravel(), dtype="string")
+    strings = strings.str.strip().str.lstrip("+")
+    seconds = pd.to_numeric(strings, errors="coerce").to_numpy(dtype=float)
+    seconds[(strings == "LAP").to_numpy(dtype=bool)] = 0.0
+    laps = pd.to_numeric(
+        strings.str.extract(r"^(\d+)L$", expand=False), errors="coerce"
+    ).to_numpy(dtype=float)
+    shape = np.shape(values)
+    return seconds.reshape(shape), laps.reshape(shape)
+
+
+class RaceTimeline:
+    """Snapshot x driver arrays for one race capture.
+
+    Attributes:
+        session (string): session label
+        drivers (ndarray): driver codes, the column order of every matrix
+        timestamps (ndarray): capture timestamp strings, one per snapshot
+        time (ndarray): seconds since the first snapshot
+        race_lap (ndarray): race lap shown for the leader, 0 before the start
+        position (ndarray): int8 positions, 0 where the driver is missing
+        gap (ndarray): gap to the leader in seconds, NaN for lapped cars
+        interval (ndarray): interval to the car ahead in seconds
+        gap_laps (ndarray): laps behind the leader, NaN when not lapped
+        in_pit (ndarray): True while the driver is shown as IN PIT or OUT
+    """
+
+    def __init__(self, session, snapshots):
+        self.session = session
+        self.drivers = np.array(
+            sorted({e["driver_short_name"] for snap in snapshots for e in snap})
+        )
+        column = {code: i for i, code in enumerate(self.drivers)}
+        n_snaps, n_drivers = len(snapshots), len(self.drivers)
+
+        position = np.zeros((n_snaps, n_drivers), dtype=np.int8)
+        gap = np.full((n_snaps, n_drivers), "", dtype=object)
+        interval = np.full((n_snaps, n_drivers), "", dtype=object)
+        in_pit = np.zeros((n_snaps, n_drivers), dtype=bool)
+        timestamps, captured_at = [], []
+        for s, snap in enumerate(snapshots):
+            timestamps.append(snap[0].get("timestamp", "") if snap else "")
+            captured_at.append(snap[0].get("captured_at") if snap else None)
+            for entry in snap:
+                d = column[entry["driver_short_name"]]
+                position[s, d] = int(entry.get("position") or 0)
+                gap[s, d] = entry.get("gap", "")
+                interval[s, d] = entry.get("interval", "")
+                in_pit[s, d] = entry.get("best_lap") in PIT_STATUSES
+
+        self.timestamps = np.array(timestamps)
+        clock = capture_seconds(self.timestamps, captured_at)
+        self.time = clock - clock[0] if n_snaps else clock
+        self.position = position
+        self.in_pit = in_pit
+        self.gap, self.gap_laps = parse_gap_strings(gap)
+        interval_s, _ = parse_gap_strings(interval)
+
+        # The leader's interval cell carries the race lap counter instead of a time
+        leader = position == 1
+        self.race_lap = np.zeros(n_snaps, dtype=np.int16)
+        rows, cols = np.nonzero(leader)
+        self.race_lap[rows] = np.nan_to_num(interval_s[rows, cols]).astype(np.int16)
+        self.race_lap = np.maximum.accumulate(self.race_lap)
+        interval_s[leader] = np.nan
+        self.interval = interval_s
+
+        # holder[s, p] is the column of the driver in position p + 1
+        self.holder = np.full((n_snaps, n_drivers + 1), -1, dtype=np.int16)
+        rows, cols = np.nonzero(position > 0)
+        self.holder[rows, position[rows, cols] - 1] = cols
+        self.ahead = np.full((n_snaps, n_drivers), -1, dtype=np.int16)
+        behind_leader = position > 1
+        rows, cols = np.nonzero(behind_leader)
+        self.ahead[rows, cols] = self.holder[rows, position[rows, cols] - 2]
+
+        # Last snapshot of every race lap, used for lap-based queries
+        laps, last = np.unique(self.race_lap[::-1], return_index=True)
+        keep = laps > 0
+        self.lap_numbers = laps[keep]
+        self.lap_snapshots = (n_snaps - 1 - last)[keep]
+
+    @classmethod
+    def from_file(cls, filepath):
+        """Load a race capture JSONL file into a timeline."""
+        snapshots = []
+        with open(filepath, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    snap = loads(line)
+                except DecodeError:
+                    continue
+                if isinstance(snap, list) and snap:
+                    snapshots.append(snap)
+        return cls(Path(filepath).stem, snapshots)
+
+    def battles(self, threshold=1.0, min_laps=3):
+        """Find runs of laps where a driver stays within ``threshold`` seconds of the same car ahead.
+
+        Args:
+            threshold (float): interval in seconds
+            min_laps (int): minimum number of consecutive laps
+
+        Returns:
+            DataFrame: battle events with the columns in EVENT_COLUMNS
+        """
+        idx = self.lap_snapshots
+        close = self.interval[idx] < threshold
+        # A battle is a run of laps behind the same opponent, -1 marks no battle
+        opponent = np.where(close, self.ahead[idx], -1)
+        padded = np.vstack(
+            [
+                np.full((1, opponent.shape[1]), -1),
+                opponent,
+                np.full((1, opponent.shape[1]), -1),
+            ]
+        )
+        events = []
+        for d in range(len(self.drivers)):
+            column = padded[:, d]
+            change = np.flatnonzero(column[1:] != column[:-1])
+            for start, end in zip(change[:-1], change[1:]):
+                rival = column[start + 1]
+                if rival < 0 or end - start < min_laps:
+                    continue
+                laps = slice(start, end)
+                events.append(
+                    (
+                        self.session,
+                        "battle",
+                        self.drivers[d],
+                        self.drivers[rival],
+                        int(self.lap_numbers[start]),
+                        int(self.lap_numbers[end - 1]),
+                        int(end - start),
+                        float(np.nanmin(self.interval[idx[laps], d])),
+                        self.timestamps[idx[start]],
+                    )
+                )
+        return pd.DataFrame(events, columns=EVENT_COLUMNS)
+
+    def overtakes(self):
+        """Find position swaps between consecutive snapshots once the race is running.
+
+        The timing screen reorders rows gradually, so a swap only counts when
+        the gap to the leader agrees with the new order.  Places lost to a car
+        in the pit lane are not overtakes and are skipped.
+
+        Returns:
+            DataFrame: overtake events with the columns in EVENT_COLUMNS
+        """
+        prev_pos, pos = self.position[:-1], self.position[1:]
+        running = (self.race_lap[:-1] > 0)[:, None]
+        gained = running & (prev_pos > 0) & (pos > 0) & (pos < prev_pos)
+        s, d = np.nonzero(gained)
+        # The overtaken car held the gainer's new position in the previous snapshot
+        victim = self.holder[s, pos[s, d] - 1]
+        valid = victim >= 0
+        s, d, victim = s[valid], d[valid], victim[valid]
+        after = s + 1
+        valid = (
+            (pos[s, victim] > pos[s, d])
+            & (self.gap[after, d] < self.gap[after, victim])
+            & ~self.in_pit[after, victim]
+            & ~self.in_pit[after, d]
+        )
+        s, d, victim = s[valid], d[valid], victim[valid]
+
+        # Rows that slide back on screen later show the same pass again; only
+        # keep a pass when the pair's previous pass went the other way.
+        pair = np.minimum(d, victim) * len(self.drivers) + np.maximum(d, victim)
+        order = np.lexsort((s, pair))
+        s, d, victim, pair = s[order], d[order], victim[order], pair[order]
+        repeated = np.zeros(len(s), dtype=bool)
+        repeated[1:] = (pair[1:] == pair[:-1]) & (d[1:] == d[:-1])
+        order = np.argsort(s[~repeated], kind="stable")
+        s, d, victim = (
+            s[~repeated][order],
+            d[~repeated][order],
+            victim[~repeated][order],
+        )
+
+        laps = self.race_lap[s + 1]
+        return pd.DataFrame(
+            {
+                "Session": self.session,
+                "Event": "overtake",
+                "Driver": self.drivers[d],
+                "Opponent": self.drivers[victim],
+                "StartLap": laps,
+                "EndLap": laps,
+                "Laps": 0,
+                "MinInterval": self.interval[s + 1, d],
+                "Timestamp": self.timestamps[s + 1],
+            },
+            columns=EVENT_COLUMNS,
+        )
+
+    def events(self, threshold=1.0, min_laps=3):
+        """Battles and overtakes in one table, ordered by lap."""
+        frames = [
+            f for f in (self.battles(threshold, min_laps), self.overtakes()) if len(f)
+        ]
+        if not frames:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        return (
+            pd.concat(frames, ignore_index=True)
+            .sort_values(["StartLap", "Timestamp"], kind="stable")
+            .reset_index(drop=True)
+        )
+
+
+def plot_gaps(timelines, palette=None, titles=None, drivers=None, events=None):
+    """Plot the gap to the leader over race time for every driver, one axes per race.
+
+    Args:
+        timelines (list): RaceTimeline per race
+        palette (Palette, optional): colors to use, defaults to the dark theme
+        titles (list, optional): axes title per timeline, defaults to the session name
+        drivers (list, optional): set of driver codes to plot per timeline, defaults to all
+        events (list, optional): event label per timeline, selecting the
+            drivers entered in its round
+    """
+    palette = palette or get_palette()
+    palette.apply_matplotlib()
+    fig, axes = plt.subplots(
+        len(timelines), 1, figsize=(14, 6 * len(timelines)), squeeze=False
+    )
+    titles = titles or [f"Gap to Leader - {t.session}" for t in timelines]
+    drivers = drivers or [None] * len(timelines)
+    events = events or [None] * len(timelines)
+    for ax, timeline, title, shown, event in zip(
+        axes[:, 0], timelines, titles, drivers, events
+    ):
+        minutes = timeline.time / 60
+        registry = palette.registry
+        if event is not None:
+            registry = registry.for_event(event)
+        colors = registry.lookup(timeline.drivers, "color", "#888")
+        for d, (code, color) in enumerate(zip(timeline.drivers, colors)):
+            if shown is not None and code not in shown:
+                continue
+            ax.plot(minutes, timeline.gap[:, d], color=color, label=code, lw=1.5)
+        ax.set_title(title)
+        ax.set_xlabel("Race Time (min)")
+        ax.set_ylabel("Gap (s)")
+        ax.invert_yaxis()
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+        ax.legend(loc="upper left", bbox_to_anchor=(1.0, 1.0), fontsize=8)
+    plt.tight_layout()
+    plt.show()
+
+
+def main():
+    args = parse_args()
+    sessions = cli.sessions_from_args(args)
+    if not sessions:
+        return
+    timelines = [RaceTimeline.from_file(s.path) for s in sessions]
+    # Battles and overtakes need every car on track, so --limit only filters the output.
+    drivers = [
+        top_drivers(s.path, args.limit) if args.limit else None for s in sessions
+    ]
+    frames = []
+    for timeline, shown in zip(timelines, drivers):
+        events = timeline.events(args.threshold, args.min_laps)
+        if shown is not None:
+            events = events[events["Driver"].isin(shown)]
+        frames.append(events)
+    events = pd.concat(frames, ignore_index=True)
+    print(events.to_string(index=False))
+    if args.events:
+        events.to_csv(args.events, index=False)
+        print(f"✅ Events saved to {args.events}")
+    titles = [f"Gap to Leader - {s.title}" for s in sessions]
+    plot_gaps(
+        timelines,
+        get_palette(args.theme),
+        titles,
+        drivers,
+        [s.event for s in sessions],
+    )
+
+
+if __name__ == "__main__":
+    profiling.run(main)
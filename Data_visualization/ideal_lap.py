@@ -0,0 +1,100 @@
+"""Theoretical Best Lap
+=============================================
+Combine each driver's best sectors into a theoretical best lap and compare it
+with the best lap they actually set.
+
+Sector bests are taken from completed laps of the lap table, so every session
+and weekend passed in is solved with the same grouped minimums.  Sectors are
+shown to a tenth of a second on the timing screen while lap times have three
+decimals, so theoretical laps carry up to a few tenths of rounding.
+"""
+
+from Data_visualization.driver_info import REGISTRY
+from Data_visualization.lap_table import load_lap_table
+import Data_visualization.cli as cli
+import Data_visualization.profiling as profiling
+
+SESSION_KEYS = ["Event", "Session"]
+SECTORS = ["S1", "S2", "S3"]
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in JSONL session files or directories of them.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = cli.build_parser(
+        "Compute theoretical best laps from telemetry data.", theme=False, db=True
+    )
+    parser.add_argument(
+        "--output", type=str, help="Write the driver table to this CSV file"
+    )
+    return parser.parse_args()
+
+
+def theoretical_best(laps):
+    """Best sectors, theoretical best lap and gap to the actual best lap per driver and session.
+
+    Args:
+        laps (DataFrame): lap table from ``lap_table.load_lap_table``
+
+    Returns:
+        DataFrame: one row per Event/Session/Driver with S1, S2, S3,
+        Theoretical, BestLap and Gap (BestLap - Theoretical) in seconds
+    """
+    keys = SESSION_KEYS + ["Driver"]
+    best = laps.groupby(keys)[SECTORS + ["LapTime", "BestLap"]].min()
+    best["Theoretical"] = best[SECTORS].sum(axis=1)
+    # Fall back to the fastest recorded lap when the screen never showed a best lap
+    best["BestLap"] = best["BestLap"].fillna(best["LapTime"])
+    best["Gap"] = best["BestLap"] - best["Theoretical"]
+    best = best[SECTORS + ["Theoretical", "BestLap", "Gap"]].reset_index()
+    best.insert(
+        len(keys),
+        "Name",
+        REGISTRY.lookup(best["Driver"], "full_name", events=best["Event"]),
+    )
+    return best.sort_values(SESSION_KEYS + ["Theoretical"]).reset_index(drop=True)
+
+
+def ultimate_lap(laps):
+    """Fastest S1, S2 and S3 set by anyone in each session and their sum.
+
+    Args:
+        laps (DataFrame): lap table from ``lap_table.load_lap_table``
+
+    Returns:
+        DataFrame: one row per Event/Session with the best time and holder of
+        every sector and the Ultimate lap time
+    """
+    grouped = laps.groupby(SESSION_KEYS)
+    result = grouped[SECTORS].min()
+    for sector in SECTORS:
+        result[f"{sector}Driver"] = laps.loc[
+            grouped[sector].idxmin().to_numpy(), "Driver"
+        ].to_numpy()
+    result["Ultimate"] = result[SECTORS].sum(axis=1)
+    return result.reset_index()
+
+
+def main():
+    args = parse_args()
+    sessions = cli.sessions_from_args(args)
+    if not sessions:
+        return
+    laps = load_lap_table([s.path for s in sessions], args.limit, args.db)
+    if laps.empty:
+        print("No valid lap times found.")
+        return
+    drivers = theoretical_best(laps)
+    print(drivers.round(3).to_string(index=False))
+    print()
+    print(ultimate_lap(laps).round(3).to_string(index=False))
+    if args.output:
+        drivers.to_csv(args.output, index=False)
+        print(f"✅ Theoretical best laps saved to {args.output}")
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,322 @@
+"""Live Lap Prediction
+=============================================
+Project the lap time and position of laps still in progress.
+
+While a driver is on track the screen shows S1, then S1 and S2 of the current
+lap, and ``latest_lap_time`` stays empty until S3 appears.  ``LapPredictor``
+keeps running aggregates of every driver's sector times (count, best, mean and
+Welford's sum of squares) and of the whole field, and projects a lap in
+progress as the sectors done plus the driver's best of the sectors to go, with
+the field's standing in until a driver has completed a lap.  The spread is the
+standard deviation of the sectors to go.  On the Montreal captures the best
+sectors project push laps with a median error of 0.2-0.3 s after S2 in most
+sessions, about half that of the mean sectors, since a driver on a push lap
+keeps pushing.
+
+Out-laps and cool-down laps would blow up the spread, so a sector more than
+``slow_factor`` slower than the best one seen is not counted, and a sector
+that much faster than the best restarts the aggregates, since everything
+counted before it was off pace.
+
+The predicted position ranks the better of the projected lap and the driver's
+best lap among the other drivers' best laps, i.e. the classification of
+practice and qualifying.  Every update is a few dict lookups and a binary
+search over at most one best lap per driver, so a snapshot costs the same
+however long the session runs.  The downloader prints the predictions under
+every snapshot, and the module replays a finished capture to measure them:
+
+    python -m Data_visualization.lap_prediction Montreal_2025/f1aData_qualifying_montreal.jsonl
+"""
+
+import argparse
+import bisect
+import math
+import time
+from typing import NamedTuple
+
+from Data_visualization.capture_json import DecodeError, loads
+from Data_visualization.sector_tracker import (
+    SectorTracker,
+    format_lap_time,
+    parse_time,
+)
+import Data_visualization.profiling as profiling
+
+SLOW_FACTOR = 1.07
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in JSONL session files or directories of them.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay captures through the live lap predictor and measure its error."
+    )
+    parser.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="JSON Lines input files or directories containing them",
+    )
+    parser.add_argument(
+        "--slow-factor",
+        type=float,
+        default=SLOW_FACTOR,
+        help=f"Ignore sectors this much slower than the best one (default: {SLOW_FACTOR})",
+    )
+    profiling.add_arguments(parser)
+    return parser.parse_args()
+
+
+class Prediction(NamedTuple):
+    """Projected result of a lap in progress."""
+
+    driver: str
+    sectors: int
+    lap_time: float
+    spread: float
+    position: int
+
+
+class SectorStats:
+    """Running count, mean, variance and best of one sector."""
+
+    __slots__ = ("count", "mean", "m2", "best")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.best = math.inf
+
+    def add(self, seconds, slow_factor=SLOW_FACTOR):
+        """Count one sector time unless it is off the pace of the best one.
+
+        Returns:
+            bool: the time was counted
+        """
+        if seconds > self.best * slow_factor:
+            return False
+        if seconds * slow_factor < self.best:
+            # Everything counted so far was off pace
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        self.best = min(self.best, seconds)
+        self.count += 1
+        delta = seconds - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (seconds - self.mean)
+        return True
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+
+class LapPredictor:
+    """Sector aggregates per driver and projections of the laps in progress.
+
+    Attributes:
+        predictions (dict): driver code -> Prediction of every driver on a lap
+            with at least one sector done, as of the last update
+    """
+
+    def __init__(self, slow_factor=SLOW_FACTOR):
+        self.slow_factor = slow_factor
+        self.predictions = {}
+        self._drivers = {}
+        self._field = tuple(SectorStats() for _ in range(3))
+        self._best = {}
+        self._ranking = []
+
+    def _set_best(self, code, seconds):
+        previous = self._best.get(code)
+        if previous is not None:
+            if seconds >= previous:
+                return
+            del self._ranking[bisect.bisect_left(self._ranking, previous)]
+        self._best[code] = seconds
+        bisect.insort(self._ranking, seconds)
+
+    def add_lap(self, code, sectors):
+        """Count the three sector times of a completed lap.
+
+        Args:
+            code (string): driver short name
+            sectors (tuple): S1, S2 and S3 in seconds
+        """
+        stats = self._drivers.get(code)
+        if stats is None:
+            stats = self._drivers[code] = tuple(SectorStats() for _ in range(3))
+        for sector, seconds in enumerate(sectors):
+            stats[sector].add(seconds, self.slow_factor)
+            self._field[sector].add(seconds, self.slow_factor)
+        self._set_best(code, sum(sectors))
+
+    def position(self, code, lap_time):
+        """Position the driver would hold by best lap after setting ``lap_time``."""
+        best = self._best.get(code)
+        if best is not None and best <= lap_time:
+            lap_time = best
+        # Only strictly faster laps are ahead, so the driver's own best never counts
+        return bisect.bisect_left(self._ranking, lap_time) + 1
+
+    def predict(self, code, done):
+        """Project the lap time and position of a lap in progress.
+
+        Args:
+            code (string): driver short name
+            done (tuple): seconds of the sectors completed on this lap, S1 or S1 and S2
+
+        Returns:
+            Prediction: None when no lap has been counted for a sector to go
+        """
+        stats = self._drivers.get(code, self._field)
+        lap_time = sum(done)
+        variance = 0.0
+        for sector in range(len(done), 3):
+            expected = stats[sector] if stats[sector].count else self._field[sector]
+            if not expected.count:
+                return None
+            lap_time += expected.best
+            spread = expected.variance
+            if spread is None:
+                spread = self._field[sector].variance or 0.0
+            variance += spread
+        return Prediction(
+            code,
+            len(done),
+            lap_time,
+            math.sqrt(variance),
+            self.position(code, lap_time),
+        )
+
+    def update(self, code, in_progress, completed=None, best_lap=None):
+        """Feed one driver row of a snapshot.
+
+        Args:
+            code (string): driver short name
+            in_progress (tuple): sector strings of the lap in progress, from
+                ``SectorTracker.in_progress``
+            completed (tuple, optional): sector strings of a lap completed on
+                this snapshot, from ``SectorTracker.update``
+            best_lap (string, optional): best lap cell of the row
+
+        Returns:
+            Prediction: projection of the lap in progress, None when there is none
+        """
+        best = parse_time(best_lap)
+        if best is not None:
+            self._set_best(code, best)
+        if completed:
+            sectors = tuple(parse_time(s) for s in completed)
+            if None not in sectors:
+                self.add_lap(code, sectors)
+        done = tuple(parse_time(s) for s in in_progress)
+        prediction = None
+        if done and None not in done:
+            prediction = self.predict(code, done)
+        if prediction is None:
+            self.predictions.pop(code, None)
+        else:
+            self.predictions[code] = prediction
+        return prediction
+
+    def format_predictions(self):
+        """Live table of the laps in progress, best projected position first."""
+        lines = [
+            f"{p.driver:<5}S{p.sectors} {format_lap_time(p.lap_time):>9}"
+            f" ±{p.spread:.1f}  P{p.position}"
+            for p in sorted(self.predictions.values(), key=lambda p: p.position)
+        ]
+        return "\n".join(lines) or "No laps in progress."
+
+
+def replay(filepath, slow_factor=SLOW_FACTOR):
+    """Run a capture through the tracker and predictor as the downloader would.
+
+    Every prediction is compared with the lap the driver went on to complete.
+
+    Returns:
+        tuple: list of (sectors done, predicted, actual) per lap and stage,
+        snapshots replayed and seconds spent
+    """
+    tracker = SectorTracker()
+    predictor = LapPredictor(slow_factor)
+    pending = {}  # driver -> (S1 of the current lap, {sectors done: prediction})
+    errors = []
+    snapshots = 0
+    spent = 0.0
+    with open(filepath, "rb") as f:
+        for line in f:
+            try:
+                snapshot = loads(line)
+            except DecodeError:
+                continue
+            snapshots += 1
+            start = time.perf_counter()
+            for entry in snapshot:
+                code = entry.get("driver_short_name")
+                if not code:
+                    continue
+                completed = tracker.update(
+                    code,
+                    entry.get("sector1_time", ""),
+                    entry.get("sector2_time", ""),
+                    entry.get("sector3_time", ""),
+                )
+                in_progress = tracker.in_progress(code)
+                prediction = predictor.update(
+                    code, in_progress, completed, entry.get("best_lap")
+                )
+                if completed:
+                    actual = sum(parse_time(s) or math.nan for s in completed)
+                    for p in pending.pop(code, (None, {}))[1].values():
+                        errors.append((p.sectors, p.lap_time, actual))
+                if not in_progress:
+                    pending.pop(code, None)
+                    continue
+                # A new S1 starts a new lap and drops the projections of an aborted one
+                lap, stages = pending.get(code, (None, {}))
+                if lap != in_progress[0]:
+                    lap, stages = in_progress[0], {}
+                    pending[code] = (lap, stages)
+                if prediction is not None:
+                    stages.setdefault(prediction.sectors, prediction)
+            spent += time.perf_counter() - start
+    return errors, snapshots, spent
+
+
+def main():
+    import pandas as pd
+
+    from Data_visualization.sessions import expand_inputs
+
+    args = parse_args()
+    rows = []
+    for path in expand_inputs(args.input_files):
+        errors, snapshots, spent = replay(path, args.slow_factor)
+        laps = pd.DataFrame(errors, columns=["Sectors", "Predicted", "Actual"])
+        # Only push laps say how good the projection is; aborted and cool-down laps are noise
+        laps = laps[laps["Actual"] <= laps["Predicted"] * args.slow_factor]
+        error = (laps["Predicted"] - laps["Actual"]).abs()
+        for sectors, stage in error.groupby(laps["Sectors"]):
+            rows.append(
+                {
+                    "Session": path.stem,
+                    "After": f"S{sectors}",
+                    "Laps": len(stage),
+                    "MeanAbsError": stage.mean(),
+                    "MedianAbsError": stage.median(),
+                    "UsPerSnapshot": spent / max(snapshots, 1) * 1e6,
+                }
+            )
+    if not rows:
+        print("No laps to predict.")
+        return
+    print(pd.DataFrame(rows).round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
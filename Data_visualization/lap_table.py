@@ -0,0 +1,237 @@
+"""Lap Table
+=============================================
+Reduce raw live timing snapshots to one row per completed lap.
+
+Every capture line is a full snapshot of the timing screen, so the same lap is
+repeated on many lines.  A lap is recorded when a driver shows a complete
+S1/S2/S3 set whose sector 3 just changed and which differs from the last lap
+recorded for that driver.  This skips the repeated lines, the screen reloads
+that re-display an old lap, and the mid-lap lines where a new S1 sits next to
+the previous lap's S2/S3.
+"""
+
+import numpy as np
+import pandas as pd
+
+from Data_visualization.capture_json import DecodeError, loads
+from Data_visualization.sector_tracker import parse_time
+from Data_visualization.sessions import expand_inputs, top_drivers
+
+SECTOR_KEYS = ("sector1_time", "sector2_time", "sector3_time")
+LAP_COLUMNS = [
+    "Event",
+    "Session",
+    "Driver",
+    "Lap",
+    "LapTime",
+    "S1",
+    "S2",
+    "S3",
+    "BestLap",
+    "Pits",
+    "Position",
+    "Timestamp",
+    "Time",
+]
+# Fields of the raw rows yielded by detect_laps
+LAP_ROW_COLUMNS = [
+    "Driver",
+    "S1",
+    "S2",
+    "S3",
+    "BestLap",
+    "Pits",
+    "Position",
+    "Timestamp",
+    "CapturedAt",
+]
+
+
+def clock_to_seconds(timestamps):
+    """Convert ``%H:%M:%S`` capture timestamps to monotonic seconds.
+
+    The capture only stores the time of day, so a session running past midnight
+    UTC wraps back to zero.  Every wrap adds a day to the following values.
+
+    Args:
+        timestamps (array-like): timestamp strings in capture order
+
+    Returns:
+        ndarray: float seconds since midnight of the first capture day
+    """
+    parts = pd.Series(timestamps, dtype="string").str.split(":", expand=True)
+    seconds = (
+        parts[0].astype(float) * 3600
+        + parts[1].astype(float) * 60
+        + parts[2].astype(float)
+    ).to_numpy()
+    wraps = np.concatenate(([0], np.cumsum(np.diff(seconds) < -43200)))
+    return seconds + wraps * 86400
+
+
+def capture_seconds(timestamps, captured_at=None):
+    """Monotonic capture time in seconds for rows of one capture.
+
+    Captures that record ``captured_at`` (epoch seconds) use it directly; older
+    captures only have ``%H:%M:%S`` timestamps and fall back to
+    ``clock_to_seconds``.  Either way differences between rows are seconds.
+
+    Args:
+        timestamps (array-like): timestamp strings in capture order
+        captured_at (array-like, optional): epoch seconds, missing values as None/NaN
+
+    Returns:
+        ndarray: float seconds
+    """
+    if captured_at is not None:
+        epoch = pd.to_numeric(pd.Series(captured_at), errors="coerce").to_numpy(
+            dtype=float
+        )
+        if len(epoch) and not np.isnan(epoch).any():
+            return epoch
+    return clock_to_seconds(timestamps)
+
+
+def load_entries(filepath, drivers=None):
+    """Load driver entries from a JSONL capture file.
+
+    Args:
+        filepath (string): path to JSONL file to be loaded
+        drivers (set, optional): only keep entries of these driver codes
+
+    Returns:
+        list: flat list of driver entry dicts
+    """
+    entries = []
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                items = loads(line)
+            except DecodeError:
+                continue
+            if not isinstance(items, list):
+                continue
+            if drivers is None:
+                entries.extend(items)
+            else:
+                entries.extend(
+                    e for e in items if e.get("driver_short_name") in drivers
+                )
+    return entries
+
+
+def detect_laps(entries, last_s3=None, last_lap=None):
+    """Yield one raw row per completed lap found in snapshot entries.
+
+    The two state dicts are updated in place, so a capture can be processed in
+    chunks (e.g. while it is still being written) by passing the same dicts to
+    every call.
+
+    Args:
+        entries (iterable): telemetry entry dicts in capture order
+        last_s3 (dict, optional): driver code -> sector 3 string of the previous snapshot
+        last_lap (dict, optional): driver code -> sector strings of the last recorded lap
+
+    Yields:
+        tuple: driver, S1, S2, S3, best lap, pits, position, timestamp and
+        epoch capture time (None for captures without it)
+    """
+    last_s3 = {} if last_s3 is None else last_s3
+    last_lap = {} if last_lap is None else last_lap
+    for entry in entries:
+        code = entry.get("driver_short_name")
+        if not code:
+            continue
+        sectors = tuple(entry.get(key) or "" for key in SECTOR_KEYS)
+        previous_s3 = last_s3.get(code)
+        last_s3[code] = sectors[2]
+        if not all(sectors) or sectors[2] == previous_s3:
+            continue
+        if last_lap.get(code) == sectors:
+            continue
+        times = [parse_time(s) for s in sectors]
+        if None in times:
+            continue
+        last_lap[code] = sectors
+        yield (
+            code,
+            *times,
+            parse_time(entry.get("best_lap")),
+            entry.get("number_of_pits") or "0",
+            entry.get("position") or "0",
+            entry.get("timestamp", ""),
+            entry.get("captured_at"),
+        )
+
+
+def build_lap_table(entries, session="", event=""):
+    """Reduce snapshot entries to one row per completed lap.
+
+    BestLap is the timing screen's lap column at the moment the lap was
+    recorded: the session best in practice and qualifying, the last lap in a
+    race.  Status values such as IN PIT or OUT are stored as NaN.
+
+    Args:
+        entries (list): telemetry entry dicts in capture order
+        session (string): session label stored in the Session column
+        event (string): race weekend label stored in the Event column
+
+    Returns:
+        DataFrame: one row per lap with the columns in LAP_COLUMNS
+    """
+    return lap_frame(detect_laps(entries), session, event)
+
+
+def lap_frame(rows, session="", event=""):
+    """Build the lap table from raw ``detect_laps`` rows of one session.
+
+    Args:
+        rows (iterable): rows yielded by ``detect_laps``, in capture order
+        session (string): session label stored in the Session column
+        event (string): race weekend label stored in the Event column
+
+    Returns:
+        DataFrame: one row per lap with the columns in LAP_COLUMNS
+    """
+    df = pd.DataFrame(rows, columns=LAP_ROW_COLUMNS)
+    df.insert(0, "Event", event)
+    df.insert(1, "Session", session)
+    df["BestLap"] = df["BestLap"].astype(float)
+    df["LapTime"] = (df["S1"] + df["S2"] + df["S3"]).round(3)
+    df["Pits"] = pd.to_numeric(df["Pits"], errors="coerce").fillna(0).astype(int)
+    df["Position"] = (
+        pd.to_numeric(df["Position"], errors="coerce").fillna(0).astype(int)
+    )
+    df["Time"] = capture_seconds(df["Timestamp"], df["CapturedAt"]) if len(df) else []
+    df["Lap"] = df.groupby("Driver").cumcount() + 1
+    return df[LAP_COLUMNS]
+
+
+def load_lap_table(filepaths, limit=None, db=None):
+    """Load one or more capture files into a single lap table.
+
+    Args:
+        filepaths (list): paths to JSONL capture files or directories of them
+        limit (int, optional): only load the top ``limit`` drivers of each
+            file's final classification
+        db (string, optional): timing database file to ingest the captures into
+            and query instead of parsing them here (see ``timing_db``)
+
+    Returns:
+        DataFrame: concatenated lap table, Session set to each file's stem and
+        Event to the name of the directory holding it
+    """
+    if db:
+        from Data_visualization.timing_db import TimingDatabase
+
+        with TimingDatabase(db) as database:
+            return database.lap_table(filepaths, limit)
+    frames = [
+        build_lap_table(
+            load_entries(path, top_drivers(path, limit) if limit else None),
+            session=path.stem,
+            event=path.resolve().parent.name,
+        )
+        for path in expand_inputs(filepaths)
+    ]
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,267 @@
+"""Parallel Ingest
+=============================================
+Reduce many capture files to one lap table across a process pool.
+
+Files are cut into byte ranges aligned to line starts, so a large capture is
+spread over several workers.  Each worker decodes its lines, drops malformed
+lines and entries without a driver code, and runs ``lap_table.detect_laps``
+over them.  Lap detection looks one snapshot back, so a worker first replays
+the line just before its range to prime the detector.  The only lap a worker
+can then still emit twice is a screen reload repeating the previous range's
+last lap, which the merge drops before numbering laps per driver.
+
+The merged result has the same columns and rows as ``load_lap_table``:
+
+    python -m Data_visualization.parallel_ingest Montreal_2025 --workers 4
+
+``--scaling`` replicates the inputs into a temporary directory and times the
+ingest with 1, 2, 4... workers up to ``--workers``.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from Data_visualization.capture_json import DecodeError, loads
+from Data_visualization.lap_table import (
+    LAP_COLUMNS,
+    detect_laps,
+    expand_inputs,
+    lap_frame,
+)
+import Data_visualization.profiling as profiling
+
+CHUNK_BYTES = 1 << 20
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in JSONL session files or directories of them.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Reduce capture files to one lap table across CPU cores."
+    )
+    parser.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="JSON Lines input files or directories containing them",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=CHUNK_BYTES,
+        help=f"Bytes per work unit, files above this are split (default: {CHUNK_BYTES})",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Write the lap table to this file (.parquet needs pyarrow, otherwise CSV)",
+    )
+    parser.add_argument(
+        "--scaling",
+        type=int,
+        metavar="COPIES",
+        help="Time 1, 2, 4... workers on COPIES replicated copies of the inputs",
+    )
+    profiling.add_arguments(parser)
+    return parser.parse_args()
+
+
+def _line_start_before(f, position, block=16384):
+    """Offset of the start of the line that ends just before ``position``."""
+    while True:
+        start = max(0, position - 1 - block)
+        f.seek(start)
+        newline = f.read(position - 1 - start).rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        if start == 0:
+            return 0
+        block *= 2
+
+
+def split_ranges(filepath, chunk_bytes=CHUNK_BYTES):
+    """Cut a capture into line-aligned byte ranges.
+
+    Args:
+        filepath (Path): JSONL capture file
+        chunk_bytes (int): target size of each range
+
+    Returns:
+        list: (path, context, start, end) tuples, where ``context`` is the
+        start of the line before ``start`` (equal to ``start`` for the first range)
+    """
+    size = os.path.getsize(filepath)
+    ranges = []
+    with open(filepath, "rb") as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            context = _line_start_before(f, start) if start else 0
+            ranges.append((str(filepath), context, start, end))
+            start = end
+    return ranges
+
+
+def _snapshots(f, end):
+    """Decode and validate the lines of an open file up to byte ``end``."""
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            break
+        try:
+            snapshot = loads(line)
+        except DecodeError:
+            continue
+        if isinstance(snapshot, list):
+            yield [
+                e
+                for e in snapshot
+                if isinstance(e, dict) and e.get("driver_short_name")
+            ]
+
+
+def reduce_range(work):
+    """Worker: detect laps in one byte range of a capture.
+
+    Args:
+        work (tuple): (path, context, start, end) from ``split_ranges``
+
+    Returns:
+        list: raw ``detect_laps`` rows of the range in capture order
+    """
+    path, context, start, end = work
+    last_s3, last_lap = {}, {}
+    with open(path, "rb") as f:
+        if context < start:
+            f.seek(context)
+            for snapshot in _snapshots(f, start):
+                # Only primes the detector; laps here belong to the previous range
+                for _ in detect_laps(snapshot, last_s3, last_lap):
+                    pass
+        f.seek(start)
+        return [
+            row
+            for snapshot in _snapshots(f, end)
+            for row in detect_laps(snapshot, last_s3, last_lap)
+        ]
+
+
+def merge_ranges(parts):
+    """Join the rows of consecutive ranges, dropping laps repeated across a boundary."""
+    last = {}
+    rows = []
+    for part in parts:
+        for row in part:
+            sectors = row[1:4]
+            if last.get(row[0]) == sectors:
+                continue
+            last[row[0]] = sectors
+            rows.append(row)
+    return rows
+
+
+def ingest(filepaths, workers=None, chunk_bytes=CHUNK_BYTES):
+    """Reduce capture files to one lap table using a process pool.
+
+    Args:
+        filepaths (list): JSONL capture files or directories of them
+        workers (int, optional): worker processes, defaults to the CPU count
+        chunk_bytes (int): target size of each work unit
+
+    Returns:
+        DataFrame: lap table with the columns in LAP_COLUMNS, files in input order
+    """
+    paths = expand_inputs(filepaths)
+    work = [r for path in paths for r in split_ranges(path, chunk_bytes)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(reduce_range, work, chunksize=1))
+
+    frames = []
+    for path in paths:
+        parts = [rows for w, rows in zip(work, results) if w[0] == str(path)]
+        frames.append(
+            lap_frame(merge_ranges(parts), path.stem, path.resolve().parent.name)
+        )
+    if not frames:
+        return pd.DataFrame(columns=LAP_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def scaling_demo(filepaths, copies, max_workers, chunk_bytes=CHUNK_BYTES):
+    """Time ``ingest`` on replicated inputs with a doubling number of workers.
+
+    Returns:
+        DataFrame: Workers, Files, Laps, Seconds and Speedup per run
+    """
+    paths = expand_inputs(filepaths)
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for copy in range(copies):
+            for path in paths:
+                shutil.copyfile(path, Path(tmp) / f"{path.stem}_{copy:03d}.jsonl")
+        for workers in counts:
+            start = time.perf_counter()
+            laps = ingest([tmp], workers, chunk_bytes)
+            rows.append(
+                {
+                    "Workers": workers,
+                    "Files": copies * len(paths),
+                    "Laps": len(laps),
+                    "Seconds": time.perf_counter() - start,
+                }
+            )
+    result = pd.DataFrame(rows)
+    result["Speedup"] = result["Seconds"].iloc[0] / result["Seconds"]
+    return result
+
+
+def main():
+    args = parse_args()
+    if args.scaling:
+        print(f"{os.cpu_count()} CPU cores available")
+        print(
+            scaling_demo(args.input_files, args.scaling, args.workers, args.chunk_size)
+            .round(2)
+            .to_string(index=False)
+        )
+        return
+    start = time.perf_counter()
+    laps = ingest(args.input_files, args.workers, args.chunk_size)
+    print(
+        f"{len(laps)} laps from {laps['Session'].nunique()} sessions"
+        f" in {time.perf_counter() - start:.2f}s"
+    )
+    if args.output:
+        if args.output.endswith(".parquet"):
+            laps.to_parquet(args.output, index=False)
+        else:
+            laps.to_csv(args.output, index=False)
+        print(f"✅ Lap table saved to {args.output}")
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,318 @@
+"""Profiling
+=============================================
+``--profile`` support for the downloader and every visualizer.
+
+Every script runs its ``main`` through ``profiling.run``, and ``--profile OUT``
+on any command line profiles the whole run:
+
+    python -m Data_visualization.race_history Montreal_2025 --output race.png --profile race
+
+The default profiler samples the main thread's call stack every millisecond
+from a background thread and writes
+
+* ``OUT.speedscope.json``: open at https://www.speedscope.app for a flame graph
+* ``OUT.folded``: collapsed stacks (microseconds) for ``flamegraph.pl``
+
+``--profiler cprofile`` traces every call with ``cProfile`` instead and writes
+``OUT.prof`` for ``pstats`` or snakeviz.  Tracing counts calls exactly but
+slows pure-Python code down more than library code, so its proportions are
+skewed; sampling is the better guide to where wall time goes.
+
+Both print the top functions and the share of time per package (pandas,
+matplotlib, bs4, json, this repository...) to stderr, so the script's own
+output is unchanged.  A sample is charged to the innermost Python frame, so
+time in a C extension (orjson, the NumPy kernels) is charged to the Python
+function that called it.  Only the main process is profiled, so the workers
+of ``parallel_ingest`` show up as time waiting on the pool.
+
+``python f1a.py profile`` runs the subcommands against the offline files in
+dev_artifacts and Montreal_2025 with ``--profile``, so profiles can be
+reproduced and compared between changes.
+"""
+
+import argparse
+import functools
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+SAMPLE_INTERVAL = 0.001
+TOP = 15
+PROFILERS = ("sample", "cprofile")
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def add_arguments(parser):
+    """Add --profile and --profiler to a script's argument parser.
+
+    ``run`` reads them from the command line itself; they are added to the
+    parser so ``--help`` lists them and ``parse_args`` accepts them.
+    """
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="OUT",
+        help="Profile the run and write OUT.speedscope.json and OUT.folded (OUT.prof with --profiler cprofile)",
+    )
+    parser.add_argument(
+        "--profiler",
+        type=str,
+        choices=PROFILERS,
+        default="sample",
+        help="Stack sampling or cProfile tracing (default: sample)",
+    )
+    return parser
+
+
+def run(main, argv=None):
+    """Call a script's main, profiled when the command line asks for it.
+
+    Args:
+        main (callable): the script's main function
+        argv (list, optional): command line to check, defaults to sys.argv
+    """
+    argv = sys.argv if argv is None else argv
+    options, _ = add_arguments(
+        argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    ).parse_known_args(argv[1:])
+    if not options.profile:
+        return main()
+    label = Path(argv[0]).name
+    if options.profiler == "cprofile":
+        return profile_cprofile(main, options.profile, label)
+    return profile_samples(main, options.profile, label)
+
+
+class StackSampler:
+    """Background thread recording the call stacks of one thread.
+
+    Attributes:
+        samples (Counter): stack (tuple of frame keys, outermost first) ->
+            microseconds spent in it
+    """
+
+    def __init__(self, thread_id=None, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._switch_interval = None
+
+    def start(self):
+        # Let the sampler take the GIL as often as it samples
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(self.interval)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+        return self
+
+    def _sample(self):
+        previous = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename != __file__:
+                    stack.append(
+                        (code.co_qualname, code.co_filename, code.co_firstlineno)
+                    )
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += round((now - previous) * 1e6)
+            previous = now
+
+
+@functools.lru_cache(maxsize=None)
+def package_of(filename, name=""):
+    """Package a function belongs to: the top-level package, a stdlib module or this repository's.
+
+    Args:
+        filename (string): source file of the function
+        name (string, optional): function name, which names the extension
+            module of cProfile's built-in entries like
+            ``<built-in method orjson.loads>``
+    """
+    if filename == "~" and name.startswith("<built-in method ") and "." in name:
+        return name[len("<built-in method ") :].split(".")[0].lstrip("_")
+    if filename.startswith("<frozen "):
+        # Frozen stdlib modules, mostly the import system
+        return filename[len("<frozen ") : -1].split(".")[0]
+    if filename.startswith("<") or filename == "~":
+        return "builtins"
+    path = Path(filename)
+    parts = path.parts
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            name = parts[parts.index(marker) + 1]
+            return name[:-3] if name.endswith(".py") else name
+    try:
+        relative = path.resolve().relative_to(REPO_ROOT)
+    except ValueError:
+        pass
+    else:
+        return relative.parts[0] if len(relative.parts) > 1 else relative.stem
+    import sysconfig
+
+    try:
+        stdlib = Path(sysconfig.get_paths()["stdlib"]).resolve()
+        module = path.resolve().relative_to(stdlib).parts[0]
+    except ValueError:
+        return "other"
+    return module[:-3] if module.endswith(".py") else module
+
+
+def _frame_label(key):
+    name, filename, line = key
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def write_speedscope(samples, path, name):
+    """Write sampled stacks as a speedscope file, weights in microseconds."""
+    import json
+
+    frames, index, stacks, weights = [], {}, [], []
+    for stack, weight in samples.items():
+        row = []
+        for key in stack:
+            if key not in index:
+                index[key] = len(frames)
+                frames.append({"name": key[0], "file": key[1], "line": key[2]})
+            row.append(index[key])
+        stacks.append(row)
+        weights.append(weight)
+    document = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "microseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": stacks,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "Data_visualization.profiling",
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f)
+
+
+def write_folded(samples, path):
+    """Write sampled stacks in the collapsed format read by flamegraph.pl."""
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, weight in samples.items():
+            line = ";".join(_frame_label(key).replace(";", ":") for key in stack)
+            f.write(f"{line} {weight}\n")
+
+
+def _print_table(title, rows, total, out):
+    print(f"\n{title}", file=out)
+    for label, own, cumulative in rows:
+        print(
+            (
+                f"{own / total:7.1%} {cumulative / total:7.1%}  {label}"
+                if cumulative is not None
+                else f"{own / total:7.1%}  {label}"
+            ),
+            file=out,
+        )
+
+
+def summarize_samples(samples, top=TOP, out=sys.stderr):
+    """Print the hottest functions and the time per package of sampled stacks."""
+    total = sum(samples.values()) or 1
+    own, cumulative, packages = Counter(), Counter(), Counter()
+    for stack, weight in samples.items():
+        own[stack[-1]] += weight
+        packages[package_of(stack[-1][1])] += weight
+        for key in set(stack):
+            cumulative[key] += weight
+    print(f"Sampled {total / 1e6:.2f} s of wall time", file=out)
+    _print_table(
+        "   self   total  function",
+        [(_frame_label(k), w, cumulative[k]) for k, w in own.most_common(top)],
+        total,
+        out,
+    )
+    _print_table(
+        "   self  package",
+        [(name, w, None) for name, w in packages.most_common(top)],
+        total,
+        out,
+    )
+
+
+def summarize_cprofile(stats, top=TOP, out=sys.stderr):
+    """Print the hottest functions and the time per package of cProfile stats."""
+    total = stats.total_tt or 1
+    packages = Counter()
+    rows = []
+    for (filename, line, name), (_, _, own, cumulative, _) in stats.stats.items():
+        packages[package_of(filename, name)] += own
+        rows.append((own, cumulative, f"{name} ({Path(filename).name}:{line})"))
+    rows.sort(reverse=True)
+    print(f"Traced {total:.2f} s", file=out)
+    _print_table(
+        "   self   total  function",
+        [(label, own, cumulative) for own, cumulative, label in rows[:top]],
+        total,
+        out,
+    )
+    _print_table(
+        "   self  package",
+        [(name, w, None) for name, w in packages.most_common(top)],
+        total,
+        out,
+    )
+
+
+def profile_samples(function, out, name="profile"):
+    """Run ``function`` under the stack sampler and write its flame graph files.
+
+    Returns:
+        The function's return value
+    """
+    sampler = StackSampler().start()
+    try:
+        return function()
+    finally:
+        sampler.stop()
+        write_speedscope(sampler.samples, f"{out}.speedscope.json", name)
+        write_folded(sampler.samples, f"{out}.folded")
+        summarize_samples(sampler.samples)
+        print(
+            f"✅ Profile saved to {out}.speedscope.json and {out}.folded",
+            file=sys.stderr,
+        )
+
+
+def profile_cprofile(function, out, name="profile"):
+    """Run ``function`` under cProfile and write its stats.
+
+    Returns:
+        The function's return value
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function)
+    finally:
+        profiler.dump_stats(f"{out}.prof")
+        summarize_cprofile(pstats.Stats(profiler))
+        print(f"✅ Profile of {name} saved to {out}.prof", file=sys.stderr)
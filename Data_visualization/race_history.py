@@ -0,0 +1,338 @@
+"""Race History
+=============================================
+Track every driver's position lap by lap and plot the race history chart.
+
+A ``RaceHistory`` keeps a laps x drivers ``int8`` matrix of positions, where
+row 0 is the order on the grid and row N the position at which each driver
+crossed the line to complete lap N (0 where no lap was seen).  Laps are
+recognised with ``lap_table.detect_laps`` as snapshots come in.  They are
+numbered from the race lap counter, which the timing screen shows in the
+leader's interval column, minus the laps a driver is behind, so a lap the
+capture missed leaves a gap instead of shifting the later laps.  The matrix
+grows by one cell per completed lap and its rows double when they run out,
+so a live capture can be fed snapshot by snapshot.
+
+    python -m Data_visualization.race_history Montreal_2025 --output race_history.png
+
+renders all the races of a weekend in one figure, and ``--follow 5`` re-reads
+a capture the downloader is still writing and redraws the chart after every
+capture cycle.
+"""
+
+import time
+
+from Data_visualization.capture_json import DecodeError, loads
+from Data_visualization.sector_tracker import parse_int
+from Data_visualization.sessions import top_drivers
+from Data_visualization.theme import get_palette
+import Data_visualization.cli as cli
+import Data_visualization.profiling as profiling
+import Data_visualization.Utils as Utils
+
+# Team colors closer than this in luminance to the background are drawn in the foreground color
+MIN_CONTRAST = 40
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in paths to one or more race JSONL files.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = cli.build_parser(
+        "Plot lap by lap race positions from telemetry data.",
+        limit_help="Only plot the top N drivers of the final classification (default: all)",
+    )
+    parser.set_defaults(session="R")
+    parser.add_argument(
+        "--output", type=str, help="Image file to save instead of showing the chart"
+    )
+    parser.add_argument(
+        "--follow",
+        type=float,
+        metavar="SECONDS",
+        help="Keep reading new capture lines every SECONDS and redraw --output",
+    )
+    return parser.parse_args()
+
+
+class RaceHistory:
+    """Lap by lap positions of one race, built incrementally from snapshots.
+
+    Attributes:
+        session (string): session label
+        drivers (list): driver codes in order of first appearance, one column each
+        laps (ndarray): completed laps per driver
+    """
+
+    def __init__(self, session="", capacity=32, max_drivers=32):
+        import numpy as np
+
+        self.session = session
+        self.drivers = []
+        self._columns = {}
+        self._positions = np.zeros((capacity, max_drivers), dtype=np.int8)
+        self.laps = np.zeros(max_drivers, dtype=np.int16)
+        self._last_s3 = {}
+        self._last_lap = {}
+        self._offset = 0
+        self.race_lap = 0
+
+    @classmethod
+    def from_file(cls, filepath):
+        """Build the history of a whole capture."""
+        history = cls(getattr(filepath, "stem", str(filepath)))
+        history.feed(filepath)
+        return history
+
+    def _column(self, code):
+        column = self._columns.get(code)
+        if column is None:
+            column = len(self.drivers)
+            if column == self._positions.shape[1]:
+                import numpy as np
+
+                self._positions = np.pad(self._positions, ((0, 0), (0, column)))
+                self.laps = np.pad(self.laps, (0, column))
+            self._columns[code] = column
+            self.drivers.append(code)
+        return column
+
+    def update(self, snapshot):
+        """Record the grid order and the laps completed on one snapshot.
+
+        Args:
+            snapshot (list): driver entry dicts of one capture line
+
+        Returns:
+            int: number of laps completed on this snapshot
+        """
+        from Data_visualization.lap_table import detect_laps
+
+        laps_behind = {}
+        for entry in snapshot:
+            code = entry.get("driver_short_name")
+            if not code:
+                continue
+            column = self._column(code)
+            if entry.get("position") == "1":
+                self.race_lap = max(self.race_lap, parse_int(entry.get("interval")))
+            if not self.race_lap:
+                # Until the race starts the screen shows the grid
+                self._positions[0, column] = _position(entry.get("position"))
+            gap = entry.get("gap") or ""
+            laps_behind[code] = parse_int(gap[:-1]) if gap.endswith("L") else 0
+        completed = 0
+        for row in detect_laps(snapshot, self._last_s3, self._last_lap):
+            column = self._columns[row[0]]
+            if self.race_lap:
+                # The leader's counter already shows the lap after the one completed
+                lap = self.race_lap - 1 - laps_behind.get(row[0], 0)
+            else:
+                lap = self.laps[column] + 1
+            if lap < 1:
+                continue
+            if lap >= len(self._positions):
+                import numpy as np
+
+                rows = max(lap + 1, 2 * len(self._positions)) - len(self._positions)
+                self._positions = np.pad(self._positions, ((0, rows), (0, 0)))
+            self._positions[lap, column] = _position(row[6])
+            self.laps[column] = max(self.laps[column], lap)
+            completed += 1
+        return completed
+
+    def feed(self, filepath):
+        """Read the lines added to a capture since the last call.
+
+        Only complete lines are read, so a file the downloader is still
+        writing can be fed again after every capture cycle.
+
+        Returns:
+            int: number of laps completed in the new lines
+        """
+        completed = 0
+        with open(filepath, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._offset += len(line)
+                try:
+                    snapshot = loads(line)
+                except DecodeError:
+                    continue
+                if isinstance(snapshot, list):
+                    completed += self.update(snapshot)
+        return completed
+
+    @property
+    def positions(self):
+        """Position matrix, one row per lap from lap 0 and one column per driver."""
+        laps = int(self.laps[: len(self.drivers)].max(initial=0))
+        return self._positions[: laps + 1, : len(self.drivers)]
+
+    def to_frame(self):
+        """Positions as a DataFrame indexed by lap, NaN for laps not completed."""
+        import numpy as np
+        import pandas as pd
+
+        positions = self.positions
+        return pd.DataFrame(
+            np.where(positions > 0, positions, np.nan),
+            columns=self.drivers,
+            index=pd.RangeIndex(len(positions), name="Lap"),
+        )
+
+    def changes(self):
+        """Positions gained and position changes per driver.
+
+        Returns:
+            DataFrame: Driver, Start, Finish, Gained (positive is forward),
+            Changes (laps on which the position differs from the lap before),
+            Best and Worst position, sorted by finishing position
+        """
+        import numpy as np
+        import pandas as pd
+
+        positions = self.positions
+        rows = []
+        for column, code in enumerate(self.drivers):
+            laps = positions[: self.laps[column] + 1, column]
+            laps = laps[laps > 0]
+            if not len(laps):
+                continue
+            rows.append(
+                {
+                    "Driver": code,
+                    "Start": int(laps[0]),
+                    "Finish": int(laps[-1]),
+                    "Gained": int(laps[0]) - int(laps[-1]),
+                    "Changes": int(np.count_nonzero(np.diff(laps))),
+                    "Best": int(laps.min()),
+                    "Worst": int(laps.max()),
+                }
+            )
+        return pd.DataFrame(rows).sort_values("Finish", kind="stable")
+
+
+def _position(value):
+    """Position string to an int8-safe number, 0 when missing."""
+    return min(parse_int(value), 127)
+
+
+def plot_race_history(
+    histories, palette=None, titles=None, drivers=None, output=None, events=None
+):
+    """Plot position against lap for every driver, one axes per race.
+
+    Lines use the team colors, the second driver of a team dashed.  A team
+    color that would vanish into the background, like a black team on the
+    dark theme, is replaced by the theme's foreground color.
+
+    Args:
+        histories (list): RaceHistory per race
+        palette (Palette, optional): colors to use, defaults to the dark theme
+        titles (list, optional): axes title per history, defaults to the session name
+        drivers (list, optional): set of driver codes to plot per history, defaults to all
+        output (string, optional): image file to save instead of showing the chart
+        events (list, optional): event label per history, selecting the
+            drivers entered in its round
+    """
+    import matplotlib.pyplot as plt
+
+    palette = palette or get_palette()
+    palette.apply_matplotlib()
+    fig, axes = plt.subplots(
+        len(histories), 1, figsize=(14, 7 * len(histories)), squeeze=False
+    )
+    titles = titles or [f"Race History - {h.session}" for h in histories]
+    drivers = drivers or [None] * len(histories)
+    events = events or [None] * len(histories)
+    background = Utils.calculate_luminance(palette.theme.background)
+    for ax, history, title, shown, event in zip(
+        axes[:, 0], histories, titles, drivers, events
+    ):
+        frame = history.to_frame()
+        registry = palette.registry
+        if event is not None:
+            registry = registry.for_event(event)
+        teams = registry.lookup(history.drivers, "team", "Unknown")
+        seen_teams = set()
+        for code, team in zip(history.drivers, teams):
+            if shown is not None and code not in shown:
+                continue
+            line = frame[code].dropna()
+            if line.empty:
+                continue
+            color = palette.team_colors.get(team, "#999999")
+            if abs(Utils.calculate_luminance(color) - background) < MIN_CONTRAST:
+                color = palette.theme.foreground
+            style = "--" if team in seen_teams else "-"
+            seen_teams.add(team)
+            ax.plot(line.index, line, style, color=color, lw=2, label=code)
+            ax.annotate(
+                code,
+                (line.index[-1], line.iloc[-1]),
+                xytext=(4, 0),
+                textcoords="offset points",
+                va="center",
+                fontsize=8,
+                color=color,
+            )
+        ax.set_title(title)
+        ax.set_xlabel("Lap")
+        ax.set_ylabel("Position")
+        ax.set_yticks(range(1, len(history.drivers) + 1))
+        ax.set_ylim(len(history.drivers) + 0.5, 0.5)
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+        ax.legend(loc="upper left", bbox_to_anchor=(1.02, 1.0), fontsize=8)
+    plt.tight_layout()
+    if output:
+        fig.savefig(output)
+        plt.close(fig)
+        print(f"✅ Race history saved to {output}")
+    else:
+        plt.show()
+
+
+def main():
+    args = parse_args()
+    sessions = cli.sessions_from_args(args)
+    if not sessions:
+        return
+    # Load lap detection and pandas first, so the time below is the build alone
+    import Data_visualization.lap_table  # noqa: F401
+
+    start = time.perf_counter()
+    histories = [RaceHistory.from_file(s.path) for s in sessions]
+    print(
+        f"Built {len(histories)} race histories in"
+        f" {(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+    for session, history in zip(sessions, histories):
+        print(f"\n{session.title}")
+        print(history.changes().to_string(index=False))
+
+    palette = get_palette(args.theme)
+    titles = [f"Race History - {s.title}" for s in sessions]
+    events = [s.event for s in sessions]
+    try:
+        while True:
+            drivers = [
+                top_drivers(s.path, args.limit) if args.limit else None
+                for s in sessions
+            ]
+            plot_race_history(histories, palette, titles, drivers, args.output, events)
+            if not (args.follow and args.output):
+                break
+            time.sleep(args.follow)
+            for session, history in zip(sessions, histories):
+                history.feed(session.path)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    profiling.run(main)
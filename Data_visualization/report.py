@@ -0,0 +1,175 @@
+"""Sector Leaderboard Report
+=============================================
+Render sector leaderboard tables to HTML from precompiled templates and stream
+them straight to disk.
+
+Every table is produced row by row as a generator and written as it is
+rendered, and sessions are loaded one at a time, so a season-wide report with
+hundreds of tables never holds more than one session and one row in memory.
+"""
+
+import os
+from pathlib import Path
+from string import Template
+
+from Data_visualization.theme import get_palette
+
+STYLESHEET = Path(__file__).resolve().parent / "styles.css"
+
+PAGE_HEAD = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>$title</title>
+    <link rel="stylesheet" href="$stylesheet">
+    <style>$theme_css</style>
+</head>
+<body>
+""")
+PAGE_TAIL = "</body>\n</html>\n"
+HEADING = Template("    <h2>$text</h2>\n")
+TABLE_OPEN = "<table>"
+TABLE_CLOSE = "</table>"
+HORIZONTAL_HEADER = (
+    "<tr><th>Pos</th><th class='driver-col'>Driver S1</th><th>Time S1</th>"
+    "<th class='driver-col'>Driver S2</th><th>Time S2</th>"
+    "<th class='driver-col'>Driver S3</th><th>Time S3</th></tr>"
+)
+SECTOR_CELL = Template(
+    "<td class='driver-cell' style='color: $text_color;background-color:$color'>$name</td><td class='time-cell'>$time</td>"
+)
+EMPTY_SECTOR_CELL = Template(
+    "<td class='driver-cell' style='background-color:$color'>-</td><td>-</td>"
+)
+POSITION_ROW = Template("<tr class='pos-cell'><td>$position</td>$cells</tr>")
+DRIVER_HEADER = "<tr><th class='driver-col'>Driver</th><th>Sector 1</th><th>Sector 2</th><th>Sector 3</th></tr>"
+DRIVER_ROW = Template(
+    "<tr><td class='driver-col'><span class='driver' style='color: $text_color;background-color:$color'>$name</span></td><td>$s1</td><td>$s2</td><td>$s3</td></tr>"
+)
+COMBINED_HEADER = "<tr><th>Pos</th><th class='driver-col'>Driver</th><th>Best S1</th><th>Best S2</th><th>Best S3</th></tr>"
+COMBINED_ROW = Template(
+    "<tr class='pos-cell'><td>$position</td><td class='driver-cell' style='color: $text_color;background-color:$color'>$name</td><td>$s1</td><td>$s2</td><td>$s3</td></tr>"
+)
+
+
+def horizontal_sector_rows(s1_top, s2_top, s3_top, limit, palette):
+    """Yield the lines of the side-by-side top-N table for the three sectors.
+
+    Args:
+        s1_top (list): Top entries for sector 1.
+        s2_top (list): Top entries for sector 2.
+        s3_top (list): Top entries for sector 3.
+        limit (int): Number of positions to show.
+        palette (Palette): Colors to use.
+    """
+    columns = [
+        [
+            SECTOR_CELL.substitute(
+                name=name, color=color, text_color=text_color, time=e["display"]
+            )
+            for (name, color, text_color), e in zip(
+                palette.driver_cells([e["driver"] for e in top]), top
+            )
+        ]
+        for top in (s1_top, s2_top, s3_top)
+    ]
+    empty = EMPTY_SECTOR_CELL.substitute(color=palette.theme.empty_cell)
+
+    yield TABLE_OPEN
+    yield HORIZONTAL_HEADER
+    for i in range(limit):
+        cells = "".join(column[i] if i < len(column) else empty for column in columns)
+        yield POSITION_ROW.substitute(position=i + 1, cells=cells)
+    yield TABLE_CLOSE
+
+
+def driver_sector_rows(driver_data, palette):
+    """Yield the lines of the table of best sector times for every driver.
+
+    Args:
+        driver_data (dict): Mapping of drivers to their best sector times.
+        palette (Palette): Colors to use.
+    """
+    codes = sorted(driver_data)
+    yield TABLE_OPEN
+    yield DRIVER_HEADER
+    for code, (name, color, text_color) in zip(
+        codes, palette.driver_cells(codes, "#777")
+    ):
+        best = driver_data[code]
+        yield DRIVER_ROW.substitute(
+            name=name,
+            color=color,
+            text_color=text_color,
+            s1=best["sector1_time"] or "-",
+            s2=best["sector2_time"] or "-",
+            s3=best["sector3_time"] or "-",
+        )
+    yield TABLE_CLOSE
+
+
+def combined_rows(rows, palette):
+    """Yield the lines of the combined best-sectors table.
+
+    Args:
+        rows (list): Driver dicts from ``get_top_combined_drivers``.
+        palette (Palette): Colors to use.
+    """
+    yield TABLE_OPEN
+    yield COMBINED_HEADER
+    cells = palette.driver_cells([row["driver"] for row in rows], "#888")
+    for position, (row, (name, color, text_color)) in enumerate(
+        zip(rows, cells), start=1
+    ):
+        yield COMBINED_ROW.substitute(
+            position=position,
+            name=name,
+            color=color,
+            text_color=text_color,
+            s1=row["s1_display"] or "-",
+            s2=row["s2_display"] or "-",
+            s3=row["s3_display"] or "-",
+        )
+    yield TABLE_CLOSE
+
+
+class ReportWriter:
+    """Stream an HTML report to a file, one table line at a time.
+
+    Use as a context manager: the page head is written on enter and the tail
+    on exit.
+    """
+
+    def __init__(self, path, title="Unified Sector Leaderboard", palette=None):
+        self.path = Path(path)
+        self.title = title
+        self.palette = palette or get_palette()
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "w", encoding="utf-8")
+        stylesheet = os.path.relpath(STYLESHEET, self.path.resolve().parent)
+        self._file.write(
+            PAGE_HEAD.substitute(
+                title=self.title,
+                stylesheet=Path(stylesheet).as_posix(),
+                theme_css=self.palette.css(),
+            )
+        )
+        return self
+
+    def __exit__(self, *exc):
+        self._file.write(PAGE_TAIL)
+        self._file.close()
+        self._file = None
+        return False
+
+    def heading(self, text):
+        self._file.write(HEADING.substitute(text=text))
+
+    def table(self, lines):
+        """Write every line produced by a row generator."""
+        write = self._file.write
+        for line in lines:
+            write(line)
+            write("\n")
@@ -0,0 +1,301 @@
+"""Rolling Window Store
+=============================================
+Fixed-memory recent history of a live capture for rolling analytics.
+
+The downloader only appends to its capture file, so live analytics have no
+recent history to work from.  A ``RollingStore`` keeps the last ``window``
+seconds of every driver's snapshots (position and the sector cells on screen)
+and completed laps in ring buffers allocated once per driver, so memory stays
+the same however long the capture runs.
+
+Every ring is a NumPy structured array of twice its capacity, and each row is
+written at slot ``i`` and again at ``i + capacity``.  Appending stays O(1), and
+the latest ``count`` rows are always one contiguous slice, so windows are
+views of the buffer, never copies.  Rows are appended in time order, so the
+start of a time window is found by binary search.  A window that holds more
+rows than a ring's capacity only keeps the newest rows.
+
+    python -m Data_visualization.rolling_store Montreal_2025/f1aData_FP1.jsonl --window 10
+
+replays a capture through the store and prints the rolling median lap and
+sector bests of the last 10 minutes.  The downloader keeps a store and prints
+the same table under every snapshot.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from Data_visualization.sector_tracker import format_lap_time, parse_int, parse_time
+import Data_visualization.profiling as profiling
+
+WINDOW = 600.0
+# Shortest expected time between snapshots and between laps, sizing the rings
+SNAPSHOT_PERIOD = 2.0
+LAP_PERIOD = 60.0
+
+SNAPSHOT_DTYPE = np.dtype(
+    [("Time", "f8"), ("Position", "i1"), ("S1", "f4"), ("S2", "f4"), ("S3", "f4")]
+)
+SECTOR_KEYS = ("sector1_time", "sector2_time", "sector3_time")
+LAP_DTYPE = np.dtype(
+    [("Time", "f8"), ("S1", "f4"), ("S2", "f4"), ("S3", "f4"), ("LapTime", "f4")]
+)
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in JSONL session files or directories of them.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay captures through the rolling window store."
+    )
+    parser.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="JSON Lines input files or directories containing them",
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=WINDOW / 60,
+        help=f"Minutes of history to keep (default: {WINDOW / 60:g})",
+    )
+    profiling.add_arguments(parser)
+    return parser.parse_args()
+
+
+class RingBuffer:
+    """Preallocated ring of structured rows that reads back as a contiguous view.
+
+    Attributes:
+        capacity (int): rows kept before the oldest are overwritten
+        count (int): rows currently held
+    """
+
+    def __init__(self, capacity, dtype):
+        self.capacity = capacity
+        self.count = 0
+        self._next = 0
+        self._data = np.zeros(2 * capacity, dtype=dtype)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def append(self, row):
+        """Write one row (a tuple in dtype field order), dropping the oldest when full."""
+        self._data[self._next] = row
+        self._data[self._next + self.capacity] = row
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def view(self):
+        """Rows held, oldest first, as a view into the buffer."""
+        start = (self._next - self.count) % self.capacity
+        return self._data[start : start + self.count]
+
+    def since(self, t):
+        """Rows with ``Time >= t``, oldest first, as a view into the buffer."""
+        rows = self.view()
+        return rows[np.searchsorted(rows["Time"], t, side="left") :]
+
+
+class RollingStore:
+    """Recent snapshots and laps of every driver in fixed-size rings.
+
+    Attributes:
+        window (float): seconds of history windows reach back by default
+        now (float): time of the newest row appended
+        drivers (list): driver codes in order of first appearance
+    """
+
+    def __init__(self, window=WINDOW, snapshot_capacity=None, lap_capacity=None):
+        self.window = window
+        self.now = -np.inf
+        self.drivers = []
+        self._snapshot_capacity = snapshot_capacity or int(window / SNAPSHOT_PERIOD) + 1
+        self._lap_capacity = lap_capacity or int(window / LAP_PERIOD) + 1
+        self._snapshots = {}
+        self._laps = {}
+
+    def _rings(self, code):
+        snapshots = self._snapshots.get(code)
+        if snapshots is None:
+            snapshots = RingBuffer(self._snapshot_capacity, SNAPSHOT_DTYPE)
+            self._snapshots[code] = snapshots
+            self._laps[code] = RingBuffer(self._lap_capacity, LAP_DTYPE)
+            self.drivers.append(code)
+        return snapshots, self._laps[code]
+
+    @property
+    def nbytes(self):
+        """Memory held by the rings, fixed once every driver has been seen."""
+        return sum(r.nbytes for r in self._snapshots.values()) + sum(
+            r.nbytes for r in self._laps.values()
+        )
+
+    def add_snapshot(self, code, t, position=0, sectors=(None, None, None)):
+        """Append one driver row of a snapshot.
+
+        Args:
+            code (string): driver short name
+            t (float): capture time in seconds, not earlier than the last row
+            position (int): classification position, 0 when unknown
+            sectors (tuple): S1, S2 and S3 on screen in seconds, None when empty
+        """
+        snapshots, _ = self._rings(code)
+        snapshots.append((t, position, *(np.nan if s is None else s for s in sectors)))
+        self.now = max(self.now, t)
+
+    def add_lap(self, code, t, sectors):
+        """Append a completed lap.
+
+        Args:
+            code (string): driver short name
+            t (float): capture time of the snapshot the lap completed on
+            sectors (tuple): S1, S2 and S3 in seconds
+        """
+        _, laps = self._rings(code)
+        laps.append((t, *sectors, sum(sectors)))
+        self.now = max(self.now, t)
+
+    def snapshots(self, code, seconds=None):
+        """A driver's snapshot rows of the last ``seconds`` (default: the window), as a view."""
+        ring = self._snapshots.get(code)
+        if ring is None:
+            return np.zeros(0, SNAPSHOT_DTYPE)
+        return ring.since(self.now - (self.window if seconds is None else seconds))
+
+    def laps(self, code, seconds=None):
+        """A driver's laps completed in the last ``seconds`` (default: the window), as a view."""
+        ring = self._laps.get(code)
+        if ring is None:
+            return np.zeros(0, LAP_DTYPE)
+        return ring.since(self.now - (self.window if seconds is None else seconds))
+
+    def median_laps(self, seconds=None):
+        """Median lap time per driver over the window.
+
+        Returns:
+            dict: driver code -> median lap seconds, drivers without laps left out
+        """
+        medians = {}
+        for code in self.drivers:
+            laps = self.laps(code, seconds)
+            if len(laps):
+                medians[code] = float(np.median(laps["LapTime"]))
+        return medians
+
+    def sector_bests(self, seconds=None):
+        """Best completed S1, S2 and S3 per driver over the window.
+
+        Returns:
+            dict: driver code -> (S1, S2, S3) seconds, drivers without laps left out
+        """
+        bests = {}
+        for code in self.drivers:
+            laps = self.laps(code, seconds)
+            if len(laps):
+                bests[code] = tuple(float(laps[s].min()) for s in ("S1", "S2", "S3"))
+        return bests
+
+    def format_summary(self, seconds=None):
+        """Live table of the median lap and sector bests over the window."""
+        medians = self.median_laps(seconds)
+        bests = self.sector_bests(seconds)
+        lines = []
+        for code in sorted(medians, key=medians.get):
+            s1, s2, s3 = bests[code]
+            lines.append(
+                f"{code:<5}{len(self.laps(code, seconds)):>3} laps"
+                f"  median {format_lap_time(medians[code])}"
+                f"  best {s1:5.1f} {s2:5.1f} {s3:5.1f}"
+            )
+        return "\n".join(lines) or "No laps in the window."
+
+
+def replay(filepath, window=WINDOW):
+    """Feed a capture through a SectorTracker and a RollingStore as the downloader would.
+
+    Returns:
+        tuple: the store, snapshots replayed, seconds spent appending and the
+        store's memory after every snapshot
+    """
+    from Data_visualization.capture_merge import read_capture
+    from Data_visualization.sector_tracker import SectorTracker
+    from Data_visualization.sessions import read_first_snapshot
+
+    tracker = SectorTracker()
+    store = RollingStore(window)
+    memory = []
+    spent = 0.0
+    epoch = "captured_at" in (read_first_snapshot(filepath) or [{}])[0]
+    for t, _, _, snapshot in read_capture(filepath, 0, epoch):
+        start = time.perf_counter()
+        for entry in snapshot:
+            code = entry.get("driver_short_name")
+            if not code:
+                continue
+            cells = [entry.get(k, "") for k in SECTOR_KEYS]
+            store.add_snapshot(
+                code,
+                t,
+                parse_int(entry.get("position")),
+                [parse_time(c) for c in cells],
+            )
+            completed = tracker.update(code, *cells)
+            if completed:
+                sectors = tuple(parse_time(s) for s in completed)
+                if None not in sectors:
+                    store.add_lap(code, t, sectors)
+        spent += time.perf_counter() - start
+        memory.append(store.nbytes)
+    return store, len(memory), spent, memory
+
+
+def main():
+    import pandas as pd
+
+    from Data_visualization.sessions import expand_inputs
+
+    args = parse_args()
+    for path in expand_inputs(args.input_files):
+        store, snapshots, spent, memory = replay(path, args.window * 60)
+        half = memory[len(memory) // 2] if memory else 0
+        print(
+            f"\n{path.stem}: {snapshots} snapshots,"
+            f" {spent / max(snapshots, 1) * 1e6:.0f} µs per snapshot,"
+            f" {store.nbytes / 1024:.0f} KiB held (half way: {half / 1024:.0f} KiB)"
+        )
+        medians = store.median_laps()
+        bests = store.sector_bests()
+        table = pd.DataFrame(
+            [
+                {
+                    "Driver": code,
+                    "Laps": len(store.laps(code)),
+                    "MedianLap": medians[code],
+                    "BestS1": bests[code][0],
+                    "BestS2": bests[code][1],
+                    "BestS3": bests[code][2],
+                }
+                for code in medians
+            ]
+        )
+        if table.empty:
+            print(f"No laps in the last {args.window:g} minutes.")
+            continue
+        print(f"Last {args.window:g} minutes of the capture:")
+        print(table.sort_values("MedianLap").round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,176 @@
+"""Sector Consistency
+=============================================
+Per-driver sector consistency and a drivers x sectors heatmap.
+
+The best sector of a session says how fast a driver can be; setup work also
+needs to know how repeatable that is.  For every driver and session this
+module reports, per sector and for the whole lap:
+
+* Laps: laps counted
+* Best, Mean and Std: best time, mean and standard deviation in seconds
+* Spread: the 90th minus the 10th percentile, which unlike the standard
+  deviation is not dominated by a single traffic-affected lap
+* Within: percentage of laps within ``--within`` percent of the personal best
+
+The whole input (a session or a full weekend) is loaded into one lap table and
+every metric is one grouped operation over it.  By default in-laps, out-laps
+and slow laps (see ``stints.segment_stints``) are left out so cool-down and
+safety car laps do not count as inconsistency; ``--all-laps`` keeps them.  The
+timing screen shows the three sectors only, to a tenth of a second, so there
+are no mini-sectors and sector spreads are multiples of 0.1 s.
+
+    python -m Data_visualization.sector_consistency Montreal_2025 --metric Spread --output consistency.png
+"""
+
+from Data_visualization.theme import get_palette
+import Data_visualization.cli as cli
+import Data_visualization.profiling as profiling
+
+SESSION_KEYS = ["Event", "Session"]
+TIMES = ["S1", "S2", "S3", "LapTime"]
+METRICS = ["Laps", "Best", "Mean", "Std", "Spread", "Within"]
+WITHIN = 2.0
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in JSONL session files or directories of them.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = cli.build_parser(
+        "Compute sector consistency per driver and plot it as a heatmap.", db=True
+    )
+    parser.add_argument(
+        "--within",
+        type=float,
+        default=WITHIN,
+        help=f"Count laps within this many percent of the personal best (default: {WITHIN:g})",
+    )
+    parser.add_argument(
+        "--metric",
+        type=str,
+        choices=["Std", "Spread", "Within"],
+        default="Std",
+        help="Metric shown in the heatmap (default: Std)",
+    )
+    parser.add_argument(
+        "--all-laps",
+        action="store_true",
+        help="Keep in-laps, out-laps and slow laps",
+    )
+    parser.add_argument(
+        "--output", type=str, help="Image file to save instead of showing the heatmap"
+    )
+    parser.add_argument("--csv", type=str, help="Write the statistics to this CSV file")
+    return parser.parse_args()
+
+
+def consistency_stats(laps, within=WITHIN):
+    """Consistency metrics of every driver, session and sector.
+
+    Args:
+        laps (DataFrame): lap table from ``lap_table.load_lap_table``
+        within (float): percentage of the personal best a lap may be off and
+            still count towards Within
+
+    Returns:
+        DataFrame: one row per Event/Session/Driver/Sector (S1, S2, S3 and
+        LapTime) with Laps, Best, Mean, Std, Spread and Within
+    """
+    import pandas as pd
+
+    keys = [laps[k] for k in SESSION_KEYS + ["Driver"]]
+    times = laps[TIMES]
+    grouped = times.groupby(keys)
+    near = times.le(grouped.transform("min") * (1 + within / 100))
+    stats = pd.concat(
+        {
+            "Laps": grouped.count(),
+            "Best": grouped.min(),
+            "Mean": grouped.mean(),
+            "Std": grouped.std(),
+            "Spread": grouped.quantile(0.9) - grouped.quantile(0.1),
+            "Within": near.where(times.notna()).groupby(keys).mean() * 100,
+        },
+        axis=1,
+        names=["Metric", "Sector"],
+    )
+    stats = stats.stack("Sector", future_stack=True).reset_index()
+    stats["Sector"] = pd.Categorical(stats["Sector"], TIMES, ordered=True)
+    stats["Laps"] = stats["Laps"].astype(int)
+    return stats.sort_values(SESSION_KEYS + ["Driver", "Sector"]).reset_index(
+        drop=True
+    )[SESSION_KEYS + ["Driver", "Sector"] + METRICS]
+
+
+def plot_consistency(stats, metric="Std", palette=None, output=None):
+    """Plot a drivers x sectors heatmap of one metric per session.
+
+    Drivers are sorted by their best lap.  Bright cells are consistent ones:
+    the color scale is reversed for Std and Spread, where lower is better.
+
+    Args:
+        stats (DataFrame): result of ``consistency_stats``
+        metric (string): Std, Spread or Within
+        palette (Palette, optional): colors to use, defaults to the dark theme
+        output (string, optional): image file to save instead of showing the heatmap
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    palette = palette or get_palette()
+    palette.apply_matplotlib(seaborn=True)
+    sessions = list(stats.groupby(SESSION_KEYS, sort=False))
+    height = max(len(rows["Driver"].unique()) for _, rows in sessions) * 0.4 + 1.5
+    fig, axes = plt.subplots(
+        1, len(sessions), figsize=(4.5 * len(sessions), height), squeeze=False
+    )
+    cmap = "viridis" if metric == "Within" else "viridis_r"
+    fmt = ".0f" if metric == "Within" else ".2f"
+    for ax, ((event, session), rows) in zip(axes[0], sessions):
+        order = rows[rows["Sector"] == "LapTime"].sort_values("Best")["Driver"].tolist()
+        table = rows.pivot(index="Driver", columns="Sector", values=metric)
+        table = table.reindex(index=order, columns=TIMES).rename(
+            columns={"LapTime": "Lap"}
+        )
+        sns.heatmap(
+            table, ax=ax, cmap=cmap, annot=True, fmt=fmt, cbar=False, linewidths=0.5
+        )
+        ax.set_title(f"{event} {session}\n{metric}")
+        ax.set_xlabel("")
+        ax.set_ylabel("")
+    plt.tight_layout()
+    if output:
+        fig.savefig(output)
+        plt.close(fig)
+        print(f"✅ Consistency heatmap saved to {output}")
+    else:
+        plt.show()
+
+
+def main():
+    args = parse_args()
+    sessions = cli.sessions_from_args(args)
+    if not sessions:
+        return
+    from Data_visualization.lap_table import load_lap_table
+    from Data_visualization.stints import segment_stints
+
+    laps = load_lap_table([s.path for s in sessions], args.limit, args.db)
+    if not args.all_laps and not laps.empty:
+        laps = segment_stints(laps)
+        laps = laps[laps["Clean"]]
+    if laps.empty:
+        print("No valid lap times found.")
+        return
+    stats = consistency_stats(laps, args.within)
+    print(stats.round(3).to_string(index=False))
+    if args.csv:
+        stats.to_csv(args.csv, index=False)
+        print(f"✅ Consistency statistics saved to {args.csv}")
+    plot_consistency(stats, args.metric, get_palette(args.theme), args.output)
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,115 @@
+"""Sector Transition Tracking
+=============================================
+Recognise completed laps from successive timing screen snapshots.
+
+The screen shows the sectors of the lap in progress: a new lap sets S1 and
+clears S2/S3 (in practice and qualifying the old S2/S3 sometimes stay on
+screen), then S2 and finally S3 appear.  Summing whatever is on screen gives
+fake lap times mid-lap and repeats a lap on every snapshot until the next one
+starts, and screen reloads re-display old laps all at once.
+
+``SectorTracker`` keeps the sectors shown on the previous snapshot and the lap
+in progress per driver and reports a lap only when it has seen S1, then S2,
+then S3 change in turn, each on its own snapshot.  Snapshots where a row is
+blank are skipped, since the page blanks rows while it reloads.  Every update
+is a couple of dict lookups, so tracking a full snapshot costs the same
+however long the session runs.
+"""
+
+
+class SectorTracker:
+    """Per-driver S1 -> S2 -> S3 state machine."""
+
+    def __init__(self):
+        self._shown = {}
+        self._lap = {}
+
+    def update(self, code, s1, s2, s3):
+        """Feed the sectors shown for one driver on the latest snapshot.
+
+        Args:
+            code (string): driver short name
+            s1 (string): sector 1 cell, empty when cleared
+            s2 (string): sector 2 cell
+            s3 (string): sector 3 cell
+
+        Returns:
+            tuple: (S1, S2, S3) strings of a lap completed on this snapshot, else None
+        """
+        if not (s1 or s2 or s3):
+            # Rows blank out for a snapshot or two while the page reloads
+            return None
+        previous = self._shown.get(code, ("", "", ""))
+        self._shown[code] = (s1, s2, s3)
+        lap = self._lap.get(code)
+        completed = None
+
+        cleared = not s2 and not s3 and (previous[1] or previous[2])
+        if s1 and (s1 != previous[0] or cleared):
+            # S1 just changed, or S2/S3 were cleared: a new lap started
+            lap = (s1, None)
+        elif lap and lap[1] is None and s2 and s2 != previous[1] and s1 == lap[0]:
+            lap = (s1, s2)
+        elif lap and lap[1] and s3 and s3 != previous[2] and (s1, s2) == lap:
+            completed = (s1, s2, s3)
+            lap = None
+        elif not s1:
+            lap = None
+
+        self._lap[code] = lap
+        return completed
+
+    def in_progress(self, code):
+        """Sectors of the lap a driver is on, as of the last update.
+
+        Returns:
+            tuple: (S1,) or (S1, S2) strings, empty when no lap is in progress
+        """
+        lap = self._lap.get(code)
+        if not lap:
+            return ()
+        return lap if lap[1] else lap[:1]
+
+    def reset(self):
+        """Forget all drivers, e.g. when a new session starts."""
+        self._shown.clear()
+        self._lap.clear()
+
+
+def parse_time(time_str):
+    """Convert a lap or sector time string into float seconds.
+
+    Lives here rather than in ``lap_table`` so the capture loop can use it
+    without loading pandas.
+
+    Args:
+        time_str (string): Time in ``m:ss.xxx`` or ``ss.x`` format.
+
+    Returns:
+        float: total seconds, or None for empty and status values like STOP
+    """
+    if not time_str:
+        return None
+    try:
+        if ":" in time_str:
+            m, s = time_str.split(":")
+            return float(m) * 60 + float(s)
+        return float(time_str)
+    except ValueError:
+        return None
+
+
+def parse_int(value):
+    """Position, pit stop or lap count cell as an int, 0 for empty and non-numeric values."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def format_lap_time(seconds):
+    """Seconds as an ``m:ss.xxx`` lap time."""
+    # Round first, float sums like 119.9996 would otherwise print as 1:60.000
+    ms = round(seconds * 1000)
+    minutes, ms = divmod(ms, 60000)
+    return f"{minutes}:{ms // 1000:02d}.{ms % 1000:03d}"
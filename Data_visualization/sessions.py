@@ -0,0 +1,204 @@
+"""Session detection from capture contents.
+
+The type is read from the first and last snapshot of a file so files can be
+filtered before the rest of them is decoded.  In order of preference:
+
+* the ``session_name`` the downloader copies from the page header, e.g.
+  "Race 2" or "Qualifying";
+* race values: once a race has started the leader's gap reads "LAP" with the
+  lap counter in ``interval``, and lapped cars show gaps like "2L";
+  qualifying values: the ``lap_count`` column of the older captures;
+* for the older hand-edited captures without ``captured_at``, the columns
+  alone: races add ``interval`` and ``number_of_pits``, qualifying adds
+  ``lap_count`` and practice has neither.  Newer captures always write the
+  race columns, so for them no evidence means practice or qualifying.
+"""
+
+from collections import namedtuple
+from pathlib import Path
+
+from Data_visualization.capture_json import DecodeError, loads
+
+SESSION_TYPES = {"FP": "Free Practice", "Q": "Qualifying", "R": "Race"}
+# Practice sessions share one column layout, so FP1 and FP2 select all practice files
+SESSION_ALIASES = {"FP1": "FP", "FP2": "FP"}
+# Page header names, first match wins, so "Sprint Qualifying" is not a race
+SESSION_NAMES = (
+    ("Qualifying", "Q"),
+    ("Shootout", "Q"),
+    ("Practice", "FP"),
+    ("Race", "R"),
+    ("Sprint", "R"),
+)
+TAIL_CHUNK = 1 << 16
+
+
+def read_first_snapshot(filepath):
+    """Load the first telemetry snapshot from a JSONL file."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                snapshot = loads(line)
+            except DecodeError:
+                continue
+            if isinstance(snapshot, list) and snapshot:
+                return snapshot
+    return []
+
+
+def read_last_snapshot(filepath):
+    """Load the final telemetry snapshot from a JSONL file without reading the rest.
+
+    The file is read backwards in chunks and the last line that decodes wins,
+    so a line cut off by a killed downloader is skipped.  Empty files give [].
+    """
+    with open(filepath, "rb") as f:
+        end = f.seek(0, 2)
+        partial = b""
+        while end > 0:
+            start = max(0, end - TAIL_CHUNK)
+            f.seek(start)
+            lines = (f.read(end - start) + partial).split(b"\n")
+            # The first piece may continue a line that starts in an earlier chunk
+            partial = lines.pop(0) if start else b""
+            for line in reversed(lines):
+                try:
+                    snapshot = loads(line)
+                except (*DecodeError, UnicodeDecodeError):
+                    continue
+                if isinstance(snapshot, list) and snapshot:
+                    return snapshot
+            end = start
+    return []
+
+
+def _kind_from_name(name):
+    for word, kind in SESSION_NAMES:
+        if word.lower() in name.lower():
+            return kind
+    return None
+
+
+def _kind_from_values(snapshot):
+    for entry in snapshot:
+        gap = entry.get("gap", "")
+        if gap == "LAP" or (gap.endswith("L") and gap[:-1].isdigit()):
+            return "R"
+        if entry.get("lap_count"):
+            return "Q"
+    return None
+
+
+def detect_session(first, last=None, fallback=True):
+    """Session type code ("FP", "Q" or "R") of a capture.
+
+    Args:
+        first (list): first snapshot of the capture
+        last (list, optional): last snapshot, which shows race values even
+            when the capture started before the lights went out
+        fallback (bool): guess from the columns when neither the session
+            name nor the values tell
+
+    Returns:
+        string: session type code, None when ``fallback`` is False and the
+        type could not be read from the capture's contents
+    """
+    snapshots = [s for s in (first, last) if s]
+    for snapshot in snapshots:
+        name = snapshot[0].get("session_name")
+        if name and _kind_from_name(name):
+            return _kind_from_name(name)
+    for snapshot in snapshots:
+        kind = _kind_from_values(snapshot)
+        if kind:
+            return kind
+    if not fallback:
+        return None
+    keys = first[0].keys() if first else ()
+    if "captured_at" in keys:
+        return "FP"
+    if "interval" in keys or "number_of_pits" in keys:
+        return "R"
+    if "lap_count" in keys:
+        return "Q"
+    return "FP"
+
+
+class SessionInfo(namedtuple("SessionInfo", ["path", "kind", "event", "start"])):
+    """Session type, weekend and capture start time of one capture file."""
+
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self.path.stem
+
+    @property
+    def label(self):
+        return SESSION_TYPES[self.kind]
+
+    @property
+    def title(self):
+        """Human readable session title, e.g. "Montreal 2025 Race (13:16 UTC)"."""
+        event = self.event.replace("_", " ")
+        start = f" ({self.start[:5]} UTC)" if self.start else ""
+        return f"{event} {self.label}{start}"
+
+
+def expand_inputs(paths):
+    """Expand directories in a list of input paths to the JSONL files they contain.
+
+    Args:
+        paths (list): file or directory paths
+
+    Returns:
+        list: JSONL file paths, directories expanded in sorted order
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.jsonl")))
+        else:
+            files.append(path)
+    return files
+
+
+def session_info(filepath):
+    """Describe a capture file from its first and last snapshots.
+
+    Args:
+        filepath (string): path to a JSONL capture file
+
+    Returns:
+        SessionInfo: detected session details
+    """
+    path = Path(filepath)
+    first = read_first_snapshot(path)
+    return SessionInfo(
+        path=path,
+        kind=detect_session(first, read_last_snapshot(path)),
+        event=path.resolve().parent.name,
+        start=first[0].get("timestamp", "") if first else "",
+    )
+
+
+def select_sessions(filepaths, session=None):
+    """Detect every capture file and keep those matching a session type.
+
+    Args:
+        filepaths (list): JSONL files (directories already expanded)
+        session (string, optional): "FP", "Q" or "R", or an alias like "FP1"
+
+    Returns:
+        list: SessionInfo for the matching files, in input order
+    """
+    kind = SESSION_ALIASES.get(session, session)
+    infos = [session_info(path) for path in filepaths]
+    return [info for info in infos if kind is None or info.kind == kind]
+
+
+def top_drivers(filepath, limit):
+    """Codes of the first ``limit`` drivers in the final classification of a capture."""
+    snapshot = read_last_snapshot(filepath)
+    ranked = sorted(snapshot, key=lambda e: int(e.get("position") or 999))
+    return {e["driver_short_name"] for e in ranked[:limit]}
@@ -0,0 +1,331 @@
+"""Compact Snapshot Table
+=============================================
+Hold a whole capture as NumPy structured arrays instead of lists of dicts.
+
+``load_jsonl`` keeps every entry as a dict of 17 string keys and string values,
+roughly 2 KB per driver per snapshot.  ``load_snapshot_table`` decodes each
+line with an ``object_pairs_hook`` that turns the key/value pairs of an entry
+straight into a tuple of numbers, so no entry dict is ever built, and stores
+the result in one structured array row of 38 bytes.  The same sector and gap
+strings repeat on many snapshots, so their conversions are memoized.  Driver
+codes are interned into a small lookup table and stored as ``uint8`` indexes,
+and the weather, which is the same for every entry of a snapshot, is kept once
+per snapshot.
+
+Run the module on capture files to compare memory and load time with
+``load_jsonl``:
+
+    python -m Data_visualization.snapshot_table Montreal_2025
+"""
+
+import argparse
+import json
+import math
+import time
+import tracemalloc
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from Data_visualization.lap_table import expand_inputs
+from Data_visualization.sector_tracker import parse_int, parse_time
+from Data_visualization.weather import WEATHER_FIELDS
+import Data_visualization.profiling as profiling
+
+# Lap column statuses shown instead of a time, stored as their index
+STATUSES = ("", "IN PIT", "OUT", "STOP", "RETIRED")
+ROW_DTYPE = np.dtype(
+    [
+        ("snapshot", np.uint16),
+        ("driver", np.uint8),
+        ("position", np.int8),
+        ("gap", np.float32),
+        ("interval", np.float32),
+        ("best_lap", np.float32),
+        ("s1", np.float32),
+        ("s2", np.float32),
+        ("s3", np.float32),
+        ("latest_lap", np.float32),
+        ("gap_laps", np.int8),
+        ("interval_laps", np.int8),
+        ("status", np.int8),
+        ("pits", np.int8),
+        ("lap_count", np.int16),
+    ]
+)
+# Per-snapshot record: capture clock and epoch time, then the weather readings
+WEATHER_DTYPE = np.dtype(
+    [("clock", np.int32), ("captured_at", np.float64), ("page_latency", np.float32)]
+    + [(column, np.float32) for column in WEATHER_FIELDS.values()]
+)
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in JSONL session files or directories of them.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare memory and load time of compact snapshot tables with load_jsonl."
+    )
+    parser.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="JSON Lines input files or directories containing them",
+    )
+    profiling.add_arguments(parser)
+    return parser.parse_args()
+
+
+@lru_cache(maxsize=4096)
+def _seconds(value):
+    """Lap or sector time string to float seconds, NaN when empty or a status."""
+    seconds = parse_time(value)
+    return math.nan if seconds is None else seconds
+
+
+_integer = lru_cache(maxsize=4096)(parse_int)
+
+
+@lru_cache(maxsize=4096)
+def _gap(value):
+    """Gap or interval string to (seconds, laps behind).
+
+    ``LAP`` (the leader's gap) is 0 seconds and ``3L`` is three laps behind
+    with no time shown.
+    """
+    if not value:
+        return math.nan, 0
+    if value == "LAP":
+        return 0.0, 0
+    if value[-1] == "L":
+        return math.nan, _integer(value[:-1])
+    try:
+        return float(value), 0
+    except ValueError:
+        return math.nan, 0
+
+
+def _clock(timestamp):
+    """``%H:%M:%S`` to seconds since midnight, -1 when missing."""
+    try:
+        h, m, s = timestamp.split(":")
+        return int(h) * 3600 + int(m) * 60 + int(float(s))
+    except (AttributeError, ValueError):
+        return -1
+
+
+class SnapshotTable:
+    """A capture decoded into structured arrays.
+
+    Attributes:
+        drivers (tuple): interned driver codes, indexed by the ``driver`` field
+        rows (ndarray): one ``ROW_DTYPE`` record per driver per snapshot
+        weather (ndarray): one ``WEATHER_DTYPE`` record per snapshot
+    """
+
+    def __init__(self, drivers, rows, weather):
+        self.drivers = tuple(drivers)
+        self.rows = rows
+        self.weather = weather
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.weather.nbytes
+
+    @property
+    def time(self):
+        """Capture time per snapshot: epoch seconds when recorded, else seconds
+        since midnight of the first capture day with midnight unwrapped."""
+        epoch = self.weather["captured_at"]
+        if len(epoch) and not np.isnan(epoch).any():
+            return epoch
+        clock = self.weather["clock"].astype(float)
+        wraps = np.concatenate(([0], np.cumsum(np.diff(clock) < -43200)))
+        return clock + wraps * 86400
+
+    def driver_codes(self):
+        """Driver code of every row."""
+        return np.array(self.drivers)[self.rows["driver"]]
+
+    def for_driver(self, code):
+        """Rows of one driver in capture order."""
+        return self.rows[self.rows["driver"] == self.drivers.index(code)]
+
+    def to_frame(self):
+        """Rows as a DataFrame with driver codes, status strings and snapshot times."""
+        df = pd.DataFrame(self.rows)
+        df.insert(1, "time", self.time[self.rows["snapshot"]])
+        df["driver"] = self.driver_codes()
+        df["status"] = np.array(STATUSES)[self.rows["status"]]
+        return df
+
+
+def load_snapshot_table(filepath):
+    """Decode a JSONL capture straight into a SnapshotTable.
+
+    Args:
+        filepath (string): path to JSONL file to be loaded
+
+    Returns:
+        SnapshotTable: the capture's rows and per-snapshot weather
+    """
+    codes = {}
+    statuses = {status: i for i, status in enumerate(STATUSES)}
+    weather_index = {field: i + 3 for i, field in enumerate(WEATHER_FIELDS)}
+    snapshot = 0
+    reading = None
+
+    def entry_row(pairs):
+        # Called by the decoder for every entry object instead of building a dict
+        nonlocal reading
+        # Weather is the same for the whole snapshot, so only the first entry's is parsed
+        weather = None if reading else [-1] + [math.nan] * (len(weather_index) + 2)
+        driver = position = pits = lap_count = 0
+        gap = interval = best = s1 = s2 = s3 = latest = math.nan
+        gap_laps = interval_laps = status = 0
+        for key, value in pairs:
+            if key == "driver_short_name":
+                driver = codes.setdefault(value, len(codes))
+            elif key == "position":
+                position = _integer(value)
+            elif key == "gap":
+                gap, gap_laps = _gap(value)
+            elif key == "interval":
+                interval, interval_laps = _gap(value)
+            elif key == "best_lap":
+                status = statuses.get(value, 0)
+                best = math.nan if status else _seconds(value)
+            elif key == "sector1_time":
+                s1 = _seconds(value)
+            elif key == "sector2_time":
+                s2 = _seconds(value)
+            elif key == "sector3_time":
+                s3 = _seconds(value)
+            elif key == "latest_lap_time":
+                latest = _seconds(value)
+            elif key == "number_of_pits":
+                pits = _integer(value)
+            elif key == "lap_count":
+                lap_count = _integer(value)
+            elif weather is None:
+                continue
+            elif key == "timestamp":
+                weather[0] = _clock(value)
+            elif key == "captured_at":
+                weather[1] = math.nan if value is None else value
+            elif key == "page_latency":
+                weather[2] = math.nan if value is None else value
+            elif key in weather_index:
+                weather[weather_index[key]] = _reading(value)
+        row = (
+            snapshot,
+            driver,
+            position,
+            gap,
+            interval,
+            best,
+            s1,
+            s2,
+            s3,
+            latest,
+            gap_laps,
+            interval_laps,
+            status,
+            pits,
+            lap_count,
+        )
+        if weather is not None:
+            reading = tuple(weather)
+        return row
+
+    decoder = json.JSONDecoder(object_pairs_hook=entry_row)
+    rows, weather = [], []
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            reading = None
+            try:
+                entries = decoder.decode(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(entries, list) or not entries:
+                continue
+            rows.extend(entries)
+            weather.append(reading)
+            snapshot += 1
+
+    return SnapshotTable(
+        codes,
+        np.array(rows, dtype=ROW_DTYPE),
+        np.array(weather, dtype=WEATHER_DTYPE),
+    )
+
+
+def _reading(value):
+    """Leading number of a unit-suffixed weather string like ``"23.1 °"``."""
+    try:
+        return float(value.split()[0].rstrip("%"))
+    except (AttributeError, IndexError, ValueError):
+        return math.nan
+
+
+def measure(loader, filepath):
+    """Retained memory, peak memory and wall time of one loader call.
+
+    Returns:
+        tuple: (result, retained bytes, peak bytes, seconds)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = loader(filepath)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Time again without tracing, which slows allocation-heavy code down
+    start = time.perf_counter()
+    loader(filepath)
+    return result, retained, peak, min(elapsed, time.perf_counter() - start)
+
+
+def main():
+    from Data_visualization.topSectorsParse import load_jsonl
+
+    args = parse_args()
+    rows = []
+    for path in expand_inputs(args.input_files):
+        entries, dict_kb, dict_peak, dict_s = measure(load_jsonl, path)
+        table, compact_kb, compact_peak, compact_s = measure(load_snapshot_table, path)
+        if len(entries) != len(table):
+            # The comparison only means something when both loaders kept the same rows
+            print(
+                f"{path.stem}: load_jsonl kept {len(entries)} entries but the"
+                f" snapshot table {len(table)}, skipping"
+            )
+            continue
+        rows.append(
+            {
+                "Session": path.stem,
+                "Rows": len(table),
+                "DictsKB": dict_kb / 1024,
+                "CompactKB": compact_kb / 1024,
+                "MemoryRatio": dict_kb / compact_kb,
+                "DictsPeakKB": dict_peak / 1024,
+                "CompactPeakKB": compact_peak / 1024,
+                "DictsMs": dict_s * 1000,
+                "CompactMs": compact_s * 1000,
+            }
+        )
+    if not rows:
+        print("No sessions to compare.")
+        return
+    print(pd.DataFrame(rows).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
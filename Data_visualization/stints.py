@@ -0,0 +1,89 @@
+"""Stint Analysis
+=============================================
+Split race laps into stints on pit-count changes and fit tyre degradation.
+
+A stint ends whenever the ``number_of_pits`` column increases.  The first lap
+of every stint after the first is flagged as an out-lap and the last recorded
+lap before a pit-count change as an in-lap.  Laps slower than ``slow_factor``
+times the session's reference pace (safety car, incidents) are flagged as slow.
+Degradation is the least-squares slope of lap time against laps into the
+stint, fitted over the remaining clean laps of every stint at once.
+"""
+
+import numpy as np
+
+STINT_KEYS = ["Event", "Session", "Driver"]
+SLOW_FACTOR = 1.07
+
+
+def segment_stints(laps, slow_factor=SLOW_FACTOR):
+    """Add stint numbers and in/out/slow lap flags to a lap table.
+
+    Args:
+        laps (DataFrame): lap table from ``lap_table.build_lap_table``
+        slow_factor (float): laps slower than this multiple of the session
+            reference pace are flagged as slow
+
+    Returns:
+        DataFrame: copy of the lap table with Stint, StintLap, InLap, OutLap,
+        SlowLap and Clean columns
+    """
+    laps = laps.sort_values(STINT_KEYS + ["Lap"]).reset_index(drop=True)
+    by_driver = laps.groupby(STINT_KEYS, sort=False)
+
+    previous_pits = by_driver["Pits"].shift()
+    pitted = previous_pits.notna() & (laps["Pits"] > previous_pits)
+    laps["Stint"] = pitted.groupby([laps[k] for k in STINT_KEYS]).cumsum() + 1
+    laps["StintLap"] = laps.groupby(STINT_KEYS + ["Stint"]).cumcount() + 1
+
+    laps["OutLap"] = pitted.to_numpy()
+    laps["InLap"] = by_driver["Pits"].shift(-1).gt(laps["Pits"]).to_numpy()
+
+    # The fastest laps of a session are a stable reference even when a large
+    # share of the race was run behind the safety car.
+    reference = laps.groupby(["Event", "Session"])["LapTime"].transform("quantile", 0.1)
+    laps["SlowLap"] = laps["LapTime"] > reference * slow_factor
+    laps["Clean"] = ~(laps["InLap"] | laps["OutLap"] | laps["SlowLap"])
+    return laps
+
+
+def fit_degradation(laps):
+    """Fit a lap time slope for every stint over its clean laps.
+
+    All stints are solved together: per-group sums are accumulated with
+    ``np.bincount`` and the closed-form least-squares slope is evaluated on
+    the resulting arrays.
+
+    Args:
+        laps (DataFrame): lap table from ``segment_stints``
+
+    Returns:
+        DataFrame: one row per stint with Event, Session, Driver, Stint, Laps,
+        MedianLapTime, Slope (seconds per lap) and Intercept. Slope is NaN for
+        stints with fewer than three clean laps.
+    """
+    clean = laps[laps["Clean"]]
+    keys = STINT_KEYS + ["Stint"]
+    grouped = clean.groupby(keys)
+    codes = grouped.ngroup().to_numpy()
+    result = grouped["LapTime"].agg(Laps="size", MedianLapTime="median").reset_index()
+    n_groups = len(result)
+
+    x = clean["StintLap"].to_numpy(dtype=float)
+    y = clean["LapTime"].to_numpy(dtype=float)
+    n = np.bincount(codes, minlength=n_groups).astype(float)
+    sx = np.bincount(codes, x, n_groups)
+    sy = np.bincount(codes, y, n_groups)
+    sxx = np.bincount(codes, x * x, n_groups)
+    sxy = np.bincount(codes, x * y, n_groups)
+
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(
+            (n >= 3) & (denominator > 0), (n * sxy - sx * sy) / denominator, np.nan
+        )
+        intercept = np.where(np.isnan(slope), np.nan, (sy - slope * sx) / n)
+
+    result["Slope"] = slope
+    result["Intercept"] = intercept
+    return result.sort_values(keys).reset_index(drop=True)
@@ -0,0 +1,159 @@
+"""Display themes shared by the HTML leaderboards and the matplotlib/seaborn charts.
+
+Driver colors, text contrast colors and display names come from the registry,
+where they are computed once when it is loaded.  A ``Palette`` pairs those
+with the page and chart colors of one theme.  Palettes are memoized per theme
+and registry, so switching between dark, light and print output never
+recomputes anything.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class Theme:
+    """Page and chart colors for one output style."""
+
+    name: str
+    mpl_style: str
+    seaborn_style: str
+    background: str
+    surface: str
+    header: str
+    border: str
+    foreground: str
+    muted: str
+    heading: str
+    empty_cell: str
+
+
+THEMES = {
+    "dark": Theme(
+        name="dark",
+        mpl_style="dark_background",
+        seaborn_style="darkgrid",
+        background="#121212",
+        surface="#1E1E1E",
+        header="#2C2C2C",
+        border="#333",
+        foreground="#EEE",
+        muted="#CCC",
+        heading="#FFD700",
+        empty_cell="#444",
+    ),
+    "light": Theme(
+        name="light",
+        mpl_style="default",
+        seaborn_style="whitegrid",
+        background="#FAFAFA",
+        surface="#FFFFFF",
+        header="#E6E6E6",
+        border="#CCC",
+        foreground="#111",
+        muted="#333",
+        heading="#B8860B",
+        empty_cell="#DDD",
+    ),
+    "print": Theme(
+        name="print",
+        mpl_style="grayscale",
+        seaborn_style="white",
+        background="#FFFFFF",
+        surface="#FFFFFF",
+        header="#F0F0F0",
+        border="#000",
+        foreground="#000",
+        muted="#000",
+        heading="#000",
+        empty_cell="#FFFFFF",
+    ),
+}
+
+
+class Palette:
+    """Driver and team colors of a registry combined with a theme.
+
+    Attributes:
+        theme (Theme): page and chart colors
+        driver_colors (dict): driver code to hex color
+        text_colors (dict): driver code to "black" or "white" for text drawn on the driver color
+        display_names (dict): driver code to last name
+        team_colors (dict): team name to hex color
+    """
+
+    def __init__(self, theme, registry):
+        from Data_visualization.driver_info import UNKNOWN_DRIVER
+
+        self.theme = theme
+        self.registry = registry
+        self._unknown_text_color = UNKNOWN_DRIVER["text_color"]
+        table = registry.table
+        self.driver_colors = table["color"].to_dict()
+        self.text_colors = table["text_color"].to_dict()
+        self.display_names = table["last_name"].to_dict()
+        self.team_colors = {
+            team: info["color"] for team, info in registry.teams.items()
+        }
+
+    def driver_cells(self, codes, fallback="#999"):
+        """Display name, background color and text color for each driver code.
+
+        Args:
+            codes (list): driver codes
+            fallback (string): color for codes missing from the registry
+
+        Returns:
+            list: (name, color, text color) tuples in the order of ``codes``,
+            unknown codes shown as themselves
+        """
+        return [
+            (
+                self.display_names.get(code, code),
+                self.driver_colors.get(code, fallback),
+                self.text_colors.get(code, self._unknown_text_color),
+            )
+            for code in codes
+        ]
+
+    def css(self):
+        """CSS custom properties overriding the stylesheet's default (dark) colors."""
+        t = self.theme
+        return (
+            ":root {"
+            f" --background: {t.background}; --surface: {t.surface};"
+            f" --header: {t.header}; --border: {t.border};"
+            f" --foreground: {t.foreground}; --muted: {t.muted};"
+            f" --heading: {t.heading}; --empty-cell: {t.empty_cell};"
+            " }"
+        )
+
+    def apply_matplotlib(self, seaborn=False):
+        """Switch matplotlib (and optionally seaborn) to this theme's style."""
+        import matplotlib.pyplot as plt
+
+        if seaborn:
+            import seaborn as sns
+
+            sns.set_theme(style=self.theme.seaborn_style)
+        plt.style.use(self.theme.mpl_style)
+
+
+@lru_cache(maxsize=None)
+def get_palette(theme="dark", registry=None):
+    """Memoized palette for a theme name and registry.
+
+    Args:
+        theme (string): one of THEMES
+        registry (DriverRegistry, optional): registry the driver colors come
+            from, defaults to ``driver_info.REGISTRY``
+
+    Returns:
+        Palette: shared palette instance
+    """
+    if registry is None:
+        # The registry loads pandas, so it is only imported once a palette is used
+        from Data_visualization.driver_info import REGISTRY
+
+        registry = REGISTRY
+    return Palette(THEMES[theme], registry)
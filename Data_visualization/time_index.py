@@ -0,0 +1,271 @@
+"""Session Time Index
+=============================================
+Sorted time indexes over lap and weather tables for window queries and
+cross-session alignment.
+
+Every lap and weather row carries a ``Time`` column: epoch seconds for captures
+that record ``captured_at`` and monotonic clock seconds for older ones (see
+``lap_table.capture_seconds``).  Absolute times of two sessions, or of two
+capture instances started at different moments, are not comparable, so a
+``TimeIndex`` measures time from the session start, which is the first
+snapshot of the capture.
+
+The index keeps the times sorted once, so a window or as-of lookup is two
+binary searches instead of a scan of the table:
+
+    python -m Data_visualization.time_index Montreal_2025 --window 10 20
+
+``--step`` prints which weather reading of each session was current at the
+same session-relative time.
+"""
+
+import numpy as np
+import pandas as pd
+
+from Data_visualization.lap_table import build_lap_table, expand_inputs, load_entries
+from Data_visualization.sessions import top_drivers
+from Data_visualization.weather import WEATHER_FIELDS, build_weather_series
+import Data_visualization.cli as cli
+import Data_visualization.profiling as profiling
+
+# Session file names repeat across weekends, so sessions are keyed by both
+SESSION_KEYS = ["Event", "Session"]
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in paths to one or more JSONL session files.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = cli.build_parser(
+        "Query laps and weather by session-relative time.", theme=False
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        nargs=2,
+        metavar=("START", "END"),
+        default=(0.0, 10.0),
+        help="Minutes from the session start to show laps and weather for (default: 0 10)",
+    )
+    parser.add_argument(
+        "--step",
+        type=float,
+        help="Align the sessions' weather on a grid of this many seconds",
+    )
+    return parser.parse_args()
+
+
+class TimeIndex:
+    """Binary-search index over the times of one session's rows.
+
+    Attributes:
+        times (ndarray): row times in ascending order
+        order (ndarray): row position of each sorted time in the indexed table
+        start (float): session start, the zero of relative times
+    """
+
+    def __init__(self, times, start=None):
+        times = np.asarray(times, dtype=float)
+        self.order = np.argsort(times, kind="stable")
+        self.times = times[self.order]
+        if start is None:
+            start = self.times[0] if len(self.times) else 0.0
+        self.start = float(start)
+
+    def __len__(self):
+        return len(self.times)
+
+    @classmethod
+    def from_frame(cls, frame, column="Time", start=None):
+        """Index the rows of a DataFrame by one of its time columns."""
+        return cls(frame[column].to_numpy(dtype=float), start)
+
+    @property
+    def relative(self):
+        """Sorted times in seconds from the session start."""
+        return self.times - self.start
+
+    @property
+    def duration(self):
+        """Seconds from the session start to the last row."""
+        return float(self.times[-1] - self.start) if len(self.times) else 0.0
+
+    def _absolute(self, t, relative):
+        return t + self.start if relative else t
+
+    def window(self, start, end, relative=True):
+        """Row positions with ``start <= time < end`` in time order.
+
+        Args:
+            start (float): window start in seconds
+            end (float): window end in seconds
+            relative (bool): bounds are seconds from the session start, else
+                the same absolute seconds as the ``Time`` column
+
+        Returns:
+            ndarray: positions for ``DataFrame.iloc``
+        """
+        lo, hi = np.searchsorted(
+            self.times,
+            [self._absolute(start, relative), self._absolute(end, relative)],
+            side="left",
+        )
+        return self.order[lo:hi]
+
+    def asof(self, t, relative=True):
+        """Positions of the last row at or before each time, -1 before the first row.
+
+        Args:
+            t (float or array-like): times in seconds
+            relative (bool): times are seconds from the session start
+
+        Returns:
+            int or ndarray: positions for ``DataFrame.iloc``
+        """
+        found = (
+            np.searchsorted(
+                self.times,
+                self._absolute(np.asarray(t, dtype=float), relative),
+                "right",
+            )
+            - 1
+        )
+        positions = np.where(found >= 0, self.order[np.maximum(found, 0)], -1)
+        return int(positions) if positions.ndim == 0 else positions
+
+
+def session_starts(weather):
+    """Start of every session: the time of its first snapshot.
+
+    The weather series has one row per snapshot, so its first row is the start
+    of the capture even when no lap was completed for a while.
+
+    Args:
+        weather (DataFrame): weather series with Event, Session and Time columns
+
+    Returns:
+        dict: (event, session) -> start time in seconds
+    """
+    return weather.groupby(SESSION_KEYS, sort=False)["Time"].min().to_dict()
+
+
+def index_sessions(frame, starts=None):
+    """Build one TimeIndex per session of a lap or weather table.
+
+    Args:
+        frame (DataFrame): table with Event, Session and Time columns
+        starts (dict, optional): session start times from ``session_starts``,
+            defaults to each session's first row
+
+    Returns:
+        dict: (event, session) -> (rows of the session, TimeIndex)
+    """
+    starts = starts or {}
+    indexes = {}
+    for key, rows in frame.groupby(SESSION_KEYS, sort=False):
+        rows = rows.reset_index(drop=True)
+        indexes[key] = (rows, TimeIndex.from_frame(rows, start=starts.get(key)))
+    return indexes
+
+
+def window_rows(indexes, start, end):
+    """Rows of every session between two session-relative times.
+
+    Args:
+        indexes (dict): result of ``index_sessions``
+        start (float): seconds from each session's start
+        end (float): seconds from each session's start, exclusive
+
+    Returns:
+        DataFrame: matching rows in time order per session, with a
+        RelativeTime column
+    """
+    frames = []
+    for rows, index in indexes.values():
+        selected = rows.iloc[index.window(start, end)].copy()
+        selected["RelativeTime"] = selected["Time"] - index.start
+        frames.append(selected)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def align(indexes, step):
+    """Align sessions or capture instances on a common session-relative grid.
+
+    Args:
+        indexes (dict): label -> TimeIndex, or the result of ``index_sessions``
+        step (float): grid spacing in seconds
+
+    Returns:
+        DataFrame: one row per grid time (the index, in seconds from the
+        start) and one column per label holding the row position current at
+        that time, -1 before the first row
+    """
+    indexes = {
+        label: index[1] if isinstance(index, tuple) else index
+        for label, index in indexes.items()
+    }
+    duration = max((index.duration for index in indexes.values()), default=0.0)
+    grid = np.arange(0.0, duration + step, step)
+    return pd.DataFrame(
+        {label: index.asof(grid) for label, index in indexes.items()},
+        index=pd.Index(grid, name="Seconds"),
+    )
+
+
+def main():
+    args = parse_args()
+    sessions = cli.sessions_from_args(args)
+    if not sessions:
+        return
+    laps, weather = [], []
+    for path in expand_inputs([s.path for s in sessions]):
+        entries = load_entries(
+            path, top_drivers(path, args.limit) if args.limit else None
+        )
+        session, event = path.stem, path.resolve().parent.name
+        laps.append(build_lap_table(entries, session, event))
+        weather.append(build_weather_series(entries, session, event))
+    laps = pd.concat(laps, ignore_index=True)
+    weather = pd.concat(weather, ignore_index=True)
+    starts = session_starts(weather)
+    lap_index = index_sessions(laps, starts)
+    weather_index = index_sessions(weather, starts)
+
+    start, end = (minutes * 60 for minutes in args.window)
+    window = window_rows(lap_index, start, end)
+    print(f"Laps between {args.window[0]:g} and {args.window[1]:g} minutes:")
+    if window.empty:
+        print("No laps in this window.")
+    else:
+        print(
+            window[SESSION_KEYS + ["Driver", "Lap", "LapTime", "RelativeTime"]]
+            .round(3)
+            .to_string(index=False)
+        )
+    readings = window_rows(weather_index, start, end)
+    if not readings.empty:
+        print("\nMean weather in the window:")
+        print(
+            readings.groupby(SESSION_KEYS, sort=False)[list(WEATHER_FIELDS.values())]
+            .mean()
+            .round(1)
+            .to_string()
+        )
+
+    if args.step:
+        positions = align(weather_index, args.step)
+        temps = pd.DataFrame(index=positions.index)
+        for key, (rows, _) in weather_index.items():
+            current = positions[key].to_numpy()
+            values = rows["TrackTemp"].to_numpy()[current]
+            temps[" ".join(key)] = np.where(current >= 0, values, np.nan)
+        print(f"\nTrack temperature every {args.step:g} s from the session start:")
+        print(temps.to_string())
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,505 @@
+"""Local Timing Database
+=============================================
+Load capture files into an embedded SQLite database for ad-hoc queries.
+
+Each capture becomes one row of ``sessions`` and its snapshots are stored in
+``snapshots`` (one row per driver per snapshot, raw screen values),
+``weather`` (one parsed reading per snapshot) and ``laps`` (completed laps as
+found by ``lap_table.detect_laps``).  ``drivers`` is filled from the driver
+registry and the ``lap_view`` view joins laps with their session and team, so a
+question like "Prema laps under 1:38 in Race 1 and Race 3" is one query:
+
+    SELECT * FROM lap_view
+    WHERE team = 'Prema Racing' AND lap_time < 98
+      AND (session LIKE '%Race1%' OR session LIKE '%Race3%')
+
+Times are epoch seconds for captures that record ``captured_at`` and seconds
+since midnight of the first capture day for older ones.
+
+Ingest is incremental.  The byte offset of the last complete line and the lap
+detection state are stored per session, so ingesting a capture that is still
+being written only reads the lines added since the previous run.
+
+pandas and the modules built on it are imported by the methods that use them,
+so ``--help`` and the command line parsing start without them.
+"""
+
+import argparse
+import sqlite3
+import time
+
+from Data_visualization.capture_json import DecodeError, loads
+from Data_visualization.sector_tracker import parse_int
+from Data_visualization.sessions import expand_inputs, session_info
+import Data_visualization.profiling as profiling
+
+DEFAULT_DB = "f1a_timing.sqlite"
+SNAPSHOT_FIELDS = (
+    "position",
+    "gap",
+    "interval",
+    "best_lap",
+    "sector1_time",
+    "sector2_time",
+    "sector3_time",
+    "number_of_pits",
+    "lap_count",
+    "latest_lap_time",
+)
+
+
+def schema():
+    """SQL creating the tables, indexes and views that do not exist yet."""
+    from Data_visualization.weather import WEATHER_FIELDS
+
+    return f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    event TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    start TEXT,
+    bytes_read INTEGER NOT NULL DEFAULT 0,
+    snapshots INTEGER NOT NULL DEFAULT 0,
+    last_timestamp TEXT,
+    last_time REAL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    snapshot INTEGER NOT NULL,
+    timestamp TEXT,
+    time REAL,
+    driver TEXT NOT NULL,
+    {", ".join(f"{field} TEXT" for field in SNAPSHOT_FIELDS)},
+    PRIMARY KEY (session_id, snapshot, driver)
+);
+CREATE INDEX IF NOT EXISTS snapshots_time ON snapshots (session_id, time);
+CREATE INDEX IF NOT EXISTS snapshots_driver ON snapshots (session_id, driver, snapshot);
+CREATE TABLE IF NOT EXISTS weather (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    snapshot INTEGER NOT NULL,
+    timestamp TEXT,
+    time REAL,
+    {", ".join(f"{column} REAL" for column in WEATHER_FIELDS.values())},
+    PRIMARY KEY (session_id, snapshot)
+);
+CREATE INDEX IF NOT EXISTS weather_time ON weather (session_id, time);
+CREATE TABLE IF NOT EXISTS laps (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    driver TEXT NOT NULL,
+    lap INTEGER NOT NULL,
+    lap_time REAL,
+    s1 REAL,
+    s2 REAL,
+    s3 REAL,
+    best_lap REAL,
+    pits INTEGER,
+    position INTEGER,
+    timestamp TEXT,
+    time REAL,
+    PRIMARY KEY (session_id, driver, lap)
+);
+CREATE INDEX IF NOT EXISTS laps_time ON laps (session_id, time);
+CREATE TABLE IF NOT EXISTS lap_state (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    driver TEXT NOT NULL,
+    last_s3 TEXT,
+    last_lap TEXT,
+    laps INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, driver)
+);
+CREATE TABLE IF NOT EXISTS drivers (
+    code TEXT PRIMARY KEY,
+    full_name TEXT,
+    team TEXT,
+    color TEXT,
+    number TEXT
+);
+CREATE VIEW IF NOT EXISTS lap_view AS
+SELECT s.event, s.name AS session, s.kind, l.driver, d.team, l.lap, l.lap_time,
+       l.s1, l.s2, l.s3, l.best_lap, l.pits, l.position, l.timestamp, l.time
+FROM laps l
+JOIN sessions s ON s.id = l.session_id
+LEFT JOIN drivers d ON d.code = l.driver;
+"""
+
+
+def parse_args():
+    """Parses out command line arguments.  Ingest capture files or query the database.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Load live timing captures into a local SQLite database."
+    )
+    parser.add_argument(
+        "--db",
+        type=str,
+        default=DEFAULT_DB,
+        help=f"Database file (default: {DEFAULT_DB})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    # --db is also accepted after the command, e.g. "f1a ingest FILES --db f.sqlite"
+    db_option = argparse.ArgumentParser(add_help=False)
+    db_option.add_argument(
+        "--db", type=str, default=argparse.SUPPRESS, help="Database file"
+    )
+    profiling.add_arguments(db_option)
+    ingest = commands.add_parser(
+        "ingest", help="Load new capture lines", parents=[db_option]
+    )
+    ingest.add_argument(
+        "input_files",
+        type=str,
+        nargs="+",
+        help="JSON Lines input files or directories containing them",
+    )
+    ingest.add_argument(
+        "--follow",
+        type=float,
+        metavar="SECONDS",
+        help="Keep polling the files for new lines every SECONDS (for live captures)",
+    )
+    query = commands.add_parser(
+        "query", help="Run a SQL query and print the result", parents=[db_option]
+    )
+    query.add_argument(
+        "sql", type=str, help="SQL statement, e.g. SELECT * FROM lap_view"
+    )
+    return parser.parse_args()
+
+
+class TimingDatabase:
+    """Connection to a timing database with incremental ingest and lap queries.
+
+    Args:
+        path (string): SQLite database file, created on first use
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(schema())
+        self.sync_drivers()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def sync_drivers(self, registry=None):
+        """Refresh the drivers table from the driver registry, ``REGISTRY`` by default."""
+        if registry is None:
+            from Data_visualization.driver_info import REGISTRY
+
+            registry = REGISTRY
+        table = registry.table.reset_index()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO drivers VALUES (?, ?, ?, ?, ?)",
+                table[["code", "full_name", "team", "color", "number"]]
+                .astype(str)
+                .itertuples(index=False),
+            )
+
+    def _session_row(self, info):
+        """Id and ingest progress of a capture, registering it on first sight."""
+        path = str(info.path.resolve())
+        row = self.connection.execute(
+            "SELECT id, bytes_read, snapshots, last_timestamp, last_time"
+            " FROM sessions WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is None:
+            cursor = self.connection.execute(
+                "INSERT INTO sessions (path, name, event, kind, start)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (path, info.name, info.event, info.kind, info.start),
+            )
+            row = (cursor.lastrowid, 0, 0, None, None)
+        return row
+
+    def _lap_state(self, session_id):
+        """Lap detection state dicts and lap counts saved by the previous ingest."""
+        last_s3, last_lap, counts = {}, {}, {}
+        for driver, s3, lap, laps in self.connection.execute(
+            "SELECT driver, last_s3, last_lap, laps FROM lap_state WHERE session_id = ?",
+            (session_id,),
+        ):
+            last_s3[driver] = s3
+            if lap:
+                last_lap[driver] = tuple(lap.split("|"))
+            counts[driver] = laps
+        return last_s3, last_lap, counts
+
+    def ingest(self, filepath):
+        """Load the lines of a capture that were added since the last ingest.
+
+        Only complete lines are read, so a file that is still being written is
+        picked up where this call stopped on the next one.
+
+        Args:
+            filepath (string): path to a JSONL capture file
+
+        Returns:
+            int: number of new snapshots stored
+        """
+        from Data_visualization.weather import WEATHER_FIELDS, parse_weather_values
+
+        info = session_info(filepath)
+        with self.connection:
+            session_id, offset, count, last_timestamp, last_time = self._session_row(
+                info
+            )
+            snapshots = []
+            with open(info.path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    try:
+                        snapshot = loads(line)
+                    except DecodeError:
+                        continue
+                    if isinstance(snapshot, list) and snapshot:
+                        snapshots.append(snapshot)
+            if not snapshots:
+                self.connection.execute(
+                    "UPDATE sessions SET bytes_read = ? WHERE id = ?",
+                    (offset, session_id),
+                )
+                return 0
+
+            timestamps = [s[0].get("timestamp", "") for s in snapshots]
+            captured_at = [s[0].get("captured_at") for s in snapshots]
+            if None in captured_at:
+                times = self._continue_clock(timestamps, last_timestamp, last_time)
+            else:
+                times = captured_at
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO snapshots VALUES ({', '.join('?' * (5 + len(SNAPSHOT_FIELDS)))})",
+                (
+                    (
+                        session_id,
+                        count + i,
+                        timestamps[i],
+                        times[i],
+                        entry.get("driver_short_name"),
+                        *(entry.get(field) for field in SNAPSHOT_FIELDS),
+                    )
+                    for i, snapshot in enumerate(snapshots)
+                    for entry in snapshot
+                    if entry.get("driver_short_name")
+                ),
+            )
+            weather = {
+                column: parse_weather_values([s[0].get(field) for s in snapshots])
+                for field, column in WEATHER_FIELDS.items()
+            }
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO weather VALUES ({', '.join('?' * (4 + len(WEATHER_FIELDS)))})",
+                (
+                    (
+                        session_id,
+                        count + i,
+                        timestamps[i],
+                        times[i],
+                        *(_nullable(weather[c][i]) for c in WEATHER_FIELDS.values()),
+                    )
+                    for i in range(len(snapshots))
+                ),
+            )
+            self._ingest_laps(session_id, snapshots, timestamps, times)
+            self.connection.execute(
+                "UPDATE sessions SET bytes_read = ?, snapshots = ?, last_timestamp = ?,"
+                " last_time = ? WHERE id = ?",
+                (
+                    offset,
+                    count + len(snapshots),
+                    timestamps[-1],
+                    times[-1],
+                    session_id,
+                ),
+            )
+        return len(snapshots)
+
+    @staticmethod
+    def _continue_clock(timestamps, last_timestamp, last_time):
+        """Session seconds of new timestamps, continuing the previous ingest's clock."""
+        from Data_visualization.lap_table import clock_to_seconds
+
+        if last_timestamp is None:
+            return clock_to_seconds(timestamps).tolist()
+        seconds = clock_to_seconds([last_timestamp, *timestamps])
+        return (seconds[1:] + (last_time - seconds[0])).tolist()
+
+    def _ingest_laps(self, session_id, snapshots, timestamps, times):
+        """Detect completed laps in new snapshots and store them with the detector state."""
+        from Data_visualization.lap_table import detect_laps
+
+        last_s3, last_lap, counts = self._lap_state(session_id)
+        time_of = dict(zip(timestamps, times))
+        rows = []
+        for code, s1, s2, s3, best, pits, position, stamp, epoch in detect_laps(
+            (entry for snapshot in snapshots for entry in snapshot), last_s3, last_lap
+        ):
+            counts[code] = counts.get(code, 0) + 1
+            rows.append(
+                (
+                    session_id,
+                    code,
+                    counts[code],
+                    round(s1 + s2 + s3, 3),
+                    s1,
+                    s2,
+                    s3,
+                    best,
+                    parse_int(pits),
+                    parse_int(position),
+                    stamp,
+                    epoch if epoch is not None else time_of.get(stamp),
+                )
+            )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO laps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO lap_state VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    session_id,
+                    code,
+                    s3,
+                    "|".join(last_lap[code]) if code in last_lap else None,
+                    counts.get(code, 0),
+                )
+                for code, s3 in last_s3.items()
+            ),
+        )
+
+    def ingest_all(self, filepaths):
+        """Ingest every capture in a list of files and directories.
+
+        Returns:
+            dict: session name -> number of new snapshots
+        """
+        return {path.stem: self.ingest(path) for path in expand_inputs(filepaths)}
+
+    def session_ids(self, filepaths):
+        """Database ids of capture files, ingesting any new lines first."""
+        ids = []
+        for path in expand_inputs(filepaths):
+            self.ingest(path)
+            ids.append(
+                self.connection.execute(
+                    "SELECT id FROM sessions WHERE path = ?", (str(path.resolve()),)
+                ).fetchone()[0]
+            )
+        return ids
+
+    def top_drivers(self, session_id, limit):
+        """Codes of the first ``limit`` drivers of a session's last stored snapshot."""
+        rows = self.connection.execute(
+            "SELECT driver FROM snapshots WHERE session_id = ? AND snapshot ="
+            " (SELECT MAX(snapshot) FROM snapshots WHERE session_id = ?)"
+            " ORDER BY CAST(position AS INTEGER) LIMIT ?",
+            (session_id, session_id, limit),
+        )
+        return [driver for (driver,) in rows]
+
+    def query(self, sql, params=()):
+        """Run a query and return the result as a DataFrame."""
+        import pandas as pd
+
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def lap_table(self, filepaths, limit=None):
+        """Lap table of capture files in the ``lap_table.LAP_COLUMNS`` layout.
+
+        Args:
+            filepaths (list): JSONL capture files or directories of them
+            limit (int, optional): only return the top ``limit`` drivers of
+                each session's final classification
+
+        Returns:
+            DataFrame: same columns and order as ``lap_table.load_lap_table``
+        """
+        import pandas as pd
+
+        from Data_visualization.lap_table import LAP_COLUMNS
+
+        frames = []
+        for session_id in self.session_ids(filepaths):
+            sql = (
+                "SELECT s.event AS Event, s.name AS Session, l.driver AS Driver,"
+                " l.lap AS Lap, l.lap_time AS LapTime, l.s1 AS S1, l.s2 AS S2,"
+                " l.s3 AS S3, l.best_lap AS BestLap, l.pits AS Pits,"
+                " l.position AS Position, l.timestamp AS Timestamp, l.time AS Time"
+                " FROM laps l JOIN sessions s ON s.id = l.session_id"
+                " WHERE l.session_id = ?"
+            )
+            params = [session_id]
+            if limit:
+                drivers = self.top_drivers(session_id, limit)
+                sql += f" AND l.driver IN ({', '.join('?' * len(drivers))})"
+                params.extend(drivers)
+            frames.append(self.query(sql + " ORDER BY l.rowid", params))
+        laps = pd.concat(frames, ignore_index=True)
+        laps["BestLap"] = laps["BestLap"].astype(float)
+        return laps[LAP_COLUMNS]
+
+    def weather_series(self, filepaths):
+        """Weather readings of capture files in the ``weather.build_weather_series`` layout."""
+        import pandas as pd
+
+        from Data_visualization.weather import WEATHER_FIELDS
+
+        frames = [
+            self.query(
+                "SELECT s.event AS Event, s.name AS Session, w.timestamp AS Timestamp, w.time AS Time,"
+                f" {', '.join(f'w.{c}' for c in WEATHER_FIELDS.values())}"
+                " FROM weather w JOIN sessions s ON s.id = w.session_id"
+                " WHERE w.session_id = ? ORDER BY w.snapshot",
+                (session_id,),
+            )
+            for session_id in self.session_ids(filepaths)
+        ]
+        return pd.concat(frames, ignore_index=True).drop_duplicates(
+            ["Event", "Session", "Timestamp"]
+        )
+
+
+def _nullable(value):
+    """Store NaN readings as NULL."""
+    return None if value != value else float(value)
+
+
+def main():
+    args = parse_args()
+    with TimingDatabase(args.db) as db:
+        if args.command == "query":
+            print(db.query(args.sql).to_string(index=False))
+            return
+        try:
+            while True:
+                for session, added in db.ingest_all(args.input_files).items():
+                    if added or not args.follow:
+                        print(f"{session}: {added} new snapshots")
+                if not args.follow:
+                    break
+                time.sleep(args.follow)
+        except KeyboardInterrupt:
+            pass
+    print(f"✅ Timing data saved to {args.db}")
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,283 @@
+"""Weather Normalized Pace
+=============================================
+Parse the weather fields captured with every snapshot and estimate lap times
+corrected to a common track temperature.
+
+The capture stores weather as unit-suffixed strings (``"23.1 °"``,
+``"1.4 mps"``, ``"59.0%"``, ``"1021.3 mBar"``).  They are parsed into a numeric
+series with one row per snapshot and joined to the lap table with an as-of join
+on capture time, so every lap gets the latest weather reading at or before it
+was completed.  A single least-squares fit with one intercept per driver (or
+team), one offset per session and a shared temperature slope then gives the
+time cost of each degree within a session, which is used to move every lap to
+the reference temperature.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from Data_visualization.driver_info import REGISTRY
+from Data_visualization.lap_table import (
+    build_lap_table,
+    capture_seconds,
+    expand_inputs,
+    load_entries,
+)
+from Data_visualization.sessions import top_drivers
+from Data_visualization.stints import segment_stints
+import Data_visualization.cli as cli
+import Data_visualization.profiling as profiling
+
+WEATHER_FIELDS = {
+    "track_temp": "TrackTemp",
+    "air_temp": "AirTemp",
+    "humidity": "Humidity",
+    "wind_speed": "WindSpeed",
+    "pressure": "Pressure",
+    "wet_dry": "WetDry",
+}
+SESSION_KEYS = ["Event", "Session"]
+# Below this spread of the temperature there is nothing to fit a slope to
+MIN_TEMPERATURE_STD = 1e-6
+
+
+def parse_args():
+    """Parses out command line arguments.  Takes in paths to one or more JSONL session files.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = cli.build_parser(
+        "Estimate temperature corrected lap times from telemetry data.",
+        theme=False,
+        db=True,
+    )
+    parser.add_argument(
+        "--by",
+        type=str,
+        choices=["Driver", "Team"],
+        default="Driver",
+        help="Group the corrected pace by driver or team (default: Driver)",
+    )
+    parser.add_argument(
+        "--temperature",
+        type=str,
+        choices=["TrackTemp", "AirTemp"],
+        default="TrackTemp",
+        help="Temperature the lap times are corrected for (default: TrackTemp)",
+    )
+    parser.add_argument(
+        "--reference",
+        type=float,
+        help="Temperature to correct to (default: mean over all laps)",
+    )
+    return parser.parse_args()
+
+
+def parse_weather_values(values):
+    """Vectorized parse of unit-suffixed weather strings into floats.
+
+    Args:
+        values (array-like): strings such as ``"23.1 °"`` or ``"59.0%"``
+
+    Returns:
+        ndarray: float values, NaN where no number is present
+    """
+    numbers = pd.Series(values, dtype="string").str.extract(
+        r"(-?\d+(?:\.\d+)?)", expand=False
+    )
+    return pd.to_numeric(numbers, errors="coerce").to_numpy(dtype=float)
+
+
+def build_weather_series(entries, session="", event=""):
+    """Reduce snapshot entries to one numeric weather reading per snapshot.
+
+    Args:
+        entries (list): telemetry entry dicts in capture order
+        session (string): session label stored in the Session column
+        event (string): weekend label stored in the Event column
+
+    Returns:
+        DataFrame: Event, Session, Timestamp, Time and one column per weather field
+    """
+    raw = pd.DataFrame.from_records(
+        entries, columns=["timestamp", "captured_at", *WEATHER_FIELDS]
+    ).drop_duplicates(["timestamp", "captured_at"])
+    weather = pd.DataFrame(
+        {
+            "Event": event,
+            "Session": session,
+            "Timestamp": raw["timestamp"].to_numpy(),
+            "Time": (
+                capture_seconds(raw["timestamp"], raw["captured_at"])
+                if len(raw)
+                else []
+            ),
+        }
+    )
+    for field, column in WEATHER_FIELDS.items():
+        weather[column] = parse_weather_values(raw[field])
+    return weather
+
+
+def join_weather(laps, weather):
+    """Attach the latest weather reading at or before each lap's completion.
+
+    Args:
+        laps (DataFrame): lap table with Event, Session and Time columns
+        weather (DataFrame): weather series from ``build_weather_series``
+
+    Returns:
+        DataFrame: lap table with the weather columns added
+    """
+    columns = ["Event", "Session", "Time", *WEATHER_FIELDS.values()]
+    joined = pd.merge_asof(
+        laps.sort_values("Time"),
+        weather[columns].sort_values("Time"),
+        on="Time",
+        by=["Event", "Session"],
+        direction="backward",
+    )
+    return joined.sort_values(["Event", "Session", "Driver", "Lap"]).reset_index(
+        drop=True
+    )
+
+
+def load_weather_laps(filepaths, limit=None, db=None):
+    """Load sessions into one clean lap table with weather columns.
+
+    Args:
+        filepaths (list): paths to JSONL capture files or directories of them
+        limit (int, optional): only load the top ``limit`` drivers of each
+            file's final classification
+        db (string, optional): timing database file to ingest and query instead
+
+    Returns:
+        DataFrame: clean laps (no in/out/slow laps) joined with weather
+    """
+    if db:
+        from Data_visualization.timing_db import TimingDatabase
+
+        with TimingDatabase(db) as database:
+            laps = segment_stints(database.lap_table(filepaths, limit))
+            return join_weather(laps[laps["Clean"]], database.weather_series(filepaths))
+    laps, weather = [], []
+    for path in expand_inputs(filepaths):
+        entries = load_entries(path, top_drivers(path, limit) if limit else None)
+        session, event = path.stem, path.resolve().parent.name
+        laps.append(build_lap_table(entries, session, event))
+        weather.append(build_weather_series(entries, session, event))
+    laps = segment_stints(pd.concat(laps, ignore_index=True))
+    laps = laps[laps["Clean"]]
+    return join_weather(laps, pd.concat(weather, ignore_index=True))
+
+
+class TemperatureFit(NamedTuple):
+    """Result of ``fit_temperature_model``."""
+
+    slope: float
+    varies: bool
+    reference: float
+    table: pd.DataFrame
+
+
+def fit_temperature_model(laps, by="Driver", temperature="TrackTemp", reference=None):
+    """Fit lap time against temperature with one intercept per group and session.
+
+    The model is ``LapTime = intercept[group] + offset[session] + slope *
+    (temperature - mean)``, solved in one ``np.linalg.lstsq`` call over every
+    lap.  The session offsets (Event and Session, the first one fixed at 0)
+    absorb the pace differences between practice, qualifying and races and
+    between tracks, so the slope only comes from temperature changes within
+    sessions.  The temperature is centred so the intercepts are paces at the
+    mean temperature rather than extrapolations to zero degrees.  When the
+    temperature did not change within any session the slope is 0 and no lap
+    is moved.
+
+    Args:
+        laps (DataFrame): lap table joined with weather
+        by (string): grouping column, "Driver" or "Team"
+        temperature (string): weather column used as the regressor
+        reference (float, optional): temperature to correct to, defaults to
+            the mean over the laps fitted
+
+    Returns:
+        TemperatureFit: slope in seconds per degree, whether the temperature
+        varied enough to fit it, the reference temperature used, and a
+        DataFrame with one row per group holding Laps, MedianLapTime,
+        CorrectedMedian and CorrectedPace (pace at the reference temperature
+        in an average session of the input)
+    """
+    laps = laps.dropna(subset=["LapTime", temperature])
+    if by == "Team":
+        groups = REGISTRY.lookup(laps["Driver"], "team", events=laps["Event"])
+    else:
+        groups = laps[by]
+    codes, names = pd.factorize(groups, sort=True)
+    sessions = laps.groupby(SESSION_KEYS, sort=False).ngroup().to_numpy()
+    offsets = len(np.unique(sessions)) - 1
+    temp = laps[temperature].to_numpy(dtype=float)
+    y = laps["LapTime"].to_numpy(dtype=float)
+
+    mean = temp.mean()
+    within = temp - pd.Series(temp).groupby(sessions).transform("mean").to_numpy()
+    varies = bool(within.std() > MIN_TEMPERATURE_STD)
+    design = np.zeros((len(y), len(names) + offsets + varies))
+    rows = np.arange(len(y))
+    design[rows, codes] = 1.0
+    later = sessions > 0
+    design[rows[later], len(names) + sessions[later] - 1] = 1.0
+    if varies:
+        design[:, -1] = temp - mean
+    coefficients, *_ = np.linalg.lstsq(design, y, rcond=None)
+    slope = float(coefficients[-1]) if varies else 0.0
+    session_offsets = np.concatenate(
+        ([0.0], coefficients[len(names) : len(names) + offsets])
+    )
+
+    if reference is None:
+        reference = float(mean)
+    corrected = y - slope * (temp - reference)
+    result = (
+        pd.DataFrame({by: names[codes], "LapTime": y, "Corrected": corrected})
+        .groupby(by)
+        .agg(
+            Laps=("LapTime", "size"),
+            MedianLapTime=("LapTime", "median"),
+            CorrectedMedian=("Corrected", "median"),
+        )
+    )
+    result["CorrectedPace"] = (
+        coefficients[: len(names)]
+        + session_offsets[sessions].mean()
+        + slope * (reference - mean)
+    )
+    return TemperatureFit(
+        slope, varies, reference, result.sort_values("CorrectedPace").reset_index()
+    )
+
+
+def main():
+    args = parse_args()
+    sessions = cli.sessions_from_args(args)
+    if not sessions:
+        return
+    laps = load_weather_laps([s.path for s in sessions], args.limit, args.db)
+    if laps.empty:
+        print("No valid lap times found.")
+        return
+    fit = fit_temperature_model(laps, args.by, args.temperature, args.reference)
+    if fit.varies:
+        print(
+            f"{args.temperature} effect: {fit.slope:+.3f} s per degree within sessions,"
+            f" corrected to {fit.reference:.1f}°"
+        )
+    else:
+        print(f"{args.temperature} did not change, lap times are not corrected")
+    print(fit.table.round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
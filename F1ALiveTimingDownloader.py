@@ -1,15 +1,95 @@
+import argparse
 import time
-from rebrowser_playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 import urllib.request
-from datetime import datetime, timezone, timedelta
-import json
+from datetime import datetime, timezone
 import os
 
+from Data_visualization.capture_json import dumps
+from Data_visualization.lap_prediction import LapPredictor
+from Data_visualization.rolling_store import RollingStore
+from Data_visualization.sector_tracker import SectorTracker, format_lap_time, parse_time
+import Data_visualization.profiling as profiling
+
 # URL of the live timing page
 URL = "https://www.f1academy.com/livetiming/index.html"
 PAGE_TIMEOUT = 60000
 PAGE_LOADING_TIME = 5
+# Seconds between the reads of one instance when several run side by side
+CAPTURE_PERIOD = 7
+RETRY_DELAY = 2
+MAX_CONSECUTIVE_ERRORS = 5
+ROLLING_WINDOW = 10
+
+
+def parse_args():
+    """Parses out command line arguments.
+
+    Returns:
+        Parser Arguments: Array of optional parser arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Capture the F1 Academy live timing page to a JSON Lines file."
+    )
+    parser.add_argument(
+        "--instances",
+        type=int,
+        default=1,
+        help="Number of downloaders capturing the session side by side (default: 1)",
+    )
+    parser.add_argument(
+        "--instance",
+        type=int,
+        default=0,
+        help="Index of this downloader, 0 to --instances minus 1 (default: 0)",
+    )
+    parser.add_argument(
+        "--period",
+        type=float,
+        default=CAPTURE_PERIOD,
+        help=f"Seconds between reads of each instance when --instances > 1 (default: {CAPTURE_PERIOD})",
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=ROLLING_WINDOW,
+        help=f"Minutes of recent laps summarised under every snapshot (default: {ROLLING_WINDOW})",
+    )
+    parser.add_argument(
+        "--html",
+        type=str,
+        help="Parse this saved page instead of the live one, e.g. dev_artifacts/f1av2.html",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="With --html: times to parse the page (default: 1)",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    if not 0 <= args.instance < args.instances:
+        parser.error("--instance must be between 0 and --instances minus 1")
+    return args
+
+
+def wait_for_slot(instance, instances, period):
+    """Sleep until this instance's next read slot.
+
+    Slots are aligned to the system clock, so instances started separately
+    read the page at evenly staggered phases without talking to each other.
+
+    Args:
+        instance (int): index of this downloader
+        instances (int): number of downloaders running side by side
+        period (float): seconds between two reads of one instance
+    """
+    offset = instance * period / instances
+    now = time.time()
+    slot = (now - offset) // period * period + offset
+    if slot < now:
+        slot += period
+    time.sleep(slot - now)
 
 
 def parse_weather_data(soup):
@@ -42,6 +122,12 @@ def parse_weather_data(soup):
     return weather_info
 
 
+def parse_session_name(soup):
+    """Session name from the page header, e.g. "Race 2" or "Qualifying"."""
+    header = soup.find("span", class_="round-session")
+    return header.get_text(strip=True) if header else ""
+
+
 def download_live_timing(page):
     """Opens the target webpage, waits a set amount of time for it to load, and return HTML of that page.
 
@@ -49,23 +135,38 @@ def download_live_timing(page):
         page (Page): rebrowser playwright page object
 
     Returns:
-        HTML: HTML of loaded page
+        tuple: HTML of loaded page and the seconds navigation took, without
+        the fixed loading wait
     """
     # Navigate to the URL and wait until the network is idle
     # (This helps ensure the JavaScript has finished loading data.)
+    started = time.perf_counter()
     page.goto(URL, wait_until="commit", timeout=PAGE_TIMEOUT)
+    latency = time.perf_counter() - started
     # Optionally, wait for a specific element:
     time.sleep(PAGE_LOADING_TIME)
     # Get the rendered HTML content
     html = page.content()
-    return html
+    return html, latency
 
 
-def parse_driver_data(html):
+def parse_driver_data(
+    html, tracker=None, captured_at=None, page_latency=None, predictor=None, store=None
+):
     """Take HTML data and parse into an array of dictionaries
 
+    latest_lap_time is only filled on the snapshot where the tracker saw a
+    driver complete a full S1 -> S2 -> S3 sequence, so every lap is written once.
+
     Args:
         html (HTML): HTML of live timing page
+        tracker (SectorTracker): sector state carried between snapshots
+        captured_at (float): epoch seconds when the page content was read, defaults to now
+        page_latency (float): seconds the navigation to the page took
+        predictor (LapPredictor, optional): updated with every row, so its
+            predictions project the laps in progress on this snapshot
+        store (RollingStore, optional): recent history every row and completed
+            lap is appended to
 
     Returns:
         Dictionary: A dictionary of all drivers with relevant data fields
@@ -75,8 +176,12 @@ def parse_driver_data(html):
     if not tbody:
         print("Error: Could not find the <tbody> element in the rendered HTML.")
         return []
-    utc_now = datetime.now(timezone.utc)
+    tracker = tracker if tracker is not None else SectorTracker()
+    if captured_at is None:
+        captured_at = time.time()
+    utc_now = datetime.fromtimestamp(captured_at, timezone.utc)
     weather_data = parse_weather_data(soup)
+    session_name = parse_session_name(soup)
     drivers = []
     for section in tbody[1].find_all("tr"):
         tds = section.find_all("td")
@@ -90,43 +195,50 @@ def parse_driver_data(html):
             strip=True
         )
 
-        # Parse into timedeltas
-        s1_td = parse_sector_time(sector1)
-        s2_td = parse_sector_time(sector2)
-        s3_td = parse_sector_time(sector3)
+        driver_short_name = section.find(
+            "td", class_="driver-short-name ng-binding"
+        ).get_text(strip=True)
 
-        # Conditionally calculate latest_lap_time
-        if all([s1_td, s2_td, s3_td]):
-            total = s1_td + s2_td + s3_td
-            latest_lap_time = (
-                f"{int(total.total_seconds() // 60)}:{total.total_seconds() % 60:06.3f}"
+        # Only a lap whose sectors were seen completing in order gets a lap time
+        latest_lap_time = ""
+        completed = tracker.update(driver_short_name, sector1, sector2, sector3)
+        if completed:
+            sectors = [parse_time(s) for s in completed]
+            if None not in sectors:
+                latest_lap_time = format_lap_time(sum(sectors))
+
+        position = section.find("td", class_="position ng-binding").get_text(strip=True)
+        best_lap = section.find("td", class_="best-lap ng-binding").get_text(strip=True)
+        if predictor is not None:
+            predictor.update(
+                driver_short_name,
+                tracker.in_progress(driver_short_name),
+                completed,
+                best_lap,
+            )
+
+        if store is not None:
+            store.add_snapshot(
+                driver_short_name,
+                captured_at,
+                int(position) if position.isdigit() else 0,
+                [parse_time(s) for s in (sector1, sector2, sector3)],
             )
-        else:
-            latest_lap_time = ""
+            sectors = [parse_time(s) for s in completed or ()]
+            if sectors and None not in sectors:
+                store.add_lap(driver_short_name, captured_at, sectors)
 
         driver_info = {
-            "position": section.find("td", class_="position ng-binding").get_text(
-                strip=True
-            ),
-            "driver_short_name": section.find(
-                "td", class_="driver-short-name ng-binding"
-            ).get_text(strip=True),
+            "position": position,
+            "driver_short_name": driver_short_name,
             "gap": section.find("td", class_="gap ng-binding").get_text(strip=True),
             "interval": section.find("td", class_="interval ng-binding").get_text(
                 strip=True
             ),
-            "best_lap": section.find("td", class_="best-lap ng-binding").get_text(
-                strip=True
-            ),
-            "sector1_time": section.find(
-                "td", class_="sector1-time ng-binding"
-            ).get_text(strip=True),
-            "sector2_time": section.find(
-                "td", class_="sector2-time ng-binding"
-            ).get_text(strip=True),
-            "sector3_time": section.find(
-                "td", class_="sector3-time ng-binding"
-            ).get_text(strip=True),
+            "best_lap": best_lap,
+            "sector1_time": sector1,
+            "sector2_time": sector2,
+            "sector3_time": sector3,
             # "lap_count": section.find("td", class_="lap-count ng-binding").get_text(
             #    strip=True
             # ),
@@ -135,6 +247,11 @@ def parse_driver_data(html):
             ),
             "latest_lap_time": latest_lap_time,
             "timestamp": utc_now.strftime("%H:%M:%S"),
+            "session_name": session_name,
+            "captured_at": round(captured_at, 3),
+            "page_latency": (
+                round(page_latency, 3) if page_latency is not None else None
+            ),
             **weather_data,
         }
         drivers.append(driver_info)
@@ -142,25 +259,36 @@ def parse_driver_data(html):
     return drivers
 
 
-def parse_sector_time(sector_string):
-    """Converts string to timedelta object with sector time split in to minutes and seconds
+def parse_saved_page(filepath, repeat=1, window=ROLLING_WINDOW):
+    """Run a saved live timing page through the capture pipeline without a browser.
+
+    The page is parsed ``repeat`` times with one tracker, predictor and
+    rolling store, as successive identical snapshots, and nothing is written,
+    so the parsing cost can be measured and profiled offline.
 
     Args:
-        sector_string (string): Sector time in string format ex. 12.345
+        filepath (string): HTML file saved from the live timing page
+        repeat (int): number of times to parse the page
+        window (float): minutes kept by the rolling store
 
     Returns:
-        timedelta: Timedelta object with sector time split in to minutes and seconds
+        list: driver dictionaries of the last parse
     """
-    try:
-        if "STOP" in sector_string:
-            return None
-        elif ":" in sector_string:
-            minutes, seconds = sector_string.split(":")
-            return timedelta(minutes=int(minutes), seconds=float(seconds))
-        else:
-            return timedelta(seconds=float(sector_string))
-    except (ValueError, AttributeError):
-        return None
+    with open(filepath, "r", encoding="utf-8") as f:
+        html = f.read()
+    tracker = SectorTracker()
+    predictor = LapPredictor()
+    store = RollingStore(window * 60)
+    drivers = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        drivers = parse_driver_data(html, tracker, None, None, predictor, store)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Parsed {len(drivers)} drivers from {filepath}"
+        f" in {elapsed / max(repeat, 1) * 1000:.1f} ms per page"
+    )
+    return drivers
 
 
 def main():
@@ -168,7 +296,19 @@ def main():
     Create file for storing driver data in jsonl format.
     Loop and call logic that opens the page and gathers the html.
     Dump the returned dictionary to the create jsonl file.
+
+    With --instances > 1 every instance writes its own file and reads the page
+    in its own phase; Data_visualization/capture_merge.py merges the files.
+    Errors are reported and retried, and a fresh page is opened after
+    MAX_CONSECUTIVE_ERRORS failures in a row, so a capture only stops on Ctrl+C.
     """
+    args = parse_args()
+    if args.html:
+        parse_saved_page(args.html, args.repeat, args.window)
+        return
+    # Only a live capture needs the browser
+    from rebrowser_playwright.sync_api import sync_playwright
+
     with sync_playwright() as playwright:
         # Launch headless Chromium
         browser = playwright.chromium.launch(
@@ -182,29 +322,62 @@ def main():
         )
         page = context.new_page()
         utc_fileName = datetime.now(timezone.utc)
-        filename = utc_fileName.strftime("f1aData_%Y_%m_%d_%H_%M_%S.jsonl")
+        filename = utc_fileName.strftime("f1aData_%Y_%m_%d_%H_%M_%S")
+        if args.instances > 1:
+            filename += f"_instance{args.instance}"
+        filename += ".jsonl"
+        tracker = SectorTracker()
+        predictor = LapPredictor()
+        store = RollingStore(args.window * 60)
+        errors = 0
         while True:
             try:
-                html = download_live_timing(page)
-                # htmlFile = open("f1av2.html", "r", encoding="utf-8")
-                # html = htmlFile.read()
-                drivers = parse_driver_data(html)
+                if page is None:
+                    page = context.new_page()
+                if args.instances > 1:
+                    wait_for_slot(args.instance, args.instances, args.period)
+                html, page_latency = download_live_timing(page)
+                captured_at = time.time()
+                drivers = parse_driver_data(
+                    html,
+                    tracker,
+                    captured_at,
+                    page_latency,
+                    predictor,
+                    store,
+                )
 
                 print("=== Driver Data ===")
                 if drivers:
                     with open(filename, "a", encoding="utf-8") as f:
-                        json.dump(drivers, f)
+                        f.write(dumps(drivers))
                         f.write("\n")
                     for driver in drivers:
                         print(driver)
+                    print("=== Laps In Progress ===")
+                    print(predictor.format_predictions())
+                    print(f"=== Last {args.window:g} Minutes ===")
+                    print(store.format_summary())
                 else:
                     print("No driver data found.")
+                errors = 0
 
-            except Exception as e:
-                print("An error occurred:", e)
+            except KeyboardInterrupt:
                 break
+            except Exception as e:
+                errors += 1
+                print(f"An error occurred ({errors} in a row):", e)
+                if errors >= MAX_CONSECUTIVE_ERRORS:
+                    print("Opening a new page.")
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+                    page = None
+                    errors = 0
+                time.sleep(RETRY_DELAY)
         browser.close()
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
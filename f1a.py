@@ -0,0 +1,304 @@
+"""F1 Academy Data Command Line
+=============================================
+One entry point for the downloader and the visualizers:
+
+    python f1a.py capture
+    python f1a.py leaderboard Montreal_2025
+    python f1a.py quali-deltas Montreal_2025/f1aData_qualifying_montreal.jsonl
+    python f1a.py team-pace Montreal_2025 --session R
+    python f1a.py lap-trend Montreal_2025/f1aData_FP1.jsonl --mode grid
+    python f1a.py race-history Montreal_2025 --output race_history.png
+    python f1a.py consistency Montreal_2025 --metric Spread
+    python f1a.py ingest Montreal_2025
+
+Every subcommand passes its arguments on to the script it runs, so
+``python f1a.py team-pace --help`` lists the options of
+RaceTeamSeabornBoxPlot.py.  A script is only imported when its subcommand
+runs, and the scripts import pandas, matplotlib and seaborn inside the
+functions that need them, so ``--help`` and data-only runs skip the plotting
+libraries.
+
+``python f1a.py startup`` times a cold start (``--help`` in a fresh
+interpreter) of every subcommand, and ``--record`` appends the result to
+dev_artifacts/startup_times.jsonl so regressions show up against the last run.
+
+Every subcommand accepts ``--profile OUT`` (see Data_visualization/profiling.py),
+and ``python f1a.py profile`` profiles every subcommand against the saved page
+in dev_artifacts and the Montreal_2025 captures, so profiles are reproducible:
+it prints each run's wall time and busiest packages and keeps the flame graphs
+and full reports in ``--output`` (default: profiles).
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import Data_visualization.profiling as profiling
+
+# Subcommand -> (module, arguments put in front of the user's, help)
+COMMANDS = {
+    "capture": (
+        "F1ALiveTimingDownloader",
+        [],
+        "Capture the live timing page to a JSON Lines file",
+    ),
+    "leaderboard": (
+        "Data_visualization.topSectorsParse",
+        [],
+        "Write the HTML sector leaderboards",
+    ),
+    "quali-deltas": (
+        "Data_visualization.QualifyingDeltaViz",
+        [],
+        "Plot lap time deltas to the fastest driver",
+    ),
+    "team-pace": (
+        "Data_visualization.RaceTeamSeabornBoxPlot",
+        [],
+        "Plot team race pace",
+    ),
+    "lap-trend": (
+        "Data_visualization.F1ALapTimes",
+        [],
+        "Plot lap time trends per driver",
+    ),
+    "race-history": (
+        "Data_visualization.race_history",
+        [],
+        "Plot lap by lap race positions",
+    ),
+    "consistency": (
+        "Data_visualization.sector_consistency",
+        [],
+        "Plot sector consistency per driver",
+    ),
+    "ingest": (
+        "Data_visualization.timing_db",
+        ["ingest"],
+        "Load captures into the timing database",
+    ),
+}
+REPO_ROOT = Path(__file__).resolve().parent
+STARTUP_LOG = REPO_ROOT / "dev_artifacts" / "startup_times.jsonl"
+# Offline arguments of every subcommand for "f1a profile", {out} is the output directory
+PROFILE_RUNS = {
+    "capture": ["--html", "dev_artifacts/f1av2.html", "--repeat", "50"],
+    "leaderboard": ["Montreal_2025", "--output", "{out}/sector_leaderboard.html"],
+    "quali-deltas": ["Montreal_2025", "--session", "Q"],
+    "team-pace": ["Montreal_2025", "--session", "R"],
+    "lap-trend": [
+        "Montreal_2025/f1aData_FP1.jsonl",
+        "--mode",
+        "grid",
+        "--output",
+        "{out}/lap_trend.png",
+    ],
+    "race-history": ["Montreal_2025", "--output", "{out}/race_history.png"],
+    "consistency": ["Montreal_2025", "--output", "{out}/consistency.png"],
+    "ingest": ["Montreal_2025", "--db", "{out}/timing.sqlite"],
+}
+
+
+def parse_args(argv):
+    """Parses out the subcommand.  Everything after it is left to the subcommand's script.
+
+    Returns:
+        tuple: parser arguments and the arguments passed on to the subcommand
+    """
+    parser = argparse.ArgumentParser(
+        prog="f1a", description="F1 Academy live timing capture and analysis."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (_, _, help_text) in COMMANDS.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+    startup = commands.add_parser(
+        "startup", help="Measure the cold-start time of every subcommand"
+    )
+    startup.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Fresh interpreters started per subcommand (default: 5)",
+    )
+    startup.add_argument(
+        "--record",
+        action="store_true",
+        help=f"Append the result to {STARTUP_LOG.relative_to(STARTUP_LOG.parents[1])}",
+    )
+    profile = commands.add_parser(
+        "profile", help="Profile every subcommand on the offline captures"
+    )
+    profile.add_argument(
+        "commands",
+        nargs="*",
+        metavar="COMMAND",
+        help=f"Subcommands to profile: {', '.join(PROFILE_RUNS)} (default: all)",
+    )
+    profile.add_argument(
+        "--output",
+        type=str,
+        default="profiles",
+        help="Directory for the profiles and reports (default: profiles)",
+    )
+    profile.add_argument(
+        "--profiler",
+        type=str,
+        choices=profiling.PROFILERS,
+        default="sample",
+        help="Stack sampling or cProfile tracing (default: sample)",
+    )
+    args, rest = parser.parse_known_args(argv)
+    if args.command in ("startup", "profile") and rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    unknown = set(getattr(args, "commands", [])) - set(PROFILE_RUNS)
+    if unknown:
+        parser.error(f"cannot profile: {' '.join(sorted(unknown))}")
+    return args, rest
+
+
+def run_command(name, args):
+    """Import the script of a subcommand and run its main with ``args``."""
+    module, prefix, _ = COMMANDS[name]
+    # Scripts with their own subcommands add the name to the program name themselves
+    sys.argv = ["f1a" if prefix else f"f1a {name}", *prefix, *args]
+    profiling.run(importlib.import_module(module).main)
+
+
+def cold_start(command, repeat):
+    """Median wall time of ``f1a <command> --help`` in fresh interpreters.
+
+    Returns:
+        float: milliseconds, None when the subcommand fails to start
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, __file__, *command, "--help"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        if result.returncode != 0:
+            return None
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def measure_startup(repeat=5, record=False):
+    """Time every subcommand's cold start and optionally log it.
+
+    The bare interpreter and ``f1a --help`` are measured too, as the floor
+    every subcommand starts from.
+
+    Returns:
+        dict: subcommand -> median milliseconds (None when it cannot start,
+        e.g. the downloader without its browser dependencies)
+    """
+    results = {"python": None, "f1a": cold_start([], repeat)}
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"])
+        times.append((time.perf_counter() - start) * 1000)
+    results["python"] = statistics.median(times)
+    for name in COMMANDS:
+        results[name] = cold_start([name], repeat)
+
+    previous = {}
+    if STARTUP_LOG.exists():
+        lines = STARTUP_LOG.read_text(encoding="utf-8").splitlines()
+        if lines:
+            previous = json.loads(lines[-1])["ms"]
+    print(f"{'Command':<14}{'Cold start ms':>14}{'Last record':>14}")
+    for name, ms in results.items():
+        shown = "unavailable" if ms is None else f"{ms:.0f}"
+        last = previous.get(name)
+        last = "-" if last is None else f"{last:.0f}"
+        print(f"{name:<14}{shown:>14}{last:>14}")
+
+    if record:
+        entry = {
+            "date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "python": platform.python_version(),
+            "repeat": repeat,
+            "ms": {k: None if v is None else round(v, 1) for k, v in results.items()},
+        }
+        with open(STARTUP_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"✅ Startup times appended to {STARTUP_LOG}")
+    return results
+
+
+def _packages(report, top=3):
+    """Busiest packages from the package table of a profile report."""
+    lines = report.splitlines()
+    if "   self  package" not in lines:
+        return ""
+    rows = []
+    for row in lines[lines.index("   self  package") + 1 :]:
+        if not row.strip().split(" ")[0].endswith("%"):
+            break
+        rows.append(" ".join(row.split()[::-1]))
+    return ", ".join(rows[:top])
+
+
+def profile_commands(names=None, output="profiles", profiler="sample"):
+    """Profile subcommands on the offline captures, each in a fresh interpreter.
+
+    Plots are drawn with the non-interactive Agg backend, so commands without
+    an output file build their figures but never render them.
+
+    Returns:
+        dict: subcommand -> wall milliseconds, None when it failed
+    """
+    output = Path(output).resolve()
+    output.mkdir(parents=True, exist_ok=True)
+    # Ingest only reads lines it has not seen, so every run starts from an empty database
+    (output / "timing.sqlite").unlink(missing_ok=True)
+    env = {**os.environ, "MPLBACKEND": "Agg"}
+    results = {}
+    print(f"{'Command':<14}{'Wall ms':>9}  Busiest packages")
+    for name in names or PROFILE_RUNS:
+        args = [a.format(out=output) for a in PROFILE_RUNS[name]]
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, __file__, name, *args]
+            + ["--profile", str(output / name), "--profiler", profiler],
+            cwd=REPO_ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        (output / f"{name}.txt").write_text(result.stderr, encoding="utf-8")
+        if result.returncode != 0:
+            results[name] = None
+            print(f"{name:<14}{'failed':>9}  see {output / name}.txt")
+            continue
+        results[name] = elapsed
+        print(f"{name:<14}{elapsed:>9.0f}  {_packages(result.stderr)}")
+    print(f"✅ Profiles and reports saved to {output}")
+    return results
+
+
+def main(argv=None):
+    args, rest = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command == "startup":
+        measure_startup(args.repeat, args.record)
+    elif args.command == "profile":
+        profile_commands(args.commands, args.output, args.profiler)
+    else:
+        run_command(args.command, rest)
+
+
+if __name__ == "__main__":
+    main()